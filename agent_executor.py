@@ -0,0 +1,319 @@
+"""Agent command parsing, sandboxed file operations and code extraction, independent of the Tk UI."""
+
+import json
+import os
+import re
+import tempfile
+from pathlib import Path
+from typing import Callable
+
+from conversation_store import ConversationStore
+
+
+class AgentExecutor:
+    """Turn IDE-agent replies into file operations and editor code."""
+
+    @staticmethod
+    def parse_commands(text: str) -> list[dict]:
+        """Extract JSON agent commands from assistant text.
+
+        Supported patterns:
+        - ```agent\n{...}\n``` fenced blocks (languages: agent, cmd, json, action)
+        - <!--AGENT-CMD\n{...}\n--> HTML-style comment block
+
+        Each JSON object must include an "action" key (e.g. "read", "write", "create").
+        Returns a list of parsed command dicts (may be empty).
+        """
+        commands: list[dict] = []
+        if not text:
+            return commands
+
+        fence_re = re.compile(r'```(?:agent|cmd|json|action)\n(.*?)\n```', re.S | re.IGNORECASE)
+        comment_re = re.compile(r'<!--\s*AGENT-CMD\n(.*?)\n-->', re.S | re.IGNORECASE)
+
+        for m in fence_re.findall(text):
+            s = m.strip()
+            try:
+                obj = json.loads(s)
+                if isinstance(obj, dict) and obj.get("action"):
+                    commands.append(obj)
+            except Exception:
+                # ignore parse errors for non-command blocks
+                pass
+
+        for m in comment_re.findall(text):
+            s = m.strip()
+            try:
+                obj = json.loads(s)
+                if isinstance(obj, dict) and obj.get("action"):
+                    commands.append(obj)
+            except Exception:
+                pass
+
+        return commands
+
+    @staticmethod
+    def resolve_path(path_str: str, project_root: Path | None) -> Path:
+        """Resolve a path string into an absolute Path inside the project root.
+
+        Raises RuntimeError if the path resolves outside the project root.
+        """
+        if not path_str:
+            raise RuntimeError("Empty path")
+
+        p = Path(path_str)
+        # If relative, resolve relative to project root (or cwd if not set).
+        if not p.is_absolute():
+            root = project_root or Path.cwd()
+            p = (root / p).resolve()
+        else:
+            p = p.resolve()
+
+        # Ensure project_root exists and the path is inside it.
+        root = project_root or Path.cwd()
+        try:
+            p.relative_to(root.resolve())
+        except Exception:
+            raise RuntimeError("Agent path must be inside the open project folder")
+        return p
+
+    @staticmethod
+    def execute_command(
+        cmd: dict,
+        project_root: Path | None,
+        read_open_buffer: Callable[[Path], str | None] | None = None,
+    ) -> dict:
+        """Execute a single parsed agent command.
+
+        Supported actions:
+        - read: {action: 'read', path: 'rel/or/abs'} -> returns file content
+        - write / create / write_file: {action: 'write', path:'', content:'', overwrite: bool}
+
+        `read_open_buffer` lets a front-end serve reads of a file that is open
+        (and possibly unsaved) in its editor; returning None falls back to disk.
+        Returns a result dict with keys: ok (bool), message (str), and optional content/path.
+        """
+        action = str(cmd.get("action", "")).strip().lower()
+        if action not in {"read", "write", "create", "write_file"}:
+            return {"ok": False, "message": f"unsupported action: {action}"}
+
+        try:
+            path_raw = str(cmd.get("path", ""))
+            path = AgentExecutor.resolve_path(path_raw, project_root)
+        except Exception as exc:
+            return {"ok": False, "message": f"path error: {exc}"}
+
+        if action == "read":
+            if read_open_buffer is not None:
+                try:
+                    content = read_open_buffer(path)
+                except Exception:
+                    # If we can't read from editor, fall back to file system
+                    content = None
+                if content is not None:
+                    return {"ok": True, "message": "read from editor", "content": content}
+
+            if not path.exists() or not path.is_file():
+                return {"ok": False, "message": "file not found"}
+            try:
+                try:
+                    content = path.read_text(encoding="utf-8")
+                except UnicodeDecodeError:
+                    content = path.read_text(encoding="utf-8", errors="replace")
+                return {"ok": True, "message": "read", "content": content}
+            except OSError as exc:
+                return {"ok": False, "message": f"read error: {exc}"}
+
+        # For writes/creates: perform atomic write
+        content = cmd.get("content", "")
+
+        # Filter out temporary attachment paths from content before writing to file
+        # This prevents the agent from writing attachment paths to files
+        filtered_content = ConversationStore.filter_attachment_paths(str(content))
+
+        overwrite = bool(cmd.get("overwrite", False))
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            if path.exists() and not overwrite:
+                return {"ok": False, "message": "file exists and overwrite not allowed"}
+
+            fd, tmp = tempfile.mkstemp(dir=str(path.parent), prefix=".tmp_write_")
+            os.close(fd)
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.write(filtered_content)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, path)
+            return {"ok": True, "message": "written", "path": str(path)}
+        except Exception as exc:
+            return {"ok": False, "message": f"write error: {exc}"}
+
+    @staticmethod
+    def extract_code(text: str) -> tuple[str, str]:
+        """Extract code from agent response and return (code, summary).
+
+        This function is critical for the IDE agent functionality. It:
+        1. Searches for code in markdown fenced blocks (```python, ```html, etc.)
+        2. Extracts ONLY the code content (excludes surrounding explanations)
+        3. Combines multiple code blocks if present
+        4. Generates a human-readable summary of what the code does
+
+        The extracted code goes directly into the IDE editor, while the summary
+        is shown in the agent chat window for user feedback.
+
+        Args:
+            text: Raw AI response text that may contain code blocks
+
+        Returns:
+            Tuple of (code_content, summary_text):
+                - code_content: Pure code to write to editor (empty string if none found)
+                - summary_text: Brief description of what was done
+
+        Example:
+            Input: "I'll create a function.\n```python\ndef hello():\n    pass\n```\nDone!"
+            Output: ("def hello():\n    pass", "I'll create a function.")
+        """
+        code = ""
+        summary = ""
+
+        # Step 1: Extract all code blocks using regex
+        # Matches markdown fenced blocks like ```python, ```html, ```css, etc.
+        # The (?:...) is a non-capturing group for language identifiers
+        # \s* allows optional whitespace after the language identifier
+        # (.*?) captures the code content (non-greedy)
+        # re.DOTALL makes . match newlines, re.IGNORECASE handles ```Python, ```PYTHON, etc.
+        code_blocks = re.findall(
+            r'```(?:python|html|css|javascript|js|jsx|tsx?|typescript|web)?\s*\n(.*?)\n```',
+            text,
+            re.DOTALL | re.IGNORECASE
+        )
+        
+        # If no language-specific blocks found, try to find generic code blocks
+        if not code_blocks:
+            generic_blocks = re.findall(
+                r'```\s*\n(.*?)\n```',
+                text,
+                re.DOTALL
+            )
+            code_blocks.extend(generic_blocks)
+
+        if code_blocks:
+            # Step 2: Process found code blocks
+            # Multiple blocks might exist (e.g., HTML + CSS in same response)
+            all_code = []
+            for block in code_blocks:
+                block_stripped = block.strip()
+                if block_stripped:  # Skip empty blocks
+                    all_code.append(block_stripped)
+
+            if all_code:
+                # Step 3: Combine multiple code blocks with double newlines
+                # This maintains separation between different code sections
+                code = "\n\n".join(all_code)
+
+                # Step 4: Extract summary from explanatory text BEFORE the code
+                # We split on first ``` to get everything before the code block
+                before_code = text.split('```')[0].strip()
+
+                # Get the last meaningful line as summary (usually the agent's intro)
+                # Filter out comment lines starting with # and empty lines
+                lines = [l.strip() for l in before_code.split('\n') if l.strip() and not l.startswith('#')]
+
+                if lines:
+                    summary = lines[-1]  # Last line usually describes the action
+
+                    # Limit summary length to prevent UI overflow
+                    if len(summary) > 150:
+                        summary = summary[:150] + "..."
+                else:
+                    # Fallback if no explanatory text found
+                    summary = "Code updated"
+            else:
+                # Found code blocks but all were empty
+                summary = "Empty code block"
+        else:
+            # Step 5: No code blocks found - agent is just responding conversationally
+            # This happens when agent asks clarifying questions or provides explanations
+            # Use first line of response as summary (up to 100 chars)
+            summary = text.split('\n')[0][:100]
+
+        # Fallback: If no code was found but the response looks like code, try to extract it
+        # This handles cases where the agent generates code without proper formatting
+        if not code and AgentExecutor.looks_like_code(text):
+            # Try to extract content that might be code but not in fenced blocks
+            # Look for indented code, function definitions, etc.
+            lines = text.split('\n')
+            code_lines = []
+            in_code_section = False
+            
+            for line in lines:
+                stripped = line.strip()
+                # If line starts with common code patterns, consider it code
+                if (stripped.startswith('def ') or 
+                    stripped.startswith('class ') or 
+                    stripped.startswith('import ') or 
+                    stripped.startswith('from ') or 
+                    stripped.startswith('function ') or 
+                    stripped.startswith('<') or  # HTML tags
+                    ':' in stripped and '{' in stripped or  # CSS rules
+                    stripped.endswith(':') or  # Python class/function headers
+                    stripped.startswith('return ') or  # Return statements
+                    stripped.startswith('if ') or  # Conditional statements
+                    stripped.startswith('for ') or  # Loop statements
+                    stripped.startswith('while ') or  # Loop statements
+                    stripped.startswith('try:') or  # Try statements
+                    stripped.startswith('except ') or  # Except statements
+                    stripped.startswith('with ') or  # With statements
+                    line.startswith('    ') or  # Indented code
+                    line.startswith('\t')):  # Tab-indented code
+                    code_lines.append(line)
+                    in_code_section = True
+                elif in_code_section and not stripped:
+                    # Continue including blank lines within code sections
+                    code_lines.append(line)
+                elif in_code_section and stripped:
+                    # If we were in a code section and hit non-code, stop
+                    break
+            
+            if code_lines:
+                code = '\n'.join(code_lines).strip()
+                summary = "Code extracted from response"
+
+        return code, summary
+
+    @staticmethod
+    def looks_like_code(text: str) -> bool:
+        """Heuristic to determine if text looks like code."""
+        # Count lines that look like code vs prose
+        lines = text.split('\n')
+        code_lines = 0
+        total_lines = len([line for line in lines if line.strip()])
+        
+        if total_lines == 0:
+            return False
+        
+        for line in lines:
+            stripped = line.strip()
+            if (stripped.startswith('def ') or 
+                stripped.startswith('class ') or 
+                stripped.startswith('import ') or 
+                stripped.startswith('from ') or 
+                stripped.startswith('function ') or 
+                stripped.startswith('<') or  # HTML
+                ':' in stripped and '{' in stripped or  # CSS
+                '=' in stripped or  # Assignment
+                stripped.endswith(':') or  # Function/class definitions
+                stripped.startswith('return ') or  # Return statements
+                stripped.startswith('if ') or  # Conditional statements
+                stripped.startswith('for ') or  # Loop statements
+                stripped.startswith('while ') or  # Loop statements
+                stripped.startswith('try:') or  # Try statements
+                stripped.startswith('except ') or  # Except statements
+                stripped.startswith('with ') or  # With statements
+                line.startswith('    ') or  # Indented code
+                line.startswith('\t') or  # Tab-indented code
+                stripped.count('(') > 0 and stripped.count(')') > 0):  # Function calls
+                code_lines += 1
+        
+        # If more than half the lines look like code, treat as code
+        return (code_lines / total_lines) > 0.5
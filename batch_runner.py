@@ -0,0 +1,239 @@
+"""Headless batch runner that sends a JSONL file of prompts through the provider adapters."""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+from provider_client import PROVIDERS, ProviderClient
+
+DEFAULT_SYSTEM_PROMPT = "You are a helpful AI assistant inside a desktop chatroom app."
+SETTINGS_PATH = Path(
+    os.getenv(
+        "AI_CHATROOM_SETTINGS_PATH",
+        str(Path.home() / ".ai_goonbox_settings.json"),
+    )
+)
+
+
+class BatchRunner:
+    """Run prompts with bounded concurrency and append one JSON result per prompt.
+
+    Input lines look like {"id": "q1", "prompt": "..."} or carry a full
+    "messages" list; "provider", "model" and "system" override the run-wide
+    defaults per line. Results are flushed as they finish, so an interrupted
+    run resumes by skipping every id that already has a successful result.
+    """
+
+    def __init__(
+        self,
+        client: ProviderClient,
+        provider: str,
+        model: str,
+        concurrency: int = 4,
+        system_prompt: str = DEFAULT_SYSTEM_PROMPT,
+    ):
+        self.client = client
+        self.provider = provider
+        self.model = model
+        self.concurrency = max(1, concurrency)
+        self.system_prompt = system_prompt
+        self._write_lock = threading.Lock()
+        self.completed = 0
+        self.failed = 0
+
+    @staticmethod
+    def completed_ids(output_path: Path) -> Set[str]:
+        """Return ids that already have a successful result in the output file."""
+        done: Set[str] = set()
+        if not output_path.exists():
+            return done
+        with output_path.open("r", encoding="utf-8") as handle:
+            for line in handle:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # A run killed mid-write leaves a partial last line; that prompt is simply redone.
+                    continue
+                if isinstance(record, dict) and record.get("ok"):
+                    done.add(str(record.get("id")))
+        return done
+
+    @staticmethod
+    def iter_prompts(input_path: Path) -> Iterator[Tuple[str, Dict[str, object]]]:
+        """Yield (id, item) for each JSON object line; ids default to the line number."""
+        with input_path.open("r", encoding="utf-8") as handle:
+            for line_number, line in enumerate(handle, start=1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    item = json.loads(line)
+                except json.JSONDecodeError as exc:
+                    raise ValueError(f"{input_path}:{line_number}: invalid JSON ({exc})") from exc
+                if isinstance(item, str):
+                    item = {"prompt": item}
+                if not isinstance(item, dict):
+                    raise ValueError(f"{input_path}:{line_number}: expected an object or string")
+                yield str(item.get("id", f"line-{line_number}")), item
+
+    def build_messages(self, item: Dict[str, object]) -> List[Dict[str, str]]:
+        """Turn one input item into a provider message list with a leading system prompt."""
+        raw_messages = item.get("messages")
+        messages: List[Dict[str, str]] = []
+        if isinstance(raw_messages, list):
+            for message in raw_messages:
+                if not isinstance(message, dict):
+                    continue
+                role = message.get("role")
+                content = str(message.get("content", "")).strip()
+                if role in {"system", "user", "assistant"} and content:
+                    messages.append({"role": role, "content": content})
+        else:
+            prompt = str(item.get("prompt", "")).strip()
+            if prompt:
+                messages.append({"role": "user", "content": prompt})
+        if not messages:
+            raise ValueError("Item has no prompt or messages.")
+        if messages[0]["role"] != "system":
+            messages.insert(0, {"role": "system", "content": str(item.get("system", self.system_prompt))})
+        return messages
+
+    def run_one(self, prompt_id: str, item: Dict[str, object]) -> Dict[str, object]:
+        """Send one prompt and return its result record; failures are recorded, not raised."""
+        provider = str(item.get("provider", self.provider)).strip().lower()
+        model = str(item.get("model", self.model)).strip()
+        record: Dict[str, object] = {"id": prompt_id, "provider": provider, "model": model}
+        started = time.monotonic()
+        try:
+            if provider not in PROVIDERS:
+                raise RuntimeError(f"Unknown provider: {provider}")
+            if not model:
+                raise RuntimeError("No model given; pass --model or set it per line.")
+            reply_text, meta = self.client.complete(provider, model, self.build_messages(item))
+            record["ok"] = True
+            record["response"] = reply_text
+            record.update(
+                {
+                    key: value
+                    for key, value in meta.items()
+                    if key not in {"provider", "model"}
+                }
+            )
+        except Exception as exc:  # noqa: BLE001
+            record["ok"] = False
+            record["error"] = str(exc)
+            record["response_seconds"] = round(time.monotonic() - started, 3)
+        record["finished_at"] = time.strftime("%Y-%m-%dT%H:%M:%S")
+        return record
+
+    def _write(self, handle, record: Dict[str, object]) -> None:
+        """Append one result line and flush it so a crash loses at most in-flight prompts."""
+        with self._write_lock:
+            handle.write(json.dumps(record, ensure_ascii=False) + "\n")
+            handle.flush()
+            if record.get("ok"):
+                self.completed += 1
+            else:
+                self.failed += 1
+            print(
+                f"[{self.completed + self.failed}] {record['id']}: "
+                f"{'ok' if record.get('ok') else 'error'} ({record.get('response_seconds', 0)}s)",
+                file=sys.stderr,
+            )
+
+    def run(self, input_path: Path, output_path: Path) -> int:
+        """Process every pending prompt; returns the number of prompts that failed."""
+        done = self.completed_ids(output_path)
+        # At most `concurrency` prompts are queued beyond the running ones, so a huge
+        # input file is streamed instead of loaded into the executor all at once.
+        slots = threading.BoundedSemaphore(self.concurrency * 2)
+        skipped = 0
+
+        with output_path.open("a", encoding="utf-8") as handle, ThreadPoolExecutor(
+            max_workers=self.concurrency
+        ) as pool:
+            def submit(prompt_id: str, item: Dict[str, object]) -> None:
+                def task() -> None:
+                    try:
+                        self._write(handle, self.run_one(prompt_id, item))
+                    finally:
+                        slots.release()
+
+                pool.submit(task)
+
+            try:
+                for prompt_id, item in self.iter_prompts(input_path):
+                    if prompt_id in done:
+                        skipped += 1
+                        continue
+                    done.add(prompt_id)
+                    slots.acquire()
+                    submit(prompt_id, item)
+            except KeyboardInterrupt:
+                print("Interrupted; waiting for in-flight prompts. Re-run to resume.", file=sys.stderr)
+                pool.shutdown(wait=True, cancel_futures=True)
+                raise
+
+        if skipped:
+            print(f"Skipped {skipped} prompts already completed in {output_path}.", file=sys.stderr)
+        print(f"Done: {self.completed} ok, {self.failed} failed.", file=sys.stderr)
+        return self.failed
+
+
+def load_settings(path: Path = SETTINGS_PATH) -> Dict[str, object]:
+    """Read the desktop app's saved settings so batch runs reuse stored API keys."""
+    try:
+        payload = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, json.JSONDecodeError):
+        return {}
+    return payload if isinstance(payload, dict) else {}
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command-line entry point: `python main.py batch prompts.jsonl [options]`."""
+    parser = argparse.ArgumentParser(prog="main.py batch", description=__doc__)
+    parser.add_argument("input", type=Path, help="JSONL file with one prompt per line")
+    parser.add_argument("--output", "-o", type=Path, help="results JSONL (default: <input>.results.jsonl)")
+    parser.add_argument("--provider", default=None, help="default provider (default: saved or LLM_PROVIDER)")
+    parser.add_argument("--model", default=None, help="default model (default: saved default model)")
+    parser.add_argument("--concurrency", "-c", type=int, default=4, help="parallel requests (default: 4)")
+    args = parser.parse_args(argv)
+
+    settings = load_settings()
+    provider = (
+        args.provider
+        or str(settings.get("default_provider", "")).strip()
+        or os.getenv("LLM_PROVIDER", "groq")
+    ).lower()
+    model = args.model or str(settings.get("default_model", "")).strip()
+    output_path = args.output or args.input.with_suffix(".results.jsonl")
+    system_prompt = str(settings.get("chat_system_prompt", os.getenv("SYSTEM_PROMPT", DEFAULT_SYSTEM_PROMPT)))
+
+    runner = BatchRunner(
+        ProviderClient(settings),
+        provider=provider,
+        model=model,
+        concurrency=args.concurrency,
+        system_prompt=system_prompt,
+    )
+    try:
+        failed = runner.run(args.input, output_path)
+    except KeyboardInterrupt:
+        return 130
+    except (OSError, ValueError) as exc:
+        print(f"error: {exc}", file=sys.stderr)
+        return 2
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    sys.exit(main())
@@ -0,0 +1,132 @@
+"""In-memory editor buffers for files open in tabs, so switching tabs skips the disk and the highlighter."""
+
+import os
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+# What a clean buffer was loaded from: (mtime_ns, size) of the file at the time.
+DiskStamp = Tuple[int, int]
+
+
+def disk_stamp(path: Path) -> Optional[DiskStamp]:
+    """The file's current (mtime_ns, size), or None if it cannot be stat'ed."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+class EditorBuffer:
+    """Everything needed to put a file back in the editor the way it was left.
+
+    `tags` maps each syntax tag to the flat index list from Text.tag_ranges,
+    and `highlight`, `painted` and `lexer` are the highlighter's line-state
+    cache, painted chunks and lexer, so a restored buffer needs no re-lexing.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        text: str,
+        dirty: bool,
+        version: int,
+        read_only: bool,
+        stamp: Optional[DiskStamp],
+        insert: str,
+        yview: float,
+        tags: Dict[str, Tuple[object, ...]],
+        highlight: object,
+        painted: set,
+        lexer: object,
+    ):
+        self.path = path
+        self.text = text
+        self.dirty = dirty
+        self.version = version
+        self.read_only = read_only
+        self.stamp = stamp
+        self.insert = insert
+        self.yview = yview
+        self.tags = tags
+        self.highlight = highlight
+        self.painted = painted
+        self.lexer = lexer
+
+    @property
+    def cost(self) -> int:
+        """Approximate size in characters; each tag range counts as two short index strings."""
+        return len(self.text) + 16 * sum(len(ranges) for ranges in self.tags.values())
+
+    def is_current(self) -> bool:
+        """Whether the file on disk is still what a clean buffer was loaded from."""
+        return self.stamp is not None and disk_stamp(self.path) == self.stamp
+
+
+class BufferCache:
+    """Buffers of the tabs not currently in the editor, least recently used first.
+
+    The total `cost` of clean buffers is kept under `max_chars` by dropping
+    the least recently used; their tabs stay open and reload from disk when
+    picked. Dirty buffers are never dropped, since they hold edits that
+    exist nowhere else.
+    """
+
+    def __init__(self, max_chars: int):
+        self.max_chars = max_chars
+        self._buffers: "OrderedDict[Path, EditorBuffer]" = OrderedDict()
+        self.total_chars = 0
+
+    def __contains__(self, path: Path) -> bool:
+        return path in self._buffers
+
+    def __len__(self) -> int:
+        return len(self._buffers)
+
+    def put(self, buffer: EditorBuffer) -> List[Path]:
+        """Store a buffer as the most recently used; returns the paths evicted to make room."""
+        self.pop(buffer.path)
+        if not buffer.dirty and buffer.cost > self.max_chars:
+            return [buffer.path]
+        self._buffers[buffer.path] = buffer
+        self.total_chars += buffer.cost
+        evicted = []
+        for path in list(self._buffers):
+            if self.total_chars <= self.max_chars:
+                break
+            old = self._buffers[path]
+            if old.dirty or old is buffer:
+                continue
+            self.pop(path)
+            evicted.append(path)
+        return evicted
+
+    def peek(self, path: Path) -> Optional[EditorBuffer]:
+        """The cached buffer for `path`, without changing its recency."""
+        return self._buffers.get(path)
+
+    def pop(self, path: Path) -> Optional[EditorBuffer]:
+        buffer = self._buffers.pop(path, None)
+        if buffer is not None:
+            self.total_chars -= buffer.cost
+        return buffer
+
+    def most_recent(self, among: List[Path]) -> Optional[Path]:
+        """The most recently used cached path out of `among`, or None if none is cached."""
+        wanted = set(among)
+        for path in reversed(self._buffers):
+            if path in wanted:
+                return path
+        return None
+
+    def dirty(self) -> List[EditorBuffer]:
+        """Cached buffers with unsaved edits."""
+        return [buffer for buffer in self._buffers.values() if buffer.dirty]
+
+    def mark_saved(self, path: Path, version: int) -> None:
+        """Mark a cached buffer clean after a save of exactly its text (same edit version) finished."""
+        buffer = self._buffers.get(path)
+        if buffer is not None and buffer.version == version:
+            buffer.dirty = False
+            buffer.stamp = disk_stamp(path)
@@ -1,7 +1,8 @@
 """Code execution history and diff tracking."""
 
+import difflib
 from datetime import datetime
-from typing import Dict, List
+from typing import Dict, List, Optional
 
 
 class CodeExecutionHistory:
@@ -9,8 +10,14 @@ class CodeExecutionHistory:
     
     @staticmethod
     def record_execution(code: str, output: str, error: str = "", 
-                        language: str = "python", execution_time: float = 0.0) -> Dict:
-        """Record a code execution."""
+                        language: str = "python", execution_time: float = 0.0,
+                        file_path: str = "", returncode: Optional[int] = None,
+                        resources: Optional[Dict] = None) -> Dict:
+        """Record a code execution.
+
+        `resources` holds measured usage such as wall_seconds, user_seconds,
+        system_seconds and max_rss_kb; `file_path` groups runs of one script.
+        """
         return {
             "timestamp": datetime.now().isoformat(),
             "code": code,
@@ -19,6 +26,9 @@ class CodeExecutionHistory:
             "language": language,
             "execution_time": execution_time,
             "status": "error" if error else "success",
+            "file": file_path,
+            "returncode": returncode,
+            "resources": resources or {},
         }
     
     @staticmethod
@@ -56,74 +66,165 @@ class CodeExecutionHistory:
 
 
 class CodeDiffTracker:
-    """Track changes to code over time."""
-    
+    """Track changes to code over time as a delta chain per file.
+
+    Each file's history is a list of versions. Every `keyframe_interval`-th
+    version holds the full text; the ones in between hold only line-level
+    edit operations against the version before. Any version is rebuilt from
+    the nearest keyframe at or before it, so a lookup applies at most
+    `keyframe_interval - 1` deltas however long the history grows. Past
+    `max_versions` the oldest are forgotten; version numbers keep counting
+    from the first version ever recorded, so numbers handed out stay valid.
+
+    A delta is a list of ops: ["=", start, end] copies lines start:end of the
+    previous version, and ["+", [lines]] inserts new ones.
+    """
+
+    def __init__(self, keyframe_interval: int = 20, max_versions: int = 500):
+        self.keyframe_interval = max(1, keyframe_interval)
+        self.max_versions = max(2, max_versions)
+        self._chains: Dict[str, List[Dict]] = {}
+        # The newest text per file, so recording a change never rebuilds it from the chain.
+        self._latest: Dict[str, str] = {}
+        # Versions dropped from the front of each chain.
+        self._dropped: Dict[str, int] = {}
+
     @staticmethod
-    def record_code_change(file_path: str, old_code: str, new_code: str, 
-                          description: str = "") -> Dict:
-        """Record a code change."""
-        import difflib
-        
+    def _delta(old_lines: List[str], new_lines: List[str]) -> List[list]:
+        ops: List[list] = []
+        matcher = difflib.SequenceMatcher(None, old_lines, new_lines, autojunk=False)
+        for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+            if tag == "equal":
+                ops.append(["=", i1, i2])
+            elif j2 > j1:
+                # "replace" and "insert" both come down to new lines; deletions just copy nothing.
+                ops.append(["+", new_lines[j1:j2]])
+        return ops
+
+    @staticmethod
+    def _apply(old_lines: List[str], ops: List[list]) -> List[str]:
+        lines: List[str] = []
+        for op in ops:
+            if op[0] == "=":
+                lines.extend(old_lines[op[1]:op[2]])
+            else:
+                lines.extend(op[1])
+        return lines
+
+    def _append(self, file_path: str, text: str, description: str,
+                added: int = 0, removed: int = 0) -> int:
+        chain = self._chains.setdefault(file_path, [])
+        entry = {
+            "timestamp": datetime.now().isoformat(),
+            "description": description,
+            "lines_added": added,
+            "lines_removed": removed,
+        }
+        if len(chain) % self.keyframe_interval == 0:
+            entry["keyframe"] = text
+        else:
+            entry["delta"] = self._delta(
+                self._latest[file_path].splitlines(keepends=True),
+                text.splitlines(keepends=True),
+            )
+        chain.append(entry)
+        self._latest[file_path] = text
+        if len(chain) > self.max_versions:
+            # Drop a whole keyframe interval at once so version numbering stays aligned with keyframes.
+            drop = self.keyframe_interval
+            first = self.get_version(file_path, self._dropped.get(file_path, 0) + drop)
+            del chain[:drop]
+            chain[0].pop("delta", None)
+            chain[0]["keyframe"] = first
+            self._dropped[file_path] = self._dropped.get(file_path, 0) + drop
+        return self._dropped.get(file_path, 0) + len(chain) - 1
+
+    def record_code_change(self, file_path: str, old_code: str, new_code: str,
+                           description: str = "") -> Dict:
+        """Record a change from `old_code` to `new_code`; returns a summary without the code.
+
+        If `old_code` is not the newest recorded version (the file was edited
+        by hand since), it is recorded first, so the version just before this
+        change is always exactly `old_code`. The summary's "before" and
+        "version" are the indexes to pass to `get_version`.
+        """
+        if self._latest.get(file_path) != old_code:
+            self._append(file_path, old_code, "before change")
         diff = list(difflib.unified_diff(
             old_code.splitlines(keepends=True),
             new_code.splitlines(keepends=True),
             lineterm=''
         ))
-        
+        added = len([l for l in diff if l.startswith("+") and not l.startswith("+++")])
+        removed = len([l for l in diff if l.startswith("-") and not l.startswith("---")])
+        version = self._append(file_path, new_code, description, added, removed)
         return {
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": self._chains[file_path][-1]["timestamp"],
             "file": file_path,
-            "old_code": old_code,
-            "new_code": new_code,
             "description": description,
-            "diff": diff,
-            "lines_added": len([l for l in diff if l.startswith("+")]),
-            "lines_removed": len([l for l in diff if l.startswith("-")]),
+            "before": version - 1,
+            "version": version,
+            "lines_added": added,
+            "lines_removed": removed,
         }
-    
-    @staticmethod
-    def get_code_changes(chat: dict, file_path: str = None) -> List[Dict]:
-        """Get code changes for a file."""
-        changes = chat.get("code_changes", [])
-        
-        if file_path:
-            changes = [c for c in changes if c.get("file") == file_path]
-        
+
+    def version_count(self, file_path: str) -> int:
+        """Number of versions ever recorded for a file, including forgotten ones."""
+        return self._dropped.get(file_path, 0) + len(self._chains.get(file_path, []))
+
+    def get_version(self, file_path: str, version: int) -> str:
+        """Rebuild a version of a file; raises IndexError if it was never recorded or was forgotten."""
+        chain = self._chains.get(file_path, [])
+        index = version - self._dropped.get(file_path, 0)
+        if not 0 <= index < len(chain):
+            raise IndexError(f"{file_path} has no version {version}")
+        if index == len(chain) - 1:
+            return self._latest[file_path]
+        start = index - index % self.keyframe_interval
+        lines = chain[start]["keyframe"].splitlines(keepends=True)
+        for entry in chain[start + 1:index + 1]:
+            lines = self._apply(lines, entry["delta"])
+        return "".join(lines)
+
+    def get_code_changes(self, file_path: str = None) -> List[Dict]:
+        """Get code changes for a file (or every file), oldest first, without their code."""
+        files = [file_path] if file_path else list(self._chains)
+        changes = []
+        for name in files:
+            first = self._dropped.get(name, 0)
+            for index, entry in enumerate(self._chains.get(name, [])):
+                changes.append({
+                    "timestamp": entry["timestamp"],
+                    "file": name,
+                    "version": first + index,
+                    "description": entry["description"],
+                    "lines_added": entry["lines_added"],
+                    "lines_removed": entry["lines_removed"],
+                })
         return changes
-    
-    @staticmethod
-    def save_change(chat: dict, change: Dict) -> bool:
-        """Save a code change."""
-        if "code_changes" not in chat:
-            chat["code_changes"] = []
-        
-        chat["code_changes"].append(change)
-        return True
-    
-    @staticmethod
-    def get_file_timeline(chat: dict, file_path: str) -> List[Dict]:
+
+    def get_file_timeline(self, file_path: str) -> List[Dict]:
         """Get timeline of changes for a specific file."""
-        changes = CodeDiffTracker.get_code_changes(chat, file_path)
+        changes = self.get_code_changes(file_path)
         return sorted(changes, key=lambda x: x.get("timestamp", ""))
-    
-    @staticmethod
-    def generate_diff_summary(chat: dict, file_path: str) -> str:
+
+    def generate_diff_summary(self, file_path: str) -> str:
         """Generate a summary of changes for a file."""
-        changes = CodeDiffTracker.get_code_changes(chat, file_path)
-        
+        changes = self.get_code_changes(file_path)
+
         lines = [f"# Changes to {file_path}\n"]
-        
+
         total_added = sum(c.get("lines_added", 0) for c in changes)
         total_removed = sum(c.get("lines_removed", 0) for c in changes)
-        
+
         lines.append(f"Total changes: {len(changes)}")
         lines.append(f"Lines added: {total_added}")
         lines.append(f"Lines removed: {total_removed}\n")
-        
+
         for change in changes:
             lines.append(f"## {change.get('timestamp')}")
             if change.get("description"):
                 lines.append(f"Description: {change.get('description')}")
             lines.append("")
-        
+
         return "\n".join(lines)
@@ -0,0 +1,98 @@
+"""Run a script under cProfile and tracemalloc and write a JSON report of where time and memory went."""
+
+import builtins
+import cProfile
+import json
+import os
+import sys
+import traceback
+import tracemalloc
+import types
+from typing import Dict, List
+
+REPORT_LIMIT = 50
+
+
+def _function_rows(profiler: cProfile.Profile, limit: int) -> List[Dict[str, object]]:
+    # create_stats rather than pstats.Stats, which refuses a profile that recorded nothing.
+    profiler.create_stats()
+    rows = []
+    for (filename, line, name), (_, calls, own, cumulative, _) in profiler.stats.items():
+        if filename == __file__ or name == "<built-in method builtins.exec>":
+            continue
+        rows.append(
+            {
+                "file": filename,
+                "line": line,
+                "function": name,
+                "calls": calls,
+                "own": round(own, 6),
+                "cumulative": round(cumulative, 6),
+            }
+        )
+    rows.sort(key=lambda row: row["cumulative"], reverse=True)
+    return rows[:limit]
+
+
+def _allocation_rows(snapshot: tracemalloc.Snapshot, limit: int) -> List[Dict[str, object]]:
+    snapshot = snapshot.filter_traces(
+        (
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+        )
+    )
+    rows = []
+    for stat in snapshot.statistics("lineno")[:limit]:
+        frame = stat.traceback[0]
+        rows.append({"file": frame.filename, "line": frame.lineno, "size": stat.size, "count": stat.count})
+    return rows
+
+
+def profile_script(path: str, report_path: str, limit: int = REPORT_LIMIT) -> int:
+    """Run `path` as __main__ while profiling; returns the exit code the script would have had.
+
+    Allocations are those still live when the script finishes, grouped by the
+    line that made them.
+    """
+    sys.argv = [path]
+    sys.path[0] = os.path.dirname(path)
+    with open(path, encoding="utf-8") as handle:
+        source = handle.read()
+    # A real module in sys.modules, so pickle, multiprocessing and get_type_hints find what the script defines.
+    main = types.ModuleType("__main__")
+    main.__file__ = path
+    main.__builtins__ = builtins
+    sys.modules["__main__"] = main
+    profiler = cProfile.Profile()
+    exit_code = 0
+    tracemalloc.start()
+    try:
+        code = compile(source, path, "exec")
+        profiler.enable()
+        exec(code, main.__dict__)
+    except SystemExit as exc:
+        if exc.code is None or isinstance(exc.code, int):
+            exit_code = exc.code or 0
+        else:
+            print(exc.code, file=sys.stderr)
+            exit_code = 1
+    except BaseException as exc:  # noqa: BLE001
+        # Skip this frame so the traceback starts at the user's code, like a normal run.
+        traceback.print_exception(type(exc), exc, exc.__traceback__.tb_next)
+        exit_code = 1
+    finally:
+        profiler.disable()
+        snapshot = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+        sys.stdout.flush()
+    report = {
+        "functions": _function_rows(profiler, limit),
+        "allocations": _allocation_rows(snapshot, limit),
+    }
+    with open(report_path, "w", encoding="utf-8") as handle:
+        json.dump(report, handle)
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(profile_script(sys.argv[1], sys.argv[2]))
@@ -0,0 +1,46 @@
+"""Full-length log of IDE console output, kept on disk while the console itself stays short."""
+
+import os
+import tempfile
+from pathlib import Path
+from typing import IO, Optional
+
+
+class ConsoleLog:
+    """Append-only temp file holding everything a run printed.
+
+    The console widget drops its oldest lines past a cap, so this file is
+    where the complete output can still be read. It is created on the first
+    write of each run and deleted when the next run starts or the app closes.
+    """
+
+    def __init__(self):
+        self.path: Optional[Path] = None
+        self._handle: Optional[IO[str]] = None
+
+    def write(self, text: str) -> None:
+        if not text:
+            return
+        if self._handle is None:
+            fd, name = tempfile.mkstemp(prefix="goonbox-console-", suffix=".log")
+            self._handle = os.fdopen(fd, "w", encoding="utf-8", newline="")
+            self.path = Path(name)
+        self._handle.write(text)
+
+    def flush(self) -> Optional[Path]:
+        """Flush buffered output so the file is complete, and return its path."""
+        if self._handle is not None:
+            self._handle.flush()
+        return self.path
+
+    def reset(self) -> None:
+        """Discard the current log; the next write starts a new file."""
+        if self._handle is not None:
+            self._handle.close()
+            self._handle = None
+        if self.path is not None:
+            try:
+                self.path.unlink()
+            except OSError:
+                pass
+            self.path = None
@@ -0,0 +1,279 @@
+"""Conversation persistence and message sanitization, independent of the Tk UI."""
+
+import json
+import os
+import re
+from pathlib import Path
+
+CONVERSATIONS_PATH = Path(
+    os.getenv(
+        "AI_CHATROOM_CONVERSATIONS_PATH",
+        str(Path.home() / ".ai_goonbox_conversations.json"),
+    )
+)
+
+
+class ConversationStore:
+    """Load and save chat and agent-chat threads as one JSON document."""
+
+    def __init__(self, path: Path = CONVERSATIONS_PATH):
+        self.path = path
+
+    def load(self, welcome_message: str, agent_welcome_message: str) -> dict[str, object] | None:
+        """Read and sanitize the saved threads; returns None when nothing usable is on disk."""
+        if not self.path.exists():
+            return None
+
+        try:
+            payload = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError):
+            return None
+        if not isinstance(payload, dict):
+            return None
+
+        chats: list[dict[str, object]] = []
+        for idx, item in enumerate(payload.get("chats", [])):
+            if not isinstance(item, dict):
+                continue
+            thread_id = str(item.get("id", "")).strip()
+            if not thread_id:
+                continue
+            title = str(item.get("title", "")).strip() or f"Chat {idx + 1}"
+            # Sanitize old/invalid records so a bad disk payload cannot break rendering.
+            messages = self.sanitize_messages(item.get("messages"), welcome_message)
+            chat: dict[str, object] = {"id": thread_id, "title": title, "messages": messages}
+            # Compare-mode measurements recorded by ResponseAnalyzer.
+            analyses = item.get("response_analysis")
+            if isinstance(analyses, list):
+                chat["response_analysis"] = [a for a in analyses if isinstance(a, dict)]
+            chats.append(chat)
+
+        agent_chats: list[dict[str, object]] = []
+        for idx, item in enumerate(payload.get("agent_chats", [])):
+            if not isinstance(item, dict):
+                continue
+            thread_id = str(item.get("id", "")).strip()
+            if not thread_id:
+                continue
+            title = str(item.get("title", "")).strip() or f"Agent Chat {idx + 1}"
+            # Agent history uses the same message schema but a different empty-state welcome.
+            messages = self.sanitize_messages(item.get("messages"), agent_welcome_message)
+            agent_chats.append({"id": thread_id, "title": title, "messages": messages})
+
+        return {
+            "chats": chats,
+            # Counters never go backward; keeps generated IDs unique across restarts.
+            "chat_counter": self._counter(payload.get("chat_counter"), len(chats)),
+            "current_chat_id": self._current_id(payload.get("current_chat_id"), chats),
+            "agent_chats": agent_chats,
+            "agent_chat_counter": self._counter(payload.get("agent_chat_counter"), len(agent_chats)),
+            "current_agent_chat_id": self._current_id(payload.get("current_agent_chat_id"), agent_chats),
+        }
+
+    @staticmethod
+    def _counter(saved: object, count: int) -> int:
+        """Return the saved thread counter, never lower than the number of threads."""
+        if isinstance(saved, int):
+            return max(saved, count)
+        return count
+
+    @staticmethod
+    def _current_id(requested: object, threads: list[dict[str, object]]) -> str | None:
+        """Return the requested thread id if it still exists, else the first thread's id."""
+        requested_id = str(requested or "").strip()
+        if requested_id and requested_id in {str(t["id"]) for t in threads}:
+            return requested_id
+        if threads:
+            return str(threads[0]["id"])
+        return None
+
+    def save(self, state: dict[str, object]) -> None:
+        """Write the thread state to disk, readable only by the current user."""
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self.path.write_text(
+                json.dumps(state, indent=2),
+                encoding="utf-8",
+            )
+            os.chmod(self.path, 0o600)
+        except OSError:
+            pass
+
+    @staticmethod
+    def estimate_token_count(text: str) -> int:
+        """Estimate token count when provider usage stats are unavailable."""
+        stripped = text.strip()
+        if not stripped:
+            return 0
+        # Rough heuristic: most LLM tokenizers average around 3-4 chars per token.
+        return max(1, int(round(len(stripped) / 4)))
+
+    @staticmethod
+    def normalize_message_meta(raw_meta: object, role: str, content: str) -> dict[str, object]:
+        """Normalize message metadata and ensure token count is always available."""
+        meta: dict[str, object] = {}
+        if isinstance(raw_meta, dict):
+            token_count = raw_meta.get("token_count")
+            if isinstance(token_count, int) and token_count >= 0:
+                meta["token_count"] = token_count
+            elif isinstance(token_count, float) and token_count >= 0:
+                meta["token_count"] = int(round(token_count))
+
+            for key in ("response_seconds", "queue_seconds", "race_margin_seconds"):
+                seconds = raw_meta.get(key)
+                if isinstance(seconds, (int, float)) and float(seconds) >= 0:
+                    meta[key] = round(float(seconds), 3)
+
+            for key in ("provider", "model", "token_source", "race_id", "race_winner"):
+                value = raw_meta.get(key)
+                if isinstance(value, str):
+                    cleaned = value.strip()
+                    if cleaned:
+                        meta[key] = cleaned
+
+            for key in ("prompt_tokens", "completion_tokens", "total_tokens", "race_entrants"):
+                value = raw_meta.get(key)
+                if isinstance(value, int) and value >= 0:
+                    meta[key] = value
+                elif isinstance(value, float) and value >= 0:
+                    meta[key] = int(round(value))
+
+        if "token_count" not in meta and role in {"assistant", "user", "system"}:
+            meta["token_count"] = ConversationStore.estimate_token_count(content)
+            meta["token_source"] = "estimated"
+
+        return meta
+
+    @staticmethod
+    def sanitize_messages(raw_messages: object, fallback_message: str) -> list[dict[str, object]]:
+        """Validate and normalize persisted message objects before rendering or sending."""
+        cleaned: list[dict[str, object]] = []
+        if isinstance(raw_messages, list):
+            for item in raw_messages:
+                if not isinstance(item, dict):
+                    continue
+                role = str(item.get("role", "")).strip()
+                content = str(item.get("content", "")).strip()
+                if role not in {"assistant", "user", "system"}:
+                    continue
+                if not content:
+                    continue
+                
+                # Filter out temporary attachment paths from the content
+                filtered_content = ConversationStore.filter_attachment_paths(content)
+                
+                # Extract thought process from the content
+                visible_text, thought_process = ConversationStore.extract_thought_process(filtered_content)
+                
+                # Add thought process to meta if found
+                if thought_process:
+                    # Get existing meta or create new one
+                    existing_meta = item.get("meta", {})
+                    if not isinstance(existing_meta, dict):
+                        existing_meta = {}
+                    if 'thought_process' not in existing_meta:
+                        existing_meta['thought_process'] = thought_process
+                    meta_dict = existing_meta
+                else:
+                    meta_dict = item.get("meta", {})
+                    if not isinstance(meta_dict, dict):
+                        meta_dict = {}
+                
+                # Only add if there's content after filtering
+                if visible_text.strip():
+                    message: dict[str, object] = {"role": role, "content": visible_text}
+                    if meta_dict:
+                        message["meta"] = meta_dict
+                    cleaned.append(message)
+                else:
+                    # Skip messages that only contain attachment paths
+                    continue
+
+        if not cleaned:
+            cleaned.append(
+                {
+                    "role": "assistant",
+                    "content": fallback_message,
+                    "meta": ConversationStore.normalize_message_meta({}, "assistant", fallback_message),
+                }
+            )
+        return cleaned
+
+    @staticmethod
+    def filter_attachment_paths(text: str) -> str:
+        """Remove temporary attachment paths from text to prevent agent from echoing them."""
+        # Remove lines that look like temporary attachment paths
+        lines = text.split('\n')
+        filtered_lines = []
+        
+        for line in lines:
+            line_stripped = line.strip()
+            line_lower = line_stripped.lower()
+            
+            # Skip lines that look like temporary attachment paths (with or without @ prefix)
+            if ('/tmp/' in line_lower and 'ai-chat-attachment' in line_lower) or \
+               ('/tmp/' in line_lower and 'attachment' in line_lower and len(line_stripped) < 100):
+                continue
+            # Also check for paths that start with @ followed by the attachment pattern
+            if line_stripped.startswith('@') and '/tmp/' in line_lower and 'ai-chat-attachment' in line_lower:
+                continue
+            # Skip lines that look like content markers for empty files
+            if '--- Content from referenced files ---' in line or \
+               '--- End of content ---' in line:
+                continue
+            filtered_lines.append(line)
+        
+        return '\n'.join(filtered_lines)
+
+    @staticmethod
+    def extract_thought_process(text: str) -> tuple[str, str | None]:
+        """Extract thought process from text and return (visible_text, thought_process).
+        
+        Identifies common patterns used by AI models to denote their thinking process.
+        """
+        # Common patterns for AI thought processes
+        patterns = [
+            # XML-style tags
+            (r'<thinking>(.*?)</thinking>', re.DOTALL | re.IGNORECASE),
+            (r'<think>(.*?)</think>', re.DOTALL | re.IGNORECASE),
+            (r'<scratchpad>(.*?)</scratchpad>', re.DOTALL | re.IGNORECASE),
+            (r'<inner_thoughts>(.*?)</inner_thoughts>', re.DOTALL | re.IGNORECASE),
+            # Markdown-style
+            (r'\[THOUGHT\](.*?)\[/THOUGHT\]', re.DOTALL | re.IGNORECASE),
+            (r'\[THINKING\](.*?)\[/THINKING\]', re.DOTALL | re.IGNORECASE),
+            (r'\[REASONING\](.*?)\[/REASONING\]', re.DOTALL | re.IGNORECASE),
+            # Parentheses or brackets
+            (r'\(let me think.*?\)', re.IGNORECASE),
+            (r'\(reasoning:.*?\)', re.IGNORECASE),
+            (r'\(thinking.*?\)', re.IGNORECASE),
+            # Additional patterns that might appear with high reasoning effort
+            (r'(?i)(thought process:|reasoning:|thinking:|analysis:)\s*(.*?)(?=\n\n|\Z)', re.DOTALL),
+            (r'(?i)(step 1:|step 2:|step 3:|first,|next,|then,|finally,).*?(?=\n\n|\Z)', re.DOTALL),
+            (r'(?i)(plan:|strategy:)\s*(.*?)(?=\n\n|\Z)', re.DOTALL),
+            (r'\[\*\*\s*T(?:hought|HINKING|RATEGY|LAN)\s*\*\*\].*?(?=\n\n|\Z)', re.DOTALL),
+        ]
+
+        thought_process = None
+
+        for pattern, flags in patterns:
+            matches = re.findall(pattern, text, flags)
+            if matches:
+                # Extract the longest thought process found
+                for match in matches:
+                    # If it's a tuple (from groups), take the last non-empty element
+                    if isinstance(match, tuple):
+                        match_content = next((item for item in match if item), '')
+                    else:
+                        match_content = match
+                    if thought_process is None or len(match_content) > len(thought_process):
+                        thought_process = match_content.strip()
+
+        if thought_process:
+            # Remove the thought process from the visible text
+            for pattern, flags in patterns:
+                text = re.sub(pattern, '', text, flags=flags).strip()
+            # Clean up extra whitespace that might remain
+            text = re.sub(r'\n\s*\n', '\n\n', text)  # Replace multiple newlines with double newline
+            text = text.strip()
+
+        return text, thought_process
@@ -0,0 +1,184 @@
+"""SQLite store of IDE runs, kept apart from the conversations file."""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import zlib
+from pathlib import Path
+from typing import Dict, List, Optional
+
+EXECUTION_HISTORY_PATH = Path(
+    os.getenv(
+        "AI_CHATROOM_HISTORY_PATH",
+        str(Path.home() / ".ai_goonbox_history.sqlite3"),
+    )
+)
+# Output and error text is cut to this many trailing characters before it is stored.
+OUTPUT_LIMIT_CHARS = 4000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS code_blobs (
+    hash TEXT PRIMARY KEY,
+    data BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    started_at TEXT NOT NULL,
+    file TEXT NOT NULL DEFAULT '',
+    code_hash TEXT NOT NULL REFERENCES code_blobs(hash),
+    language TEXT NOT NULL,
+    status TEXT NOT NULL,
+    returncode INTEGER,
+    wall_seconds REAL,
+    user_seconds REAL,
+    system_seconds REAL,
+    max_rss_kb INTEGER,
+    output TEXT NOT NULL DEFAULT '',
+    error TEXT NOT NULL DEFAULT '',
+    warm INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS runs_by_file ON runs (file, started_at);
+CREATE INDEX IF NOT EXISTS runs_by_status ON runs (status, started_at);
+CREATE INDEX IF NOT EXISTS runs_by_time ON runs (started_at);
+"""
+
+_RUN_COLUMNS = (
+    "id, started_at, file, code_hash, language, status, returncode, "
+    "wall_seconds, user_seconds, system_seconds, max_rss_kb, output, error, warm"
+)
+
+
+def code_hash(code: str) -> str:
+    return hashlib.blake2b(code.encode("utf-8"), digest_size=16).hexdigest()
+
+
+class ExecutionStore:
+    """Record IDE runs and query them by file, status and date.
+
+    Each distinct piece of code is stored once, zlib-compressed, under its
+    hash; re-running an unchanged script only adds a small `runs` row.
+    Timestamps are ISO 8601 strings, so date ranges compare as text and use
+    the indexes. The connection is opened on first use and shared behind a
+    lock, so any thread may call in.
+    """
+
+    def __init__(self, path: Path = EXECUTION_HISTORY_PATH):
+        self.path = path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            # WAL with NORMAL sync: a commit appends to the log without an fsync, so recording a run is cheap.
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            if "warm" not in {row[1] for row in conn.execute("PRAGMA table_info(runs)")}:
+                # Created before warm-interpreter runs were flagged.
+                conn.execute("ALTER TABLE runs ADD COLUMN warm INTEGER NOT NULL DEFAULT 0")
+            self._conn = conn
+        return self._conn
+
+    def record(self, execution: Dict) -> Optional[int]:
+        """Store a record from CodeExecutionHistory.record_execution; returns the run id, or None on failure."""
+        code = str(execution.get("code", ""))
+        digest = code_hash(code)
+        resources = execution.get("resources") or {}
+        row = (
+            str(execution.get("timestamp", "")),
+            str(execution.get("file", "") or ""),
+            digest,
+            str(execution.get("language", "python")),
+            str(execution.get("status", "success")),
+            execution.get("returncode"),
+            resources.get("wall_seconds", execution.get("execution_time")),
+            resources.get("user_seconds"),
+            resources.get("system_seconds"),
+            resources.get("max_rss_kb"),
+            str(execution.get("output", ""))[-OUTPUT_LIMIT_CHARS:],
+            str(execution.get("error", ""))[-OUTPUT_LIMIT_CHARS:],
+            # Peak RSS of a warm run includes the preloaded modules, so it is not comparable to a cold run's.
+            1 if resources.get("warm") else 0,
+        )
+        try:
+            with self._lock:
+                conn = self._connect()
+                with conn:
+                    conn.execute(
+                        "INSERT OR IGNORE INTO code_blobs (hash, data) VALUES (?, ?)",
+                        (digest, zlib.compress(code.encode("utf-8"))),
+                    )
+                    cursor = conn.execute(
+                        "INSERT INTO runs (started_at, file, code_hash, language, status, returncode, "
+                        "wall_seconds, user_seconds, system_seconds, max_rss_kb, output, error, warm) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                        row,
+                    )
+                return cursor.lastrowid
+        except (sqlite3.Error, OSError):
+            return None
+
+    def query(
+        self,
+        file: Optional[str] = None,
+        status: Optional[str] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        limit: int = 200,
+    ) -> List[Dict[str, object]]:
+        """Return matching runs, newest first; `since`/`until` are ISO timestamps or date prefixes."""
+        clauses = []
+        params: List[object] = []
+        if file is not None:
+            clauses.append("file = ?")
+            params.append(file)
+        if status is not None:
+            clauses.append("status = ?")
+            params.append(status)
+        if since is not None:
+            clauses.append("started_at >= ?")
+            params.append(since)
+        if until is not None:
+            clauses.append("started_at < ?")
+            params.append(until)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        params.append(limit)
+        try:
+            with self._lock:
+                rows = self._connect().execute(
+                    f"SELECT {_RUN_COLUMNS} FROM runs {where} ORDER BY started_at DESC, id DESC LIMIT ?",
+                    params,
+                ).fetchall()
+        except (sqlite3.Error, OSError):
+            return []
+        return [dict(row) for row in rows]
+
+    def files(self) -> List[str]:
+        """Every file that has recorded runs, for filtering."""
+        try:
+            with self._lock:
+                rows = self._connect().execute("SELECT DISTINCT file FROM runs ORDER BY file").fetchall()
+        except (sqlite3.Error, OSError):
+            return []
+        return [row[0] for row in rows]
+
+    def code(self, digest: str) -> Optional[str]:
+        """The code stored under `digest`, or None if it is unknown."""
+        try:
+            with self._lock:
+                row = self._connect().execute("SELECT data FROM code_blobs WHERE hash = ?", (digest,)).fetchone()
+        except (sqlite3.Error, OSError):
+            return None
+        if row is None:
+            return None
+        return zlib.decompress(row[0]).decode("utf-8")
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
@@ -0,0 +1,49 @@
+"""Reading files for the IDE editor, including ones too large to read naively."""
+
+import mmap
+import os
+from pathlib import Path
+from typing import Dict
+
+# Files at least this big are mapped instead of read through a buffered file object.
+MMAP_THRESHOLD_BYTES = 1 << 20
+
+
+def read_for_editor(path: Path, max_bytes: int) -> Dict[str, object]:
+    """Read at most `max_bytes` of a file and decode it as UTF-8 in a single pass.
+
+    Undecodable bytes become U+FFFD rather than triggering a second read, and
+    line endings are normalised to "\\n" the way `Path.read_text` does. A file
+    over the cap is cut at the last newline before it. Returns the raw
+    bytes, the text, the on-disk size and mtime, whether the text was
+    truncated, and the file's line ending ("\\n", "\\r\\n" or "\\r") so a save
+    can write it back the same way.
+    """
+    with path.open("rb") as handle:
+        stat = os.fstat(handle.fileno())
+        size = stat.st_size
+        limit = min(size, max_bytes)
+        if limit >= MMAP_THRESHOLD_BYTES:
+            with mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as view:
+                data = view[:limit]
+        else:
+            data = handle.read(limit)
+
+    truncated = size > len(data)
+    if truncated:
+        cut = data.rfind(b"\n")
+        if cut > 0:
+            data = data[: cut + 1]
+    text = data.decode("utf-8", errors="replace")
+    newline = "\n"
+    if "\r" in text:
+        newline = "\r\n" if "\r\n" in text else "\r"
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+    return {
+        "data": data,
+        "text": text,
+        "size": size,
+        "mtime_ns": stat.st_mtime_ns,
+        "truncated": truncated,
+        "newline": newline,
+    }
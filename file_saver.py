@@ -0,0 +1,128 @@
+"""Background, atomic saving of IDE editor buffers."""
+
+import hashlib
+import os
+import tempfile
+import threading
+from pathlib import Path
+from typing import Callable, Dict, Optional, Tuple
+
+
+def content_hash(data: bytes) -> str:
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def atomic_write(path: Path, data: bytes) -> None:
+    """Write `data` to a temp file beside `path`, fsync it, then rename it over `path`.
+
+    A crash mid-save leaves either the old file or the new one, never a
+    truncated mix. The original file's permission bits are kept.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        mode: Optional[int] = path.stat().st_mode & 0o7777
+    except OSError:
+        mode = None
+    fd, temp_name = tempfile.mkstemp(prefix=f".{path.name}.", suffix=".tmp", dir=str(path.parent))
+    try:
+        with os.fdopen(fd, "wb") as handle:
+            handle.write(data)
+            handle.flush()
+            os.fsync(handle.fileno())
+        if mode is not None:
+            os.chmod(temp_name, mode)
+        os.replace(temp_name, path)
+    except BaseException:
+        try:
+            os.unlink(temp_name)
+        except OSError:
+            pass
+        raise
+
+
+class FileSaveService:
+    """Save editor snapshots on one worker thread, skipping writes that change nothing.
+
+    `save` only queues the text; encoding, hashing and the atomic write run
+    off the Tk thread. Requests for the same path coalesce, so a slow disk
+    writes the newest snapshot once instead of every autosave in between.
+    Each finished request is reported through `on_done` with an
+    "ide_saved" event carrying the caller's edit version.
+    """
+
+    def __init__(self, on_done: Callable[[Dict[str, object]], None]):
+        self._on_done = on_done
+        self._cond = threading.Condition()
+        self._pending: Dict[Path, Tuple[str, int, str]] = {}
+        # path -> (hash, mtime_ns, size) of what is known to be on disk.
+        self._on_disk: Dict[Path, Tuple[str, int, int]] = {}
+        # path -> line ending the file was read with; editor text always uses "\n".
+        self._newlines: Dict[Path, str] = {}
+        self._thread: Optional[threading.Thread] = None
+
+    def remember(self, path: Path, data: bytes, newline: str = "\n") -> None:
+        """Record content just read from disk so saving it back unchanged is skipped.
+
+        `newline` is the file's line ending; saves convert the editor's "\\n"
+        back to it, so a CRLF file stays CRLF and an unchanged one hashes equal.
+        """
+        try:
+            stat = path.stat()
+        except OSError:
+            return
+        with self._cond:
+            self._on_disk[path] = (content_hash(data), stat.st_mtime_ns, stat.st_size)
+            self._newlines[path] = newline
+
+    def save(self, path: Path, text: str, version: int, reason: str = "save") -> None:
+        """Queue `text` to be written to `path`; the newest request per path wins."""
+        with self._cond:
+            self._pending[path] = (text, version, reason)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+            self._cond.notify()
+
+    def write(self, path: Path, text: str) -> bool:
+        """Write `text` to `path` now, on the calling thread; returns False if it was already there."""
+        with self._cond:
+            known = self._on_disk.get(path)
+            newline = self._newlines.get(path, "\n")
+        if newline != "\n":
+            text = text.replace("\n", newline)
+        data = text.encode("utf-8")
+        digest = content_hash(data)
+        try:
+            stat = path.stat()
+        except OSError:
+            stat = None
+        # Only trust the remembered hash while the file on disk is untouched since.
+        if known is not None and stat is not None and known == (digest, stat.st_mtime_ns, stat.st_size):
+            return False
+        atomic_write(path, data)
+        stat = path.stat()
+        with self._cond:
+            self._on_disk[path] = (digest, stat.st_mtime_ns, stat.st_size)
+        return True
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+                path = next(iter(self._pending))
+                text, version, reason = self._pending.pop(path)
+            event: Dict[str, object] = {
+                "type": "ide_saved",
+                "path": path,
+                "version": version,
+                "reason": reason,
+                "skipped": False,
+                "error": None,
+            }
+            try:
+                event["skipped"] = not self.write(path, text)
+            except Exception as exc:  # noqa: BLE001
+                # Not just OSError: e.g. lone surrogates fail to encode. This is the only save thread.
+                event["error"] = str(exc)
+            self._on_done(event)
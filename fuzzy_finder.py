@@ -0,0 +1,290 @@
+"""Length-bucketed fuzzy matching of project paths for quick-open."""
+
+import bisect
+import heapq
+import re
+import threading
+from itertools import accumulate, compress
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+_BOUNDARY_CHARS = "/\\_-. "
+# Caps on scattered (non-substring) matching per search: paths checked, and matches
+# scored. Paths go shortest first, but boundary bonuses let a longer path outscore a
+# shorter one, so once a cap is hit scattered results are approximate (see search).
+_SCATTERED_CHECK_BUDGET = 4000
+_SCATTERED_SCORE_BUDGET = 500
+
+
+def _char_mask(text: str) -> int:
+    """Bitmask of which characters occur, folded into 63 bits; a cheap "could match" test."""
+    mask = 0
+    for char in text:
+        mask |= 1 << (ord(char) % 63)
+    return mask
+
+
+def fuzzy_score(path_lower: str, query: str) -> Optional[int]:
+    """Score how well `query` matches a lower-cased path; None if it is not a subsequence.
+
+    Substring hits beat scattered subsequences, hits in the file name beat
+    hits in directories, and shorter paths win ties.
+    """
+    name_start = path_lower.rfind("/") + 1
+    pos = path_lower.find(query, name_start)
+    if pos >= 0:
+        return 2000 - len(path_lower) + (300 if pos == name_start else 0)
+    if path_lower.find(query) >= 0:
+        return 1200 - len(path_lower)
+
+    score = 600 - len(path_lower)
+    start = 0
+    previous = -2
+    for char in query:
+        found = path_lower.find(char, start)
+        if found < 0:
+            return None
+        if found != previous + 1:
+            score -= 12
+        if found == 0 or path_lower[found - 1] in _BOUNDARY_CHARS:
+            score += 15
+        if found >= name_start:
+            score += 4
+        previous = found
+        start = found + 1
+    return score
+
+
+def _scattered_bonus(query: str) -> int:
+    """Most that fuzzy_score can add to 600 - length for a path holding `query` only as a scattered subsequence.
+
+    The first character always pays the gap penalty. A later character
+    right after the previous one pays none, but then follows that query
+    character, so it only earns the boundary bonus if that one is a
+    boundary; otherwise a gap (-12, +15) is its best case. At least one
+    later character gaps, or the match would have been a substring.
+    """
+    bonus = 7
+    all_adjacent = True
+    for previous in query[:-1]:
+        if previous in _BOUNDARY_CHARS:
+            bonus += 19
+        else:
+            bonus += 7
+            all_adjacent = False
+    return bonus - 12 if all_adjacent else bonus
+
+
+def _find_all(text: str, needle: str) -> Iterator[int]:
+    """Start of every occurrence of `needle` in `text`; str.find outruns a regex on long joined text."""
+    position = text.find(needle)
+    while position >= 0:
+        yield position
+        position = text.find(needle, position + 1)
+
+
+# Maps the digits of bin() to 0/1 bytes, for itertools.compress.
+_BINARY_DIGITS = bytes.maketrans(b"01", b"\x00\x01")
+
+
+def _mask_bits(mask: int) -> List[int]:
+    return [bit for bit in range(63) if mask >> bit & 1]
+
+
+class FuzzyFileIndex:
+    """Relative project paths grouped by length, safe to fill and query from different threads.
+
+    Scores fall as paths get longer, so a search visits the length buckets
+    shortest first and stops once no longer path can beat the results it
+    already has. Substring matches are found by str.find over each bucket's
+    paths (and, for file-name hits, file names) joined into one string; since
+    all paths in a bucket are equally long, a match offset maps straight back
+    to its path. Scattered
+    matches are narrowed first by per-bucket bitmaps of which paths contain
+    each character (folded as in `_char_mask`), ANDed as big integers.
+
+    Paths are added in batches while the project is still being scanned, so
+    a search sees whatever has been indexed so far. Removed paths are
+    tombstoned and skipped rather than deleted from the buckets.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.paths: List[str] = []
+        self._lower: List[str] = []
+        self._masks: List[int] = []
+        self._alive: List[bool] = []
+        self._by_path: Dict[str, int] = {}
+        self._by_length: Dict[int, List[int]] = {}
+        # length -> that bucket's lower-cased paths, each preceded by "\n", so path k starts at k * (length + 1) + 1.
+        self._joined: Dict[int, str] = {}
+        # length -> (the bucket's file names joined the same way, where each name starts).
+        self._joined_names: Dict[int, Tuple[str, List[int]]] = {}
+        # length -> one bitmap per mask bit, with bit k set when the bucket's k-th path has that character.
+        self._bitmaps: Dict[int, List[bytearray]] = {}
+        # (query, generation, subsequence hits by length) of the last scan that ran to completion.
+        self._generation = 0
+        self._last_scan: Optional[Tuple[str, int, Dict[int, List[int]]]] = None
+        self.building = True
+
+    def __len__(self) -> int:
+        return len(self._by_path)
+
+    def apply(self, added: Iterable[str], removed: Iterable[str] = ()) -> None:
+        """Add and tombstone paths; called from the project index thread."""
+        with self._lock:
+            for path in removed:
+                index = self._by_path.pop(path, None)
+                if index is not None:
+                    self._alive[index] = False
+            self._generation += 1
+            touched = set()
+            for path in added:
+                if path in self._by_path:
+                    continue
+                index = len(self.paths)
+                lower = path.lower()
+                mask = _char_mask(lower)
+                self.paths.append(path)
+                self._lower.append(lower)
+                self._masks.append(mask)
+                self._alive.append(True)
+                self._by_path[path] = index
+                bucket = self._by_length.setdefault(len(lower), [])
+                slot = len(bucket)
+                bucket.append(index)
+                bitmaps = self._bitmaps.get(len(lower))
+                if bitmaps is None:
+                    bitmaps = self._bitmaps[len(lower)] = [bytearray() for _ in range(63)]
+                if slot % 8 == 0:
+                    for bitmap in bitmaps:
+                        bitmap.append(0)
+                for bit in _mask_bits(mask):
+                    bitmaps[bit][slot >> 3] |= 1 << (slot & 7)
+                touched.add(len(lower))
+            # Joined here, on the indexing thread, rather than on the first keystroke after a batch.
+            lower = self._lower
+            for length in touched:
+                bucket = self._by_length[length]
+                self._joined[length] = "\n" + "\n".join([lower[index] for index in bucket])
+                names = [lower[index][lower[index].rfind("/") + 1 :] for index in bucket]
+                starts = list(accumulate((len(name) + 1 for name in names), initial=1))
+                self._joined_names[length] = ("\n" + "\n".join(names), starts)
+
+    def _bucket_pool(self, length: int, bits: List[int]) -> List[int]:
+        """Indexes of the paths of one length whose characters include every query bit."""
+        bitmaps = self._bitmaps[length]
+        pool = -1
+        for bit in bits:
+            pool &= int.from_bytes(bitmaps[bit], "little")
+        if not pool:
+            return []
+        selectors = bin(pool)[:1:-1].encode().translate(_BINARY_DIGITS)
+        return list(compress(self._by_length[length], selectors))
+
+    def search(self, query: str, limit: int = 50) -> List[Tuple[int, str]]:
+        """Return up to `limit` (score, path) pairs, best first.
+
+        Substring matches are all considered, shortest first, until no longer
+        path could make the results; a bounded heap keeps the best, so they
+        rank exactly as fuzzy_score would. Scattered (non-substring) matches
+        are approximate: checking stops at _SCATTERED_CHECK_BUDGET paths or
+        _SCATTERED_SCORE_BUDGET matches, so when a query's characters are in
+        most paths a longer path with better boundary hits can be missed or
+        ranked below where a full scan would put it.
+        """
+        query = query.lower().replace(" ", "")
+        if not query:
+            return []
+        query_mask = _char_mask(query)
+        with self._lock:
+            lower = self._lower
+            masks = self._masks
+            alive = self._alive
+            # (score, -length, -index): on equal scores shorter, then earlier-indexed, paths win.
+            best: List[Tuple[int, int, int]] = []
+            seen = set()
+
+            def consider(index: int) -> None:
+                if index in seen or not alive[index]:
+                    return
+                seen.add(index)
+                score = fuzzy_score(lower[index], query)
+                if score is None:
+                    return
+                entry = (score, -len(lower[index]), -index)
+                if len(best) < limit:
+                    heapq.heappush(best, entry)
+                elif entry > best[0]:
+                    heapq.heapreplace(best, entry)
+
+            def beaten(bound: int) -> bool:
+                return len(best) >= limit and best[0][0] >= bound
+
+            last_scan = self._last_scan
+            # Every match of a longer query also matches its prefix, so typing only narrows.
+            narrowing = bool(last_scan and last_scan[1] == self._generation and query.startswith(last_scan[0]))
+            buckets = last_scan[2] if narrowing else self._by_length
+            lengths = sorted(buckets)
+
+            # Substring stages, best tier first: a hit at the start of the file name scores
+            # at most 2300 - length, elsewhere in the name 2000 - length, elsewhere 1200 - length.
+            if "/" not in query:
+                for bound, needle in ((2300, "\n" + query), (2000, query)):
+                    for length in lengths:
+                        if beaten(bound - length):
+                            break
+                        bucket = buckets[length]
+                        if narrowing:
+                            for index in bucket:
+                                name = lower[index][lower[index].rfind("/") + 1 :]
+                                if name.startswith(query) if bound == 2300 else query in name:
+                                    consider(index)
+                        else:
+                            joined, starts = self._joined_names[length]
+                            for position in _find_all(joined, needle):
+                                consider(bucket[bisect.bisect_right(starts, position + len(needle) - 1) - 1])
+            for length in lengths:
+                if beaten(1200 - length):
+                    break
+                bucket = buckets[length]
+                if narrowing:
+                    for index in bucket:
+                        if query in lower[index]:
+                            consider(index)
+                else:
+                    for position in _find_all(self._joined[length], query):
+                        consider(bucket[position // (length + 1)])
+
+            # Scan stage: scattered subsequence matches, checked with a non-backtracking
+            # regex ("[^c]*c" per character) after the bitmaps rule out most paths.
+            if len(query) > 1:
+                subsequence = re.compile(
+                    re.escape(query[0])
+                    + "".join(f"[^{re.escape(char)}]*{re.escape(char)}" for char in query[1:])
+                ).search
+                bits = _mask_bits(query_mask)
+                bonus = _scattered_bonus(query)
+                hits: Dict[int, List[int]] = {}
+                checks = _SCATTERED_CHECK_BUDGET
+                scores = _SCATTERED_SCORE_BUDGET
+                complete = True
+                for length in lengths:
+                    if checks <= 0 or scores <= 0 or beaten(600 - length + bonus):
+                        complete = False
+                        break
+                    if narrowing:
+                        pool = [index for index in buckets[length] if masks[index] & query_mask == query_mask]
+                    else:
+                        pool = self._bucket_pool(length, bits)
+                    checks -= len(pool)
+                    bucket_hits = list(compress(pool, map(subsequence, map(lower.__getitem__, pool))))
+                    if bucket_hits:
+                        hits[length] = bucket_hits
+                    for index in bucket_hits:
+                        if index not in seen:
+                            scores -= 1
+                            consider(index)
+                if complete:
+                    self._last_scan = (query, self._generation, hits)
+            ordered = sorted(best, reverse=True)
+            return [(score, self.paths[-index]) for score, _, index in ordered]
@@ -1,27 +1,25 @@
-import builtins
+import bisect
 import html
-import io
 import json
-import keyword
+import math
 import os
 import queue
 import re
+import signal
 import subprocess
 import sys
 import tempfile
 import time
 import threading
 import tkinter as tk
-import tokenize
 import webbrowser
+from collections import deque
+from datetime import datetime, timedelta
 from pathlib import Path
 from tkinter import filedialog
 from tkinter import font as tkfont
 from tkinter import messagebox
 from tkinter import ttk
-from urllib import error as urlerror
-from urllib import parse as urlparse
-from urllib import request as urlrequest
 
 from dotenv import load_dotenv
 from groq import Groq
@@ -38,20 +36,47 @@ except ImportError:
     HtmlFrame = None
 
 from advanced_search import AdvancedSearcher
+from agent_executor import AgentExecutor
 from analytics import AnalyticsTracker
 from auto_complete import AutoCompleter
+from buffer_cache import BufferCache, EditorBuffer, disk_stamp
 from chat_backup import ChatBackupManager
 from chat_merger import ChatMerger
+import code_profiler
 from code_history import CodeExecutionHistory, CodeDiffTracker
 from code_snippets import CodeSnippetManager
+from console_log import ConsoleLog
 from conversation_forker import ConversationForker
+from conversation_store import CONVERSATIONS_PATH, ConversationStore
 from conversation_tags import ConversationTagger
 from conversation_templates import ConversationTemplate
+from execution_store import ExecutionStore
+from file_loader import read_for_editor
+from file_saver import FileSaveService, atomic_write, content_hash
+from fuzzy_finder import FuzzyFileIndex
 from message_bookmarks import MessageBookmark
 from message_reactions import MessageReactions
+from project_index import ProjectIndex, ProjectIndexPoller, sort_key
+from process_output import OutputStreamer
+from project_search import MAX_TOTAL_MATCHES, ProjectSearcher, compile_query
+from provider_client import OPENAI_COMPATIBLE_BASE_URL, PROVIDERS, ProviderClient
+from provider_race import CancelToken, RaceStore, pair_key, split_pair_key
+from rate_limiter import ProviderRateLimiter
 from response_analysis import ResponseAnalyzer, ResponseMetadataTracker
+from run_resources import apply_limits, process_cpu_seconds, wait_with_usage
 from session_manager import SessionManager
+from symbol_index import SymbolIndex
+from syntax_highlight import (
+    LONG_LINE_CHARS,
+    SYNTAX_TAGS,
+    LineStateCache,
+    PythonLineLexer,
+    group_ranges,
+    lex_lines,
+    lexer_for_language,
+)
 from token_tracker import TokenTracker
+from warm_runner import WarmRunnerPool
 
 load_dotenv()
 
@@ -62,17 +87,6 @@ GROQ_FALLBACK_MODELS = [
 ]
 DEFAULT_PROVIDER = "groq"
 MODEL_PLACEHOLDER = "(no models loaded)"
-PROVIDERS = {
-    "groq": {"label": "Groq", "env_key": "GROQ_API_KEY"},
-    "openai": {"label": "OpenAI", "env_key": "OPENAI_API_KEY"},
-    "anthropic": {"label": "Anthropic", "env_key": "ANTHROPIC_API_KEY"},
-    "gemini": {"label": "Google Gemini", "env_key": "GEMINI_API_KEY"},
-    "xai": {"label": "xAI", "env_key": "XAI_API_KEY"},
-}
-OPENAI_COMPATIBLE_BASE_URL = {
-    "openai": "https://api.openai.com/v1",
-    "xai": "https://api.x.ai/v1",
-}
 
 SETTINGS_PATH = Path(
     os.getenv(
@@ -80,14 +94,48 @@ SETTINGS_PATH = Path(
         str(Path.home() / ".ai_goonbox_settings.json"),
     )
 )
-CONVERSATIONS_PATH = Path(
-    os.getenv(
-        "AI_CHATROOM_CONVERSATIONS_PATH",
-        str(Path.home() / ".ai_goonbox_conversations.json"),
-    )
-)
+
+# Highlighting works in chunks of lines and yields to Tk after each time slice.
+IDE_HIGHLIGHT_CHUNK_LINES = 200
+IDE_HIGHLIGHT_SLICE_SECONDS = 0.015
+# Most lines copied to the background lexer per pass; it asks for more if state has not reconverged.
+IDE_HIGHLIGHT_SNAPSHOT_LINES = 5000
+# Above this many lines only the viewport (plus a margin) is painted, extended lazily on scroll.
+IDE_HIGHLIGHT_LAZY_LINES = 20_000
+IDE_HIGHLIGHT_LAZY_SNAPSHOT_LINES = 50_000
+IDE_HIGHLIGHT_VIEWPORT_MARGIN = 150
+
+# Files above IDE_LOAD_ASYNC_BYTES are read on a worker and inserted IDE_LOAD_CHUNK_CHARS at a time.
+IDE_LOAD_ASYNC_BYTES = 1 << 20
+IDE_LOAD_CHUNK_CHARS = 256 * 1024
+# Bigger files open read-only; anything past the cap is not loaded at all.
+IDE_READ_ONLY_BYTES = int(os.getenv("IDE_READ_ONLY_MB", "20")) * (1 << 20)
+IDE_MAX_OPEN_BYTES = int(os.getenv("IDE_MAX_OPEN_MB", "200")) * (1 << 20)
+# Buffers of open tabs that are not in the editor are kept in memory up to about this much text.
+IDE_BUFFER_CACHE_CHARS = int(os.getenv("IDE_BUFFER_CACHE_MB", "64")) * (1 << 20)
+# code_diff_tracker key for the scratch buffer, which has no file behind it.
+IDE_SCRATCH_HISTORY_KEY = "(unsaved buffer)"
+# The console keeps this many lines; older ones are dropped in bulk but stay in the run's log file.
+IDE_CONSOLE_MAX_LINES = max(100, int(os.getenv("IDE_CONSOLE_MAX_LINES", "5000")))
+# ...and at most this many characters, for output that never ends a line (progress bars, print(end="")).
+IDE_CONSOLE_MAX_CHARS = max(10_000, int(os.getenv("IDE_CONSOLE_MAX_CHARS", "2000000")))
+# Optional per-run caps on the script's address space and CPU time; 0 means no limit. Linux only.
+IDE_RUN_MAX_MEMORY_MB = int(os.getenv("IDE_RUN_MAX_MEMORY_MB", "0"))
+IDE_RUN_MAX_CPU_SECONDS = int(os.getenv("IDE_RUN_MAX_CPU_SECONDS", "0"))
+# Opt-in: runs go to interpreters started ahead of time with IDE_WARM_PRELOAD (comma-separated) imported.
+IDE_WARM_RUNNER = os.getenv("IDE_WARM_RUNNER", "0").strip().lower() in {"1", "true", "yes"}
+IDE_WARM_PRELOAD = [name.strip() for name in os.getenv("IDE_WARM_PRELOAD", "").split(",") if name.strip()]
+IDE_WARM_POOL_SIZE = max(1, int(os.getenv("IDE_WARM_POOL_SIZE", "1")))
+# Cap on the project symbol outline sent to the agent as context.
+AGENT_SYMBOL_CONTEXT_CHARS = 4000
+# Console colour for a running script's stderr, readable on every theme's dark background.
+IDE_STDERR_COLOR = "#f87171"
 
 IGNORED_DIRS = {".venv", ".git", "__pycache__", ".idea", ".pytest_cache"}
+# Seconds between project folder change polls; one stat per directory each time.
+PROJECT_POLL_SECONDS = 2.0
+# Diffs bigger than this (e.g. a branch switch) rebuild the file list instead of patching rows.
+PROJECT_DIFF_REBUILD_ROWS = 2000
 
 # ===== THEME DEFINITIONS =====
 THEMES = {
@@ -523,6 +571,7 @@ class GroqChatroomApp(tk.Tk):
         self.project_root: Path | None = None
         self.settings_path = SETTINGS_PATH
         self.conversations_path = CONVERSATIONS_PATH
+        self.conversation_store = ConversationStore(self.conversations_path)
         self.settings = self._load_settings()
 
         # Update global prompts with saved values
@@ -537,7 +586,10 @@ class GroqChatroomApp(tk.Tk):
         self.backup_manager = ChatBackupManager()
         self.chat_merger = ChatMerger()
         self.code_history = CodeExecutionHistory()
+        self.execution_store = ExecutionStore()
         self.code_diff_tracker = CodeDiffTracker()
+        # (file key, version before the edit) for each AI edit that "Undo AI Edit" can still revert.
+        self.ide_ai_edits: list[tuple[str, int]] = []
         self.snippet_manager = CodeSnippetManager()
         self.conversation_forker = ConversationForker()
         self.conversation_tagger = ConversationTagger()
@@ -548,6 +600,16 @@ class GroqChatroomApp(tk.Tk):
         self.response_metadata_tracker = ResponseMetadataTracker()
         self.session_manager = SessionManager()
         self.token_tracker = TokenTracker()
+        # Shared by chat, IDE agent and model listing so concurrent callers queue fairly.
+        self.rate_limiter = ProviderRateLimiter()
+        # Provider adapters live outside the Tk class so batch_runner can reuse them headless.
+        self.provider_client = ProviderClient(
+            self.settings,
+            self.rate_limiter,
+            reasoning_effort=self._get_reasoning_effort,
+        )
+        self.race_store = RaceStore()
+        self.race_counter = 0
 
         # Background threads post structured UI events here; only the Tk thread reads it.
         self.event_queue: queue.Queue[dict[str, object]] = queue.Queue()
@@ -563,6 +625,10 @@ class GroqChatroomApp(tk.Tk):
         self.pending = False
         self.pending_chat_id: str | None = None
 
+        # Compare-mode rounds in flight, keyed by compare id.
+        self.compare_counter = 0
+        self.compare_sessions: dict[str, dict[str, object]] = {}
+
         # Lazily created "Thinking..." row and hover tooltip widgets.
         self.typing_row: tk.Frame | None = None
         self.typing_label: tk.Label | None = None
@@ -587,22 +653,81 @@ class GroqChatroomApp(tk.Tk):
 
         # IDE run state and editor file bookkeeping.
         self.ide_running = False
-        self.ide_process: subprocess.Popen[str] | None = None
+        self.ide_process: subprocess.Popen[bytes] | None = None
         self.ide_process_lock = threading.Lock()
         self.ide_current_file: Path | None = None
         self.ide_files: list[Path] = []
+        # Sort keys parallel to ide_files and the listbox rows, for bisecting index diffs.
+        self.ide_file_keys: list[tuple[str, str]] = []
+        self.project_index: ProjectIndex | None = None
+        self.project_index_poller: ProjectIndexPoller | None = None
+        # Quick-open (Ctrl+P) matcher, fed by the project index thread as it scans.
+        self.fuzzy_index = FuzzyFileIndex()
+        # Python symbols of the project's files, for the outline, Ctrl+T and agent context.
+        self.symbol_index: SymbolIndex | None = None
+        # Editor line of each outline row.
+        self.outline_lines: list[int] = []
+        self.project_searcher = ProjectSearcher(self.event_queue.put)
+        self.project_search_id = 0
+        self.project_search_tree: ttk.Treeview | None = None
+        # Tree item id -> (relative path, line); Treeview values turn numeric-looking paths into numbers.
+        self.project_search_rows: dict[str, tuple[str, int]] = {}
+        self.project_search_status_var = tk.StringVar(value="")
+        # Line to jump to once the file being opened has finished loading.
+        self.ide_pending_goto_line: int | None = None
+        self.ide_select_current_pending = False
         self.ide_dirty = False
         self.ide_line_count = 0
+        self.ide_gutter_job_id: str | None = None
         self.ide_syntax_job_id: str | None = None
         self.ide_autosave_job_id: str | None = None
         self.ide_preview_temp_path: Path | None = None
-        self.ide_python_keywords = set(keyword.kwlist)
-        self.ide_python_builtins = set(dir(builtins))
+        self.file_saver = FileSaveService(self.event_queue.put)
+        self.ide_console_log = ConsoleLog()
+        self.ide_warm_pool: WarmRunnerPool | None = None
+        if IDE_WARM_RUNNER:
+            self.ide_warm_pool = WarmRunnerPool(IDE_WARM_PRELOAD, IDE_WARM_POOL_SIZE)
+            self.ide_warm_pool.start()
+        self.ide_console_dropped = 0
+        self.ide_console_scroll_job_id: str | None = None
+        # Bumped per open so a superseded background read or chunked insert stops.
+        self.ide_load_token = 0
+        self.ide_load_job_id: str | None = None
+        # Files with a tab, in the order they were opened; the one in the editor is ide_current_file.
+        self.ide_open_tabs: list[Path] = []
+        self.ide_buffers = BufferCache(IDE_BUFFER_CACHE_CHARS)
+        # (mtime_ns, size) of the editor's file when it was loaded or last saved.
+        self.ide_buffer_stamp: tuple[int, int] | None = None
+        # False while a file is still being read or streamed in, so a partial buffer is never cached.
+        self.ide_buffer_complete = True
+        # Set for huge or truncated files and while a file is still streaming in.
+        self.ide_read_only = False
+        self.ide_lexer = PythonLineLexer()
+        # Compiled lexers by editor language; picked per file in _sync_ide_lexer.
+        self.ide_lexers: dict[str, object] = {"python": self.ide_lexer}
+        self.ide_highlight_cache = LineStateCache()
+        # Bumped on every buffer edit so background lexer results for old text are dropped.
+        self.ide_edit_version = 0
+        # (cached buffer version, ide_edit_version right after restoring it): until the next edit the
+        # editor holds exactly that buffer's text, so saves started before the switch still count.
+        self.ide_restored_version: tuple[int, int] | None = None
+        # Versions for edits made to cached buffers, counting down so they never meet ide_edit_version.
+        self.ide_offscreen_version = 0
+        self.ide_highlight_inflight = False
+        # True while passes keep running past the edit because lexer state has not reconverged.
+        self.ide_highlight_catching_up = False
+        self.ide_paint_queue: deque[tuple[int, int, list]] = deque()
+        self.ide_paint_job_id: str | None = None
+        # Huge buffers only: chunk indexes (IDE_HIGHLIGHT_CHUNK_LINES each) whose tags are current.
+        self.ide_painted_chunks: set[int] = set()
+        self.ide_viewport_job_id: str | None = None
         self._ide_loading = False
         self.agent_running = False
         
         # Browser state for web IDE mode
         self.ide_browser: HtmlFrame | None = None
+        # Hash of the HTML the embedded preview shows, so unchanged content is not re-rendered.
+        self.ide_preview_hash: str | None = None
         self.ide_browser_panel: tk.Frame | None = None
         self.ide_browser_update_job_id: str | None = None
 
@@ -660,12 +785,24 @@ class GroqChatroomApp(tk.Tk):
 
     def _on_close(self) -> None:
         """Handle app shutdown by stopping processes and persisting conversations."""
+        if not self._save_dirty_ide_buffers_before_close():
+            return
         if self.ide_syntax_job_id is not None:
             try:
                 self.after_cancel(self.ide_syntax_job_id)
             except tk.TclError:
                 pass
             self.ide_syntax_job_id = None
+        for job_id in (self.ide_paint_job_id, self.ide_viewport_job_id, self.ide_gutter_job_id, self.ide_load_job_id):
+            if job_id is not None:
+                try:
+                    self.after_cancel(job_id)
+                except tk.TclError:
+                    pass
+        self.ide_paint_job_id = None
+        self.ide_viewport_job_id = None
+        self.ide_gutter_job_id = None
+        self.ide_load_job_id = None
         if self.ide_autosave_job_id is not None:
             try:
                 self.after_cancel(self.ide_autosave_job_id)
@@ -678,6 +815,16 @@ class GroqChatroomApp(tk.Tk):
             except tk.TclError:
                 pass
             self.ide_browser_update_job_id = None
+        self._cleanup_web_preview_file()
+        self.ide_console_log.reset()
+        self.execution_store.close()
+        if self.ide_warm_pool is not None:
+            self.ide_warm_pool.shutdown()
+        if self.project_index_poller is not None:
+            self.project_index_poller.stop()
+        self.project_searcher.shutdown()
+        if self.symbol_index is not None:
+            self.symbol_index.shutdown()
         self._hide_message_hover()
         self.stop_ide_code()
         self._save_conversations()
@@ -896,6 +1043,13 @@ class GroqChatroomApp(tk.Tk):
         self._build_chat_view(self.chat_view)
         self._build_ide_view(self.ide_view)
         self.bind_all("<Control-s>", self._handle_ctrl_s)
+        self.bind_all("<Control-p>", self._handle_ctrl_p)
+        self.bind_all("<Control-Shift-F>", self._handle_ctrl_shift_f)
+        self.bind_all("<Control-t>", self._handle_ctrl_t)
+        # Text's own Ctrl+T (transpose) and, on X11, Ctrl+P (previous line) run before bind_all;
+        # a widget binding that breaks comes first.
+        self.ide_editor.bind("<Control-t>", self._handle_ctrl_t)
+        self.ide_editor.bind("<Control-p>", self._handle_ctrl_p)
 
     def _configure_ttk_styles(self) -> None:
         """Configure ttk combobox styling so selectors remain stable in fullscreen."""
@@ -1215,6 +1369,8 @@ class GroqChatroomApp(tk.Tk):
             getattr(self, 'export_button', None),
             getattr(self, 'settings_button', None),
             getattr(self, 'send_button', None),
+            getattr(self, 'compare_button', None),
+            getattr(self, 'race_button', None),
             getattr(self, 'new_chat_button', None),
             getattr(self, 'run_button', None),
             getattr(self, 'stop_button', None),
@@ -1316,6 +1472,7 @@ class GroqChatroomApp(tk.Tk):
             tk.Button(
                 activity_bar,
                 text=label,
+                command=self.open_project_search_dialog if label == "SR" else None,
                 bg="#0c1422",
                 fg=COLORS["muted"] if idx else COLORS["text"],
                 activebackground="#131f33",
@@ -1478,6 +1635,30 @@ class GroqChatroomApp(tk.Tk):
         file_scroll.pack(side="right", fill="y")
         self.file_listbox.configure(yscrollcommand=file_scroll.set)
 
+        tk.Label(
+            explorer,
+            text="OUTLINE",
+            bg=COLORS["sidebar"],
+            fg=COLORS["muted"],
+            font=("Consolas", 8, "bold"),
+        ).pack(anchor="w", padx=12, pady=(0, 4))
+        self.outline_listbox = tk.Listbox(
+            explorer,
+            height=10,
+            bg=COLORS["list_bg"],
+            fg=COLORS["text"],
+            selectbackground=COLORS["button"],
+            selectforeground="#03100f",
+            highlightthickness=1,
+            highlightbackground=COLORS["border"],
+            relief="flat",
+            borderwidth=0,
+            activestyle="none",
+            font=("Consolas", 9),
+        )
+        self.outline_listbox.pack(fill="x", padx=12, pady=(0, 8))
+        self.outline_listbox.bind("<<ListboxSelect>>", self._on_outline_selected)
+
         tip = tk.Label(
             explorer,
             text="Open any file to start editing.",
@@ -1698,6 +1879,43 @@ class GroqChatroomApp(tk.Tk):
         )
         self.send_button.pack(side="right", padx=(0, 12), pady=12)
 
+        self.compare_button = tk.Button(
+            composer,
+            text="Compare",
+            command=self.open_compare_dialog,
+            bg=COLORS["entry_bg"],
+            fg=COLORS["text"],
+            activebackground="#172135",
+            activeforeground=COLORS["text"],
+            bd=0,
+            highlightthickness=1,
+            highlightbackground=COLORS["border"],
+            padx=12,
+            pady=8,
+            font=("Segoe UI", 10, "bold"),
+            cursor="hand2",
+        )
+        self.compare_button.pack(side="right", padx=(0, 8), pady=12)
+
+        self.race_button = tk.Button(
+            composer,
+            text="Race: Off",
+            command=self.open_race_dialog,
+            bg=COLORS["entry_bg"],
+            fg=COLORS["text"],
+            activebackground="#172135",
+            activeforeground=COLORS["text"],
+            bd=0,
+            highlightthickness=1,
+            highlightbackground=COLORS["border"],
+            padx=12,
+            pady=8,
+            font=("Segoe UI", 10, "bold"),
+            cursor="hand2",
+        )
+        self.race_button.pack(side="right", padx=(0, 8), pady=12)
+        self._update_race_button()
+
     def _build_ide_view(self, parent: tk.Frame) -> None:
         """Build the IDE workspace, editor, console, and right agent panel."""
         header = tk.Frame(
@@ -1735,22 +1953,9 @@ class GroqChatroomApp(tk.Tk):
 
         tab_strip = tk.Frame(header, bg="#0b1322")
         tab_strip.pack(side="left", fill="x", expand=True, padx=(4, 8), pady=8)
-        tab = tk.Frame(
-            tab_strip,
-            bg=COLORS["entry_bg"],
-            highlightthickness=1,
-            highlightbackground=COLORS["border"],
-        )
-        tab.pack(side="left")
-        tk.Label(
-            tab,
-            textvariable=self.ide_tab_title_var,
-            bg=COLORS["entry_bg"],
-            fg=COLORS["text"],
-            font=("Consolas", 9, "bold"),
-            padx=10,
-            pady=6,
-        ).pack(side="left")
+        self.ide_tabs_frame = tk.Frame(tab_strip, bg="#0b1322")
+        self.ide_tabs_frame.pack(side="left")
+        self._draw_ide_tabs()
         tk.Label(
             tab_strip,
             textvariable=self.ide_status_var,
@@ -1796,6 +2001,24 @@ class GroqChatroomApp(tk.Tk):
         )
         self.run_button.pack(side="left", padx=(0, 6))
 
+        self.profile_button = tk.Button(
+            controls,
+            text="Profile",
+            command=self.profile_ide_code,
+            bg=COLORS["entry_bg"],
+            fg=COLORS["text"],
+            activebackground="#172135",
+            activeforeground=COLORS["text"],
+            bd=0,
+            highlightthickness=1,
+            highlightbackground=COLORS["border"],
+            padx=10,
+            pady=5,
+            font=("Segoe UI", 9, "bold"),
+            cursor="hand2",
+        )
+        self.profile_button.pack(side="left", padx=(0, 6))
+
         self.stop_button = tk.Button(
             controls,
             text="Stop",
@@ -1833,6 +2056,25 @@ class GroqChatroomApp(tk.Tk):
         )
         self.ask_ai_button.pack(side="left")
 
+        self.undo_ai_button = tk.Button(
+            controls,
+            text="Undo AI Edit",
+            command=self.undo_ai_edit,
+            bg=COLORS["entry_bg"],
+            fg=COLORS["text"],
+            activebackground="#172135",
+            activeforeground=COLORS["text"],
+            bd=0,
+            highlightthickness=1,
+            highlightbackground=COLORS["border"],
+            padx=10,
+            pady=5,
+            font=("Segoe UI", 9, "bold"),
+            cursor="hand2",
+            state="disabled",
+        )
+        self.undo_ai_button.pack(side="left", padx=(6, 0))
+
         self.package_manager_button = tk.Button(
             controls,
             text="Packages",
@@ -1933,23 +2175,19 @@ class GroqChatroomApp(tk.Tk):
         editor_wrap = tk.Frame(editor_panel, bg=COLORS["panel"])
         editor_wrap.pack(fill="both", expand=True, padx=10)
 
-        self.ide_line_numbers = tk.Text(
+        # Drawn on a canvas from the editor's visible lines, so its cost does not grow with the file.
+        self.ide_gutter_font = tkfont.Font(family="Consolas", size=10)
+        self.ide_line_numbers = tk.Canvas(
             editor_wrap,
-            width=5,
-            wrap="none",
+            width=self._ide_gutter_width(1),
             bg="#0a111f",
-            fg="#6b7f9a",
             highlightthickness=1,
             highlightbackground=COLORS["border"],
             relief="flat",
             bd=0,
-            padx=6,
-            pady=10,
-            font=("Consolas", 10),
-            state="disabled",
         )
         self.ide_line_numbers.pack(side="left", fill="y")
-        self.ide_line_numbers.bind("<MouseWheel>", lambda _e: "break")
+        self.ide_line_numbers.bind("<Configure>", lambda _e: self._refresh_ide_line_numbers())
 
         self.ide_editor = tk.Text(
             editor_wrap,
@@ -1967,6 +2205,7 @@ class GroqChatroomApp(tk.Tk):
         )
         self.ide_editor.pack(side="left", fill="both", expand=True)
         self._configure_ide_syntax_tags()
+        self._install_ide_edit_hook()
         self.ide_editor.bind("<KeyRelease>", self._on_ide_editor_change)
         self.ide_editor.bind("<ButtonRelease-1>", self._update_ide_cursor_position)
 
@@ -2032,6 +2271,42 @@ class GroqChatroomApp(tk.Tk):
         )
         clear_output_btn.pack(side="right")
 
+        self.ide_console_log_button = tk.Button(
+            terminal_header,
+            text="Open Log",
+            command=self.open_ide_console_log,
+            bg=COLORS["entry_bg"],
+            fg=COLORS["text"],
+            activebackground="#172135",
+            activeforeground=COLORS["text"],
+            bd=0,
+            highlightthickness=1,
+            highlightbackground=COLORS["border"],
+            padx=10,
+            pady=4,
+            font=("Segoe UI", 8, "bold"),
+            cursor="hand2",
+            state="disabled",
+        )
+        self.ide_console_log_button.pack(side="right", padx=(0, 6))
+
+        tk.Button(
+            terminal_header,
+            text="History",
+            command=self.open_run_history_dialog,
+            bg=COLORS["entry_bg"],
+            fg=COLORS["text"],
+            activebackground="#172135",
+            activeforeground=COLORS["text"],
+            bd=0,
+            highlightthickness=1,
+            highlightbackground=COLORS["border"],
+            padx=10,
+            pady=4,
+            font=("Segoe UI", 8, "bold"),
+            cursor="hand2",
+        ).pack(side="right", padx=(0, 6))
+
         output_wrap = tk.Frame(terminal_panel, bg=COLORS["panel"])
         output_wrap.pack(fill="both", expand=True, padx=10, pady=(0, 10))
         
@@ -2051,6 +2326,7 @@ class GroqChatroomApp(tk.Tk):
             pady=10,
             state="disabled",
         )
+        self.ide_output.tag_configure("stderr", foreground=IDE_STDERR_COLOR)
         self.ide_output.pack(side="left", fill="both", expand=True)
 
         yscroll_output = tk.Scrollbar(
@@ -2542,16 +2818,21 @@ class GroqChatroomApp(tk.Tk):
         if not hasattr(self, "ide_editor"):
             return
 
+        self._cancel_ide_file_load()
         self._ide_loading = True
         self.ide_editor.delete("1.0", "end")
         self.ide_editor.insert("1.0", self._ide_template_for_kind(kind))
         self._ide_loading = False
+        self._drop_scratch_ai_edits()
 
         self.ide_current_file = None
         self.ide_dirty = False
+        self.ide_buffer_stamp = None
+        self.ide_buffer_complete = True
         scratch_name = self._default_scratch_filename_for_kind(kind)
         self.ide_file_var.set(scratch_name)
         self.ide_tab_title_var.set(scratch_name)
+        self._draw_ide_tabs()
         self._refresh_ide_line_numbers()
         self._update_ide_cursor_position()
         self._schedule_ide_syntax_highlight(delay_ms=10)
@@ -2797,18 +3078,11 @@ class GroqChatroomApp(tk.Tk):
             pass
 
         self.settings = self._load_settings()
+        self.provider_client.settings = self.settings
 
     def _get_api_key(self, provider: str) -> str:
         """Get api key with configured fallbacks."""
-        if provider not in PROVIDERS:
-            return ""
-        settings_keys = self.settings.get("api_keys", {})
-        if isinstance(settings_keys, dict):
-            key = str(settings_keys.get(provider, "")).strip()
-            if key:
-                return key
-        env_key_name = str(PROVIDERS[provider]["env_key"])
-        return os.getenv(env_key_name, "").strip()
+        return self.provider_client.get_api_key(provider)
 
     def _has_key(self, provider: str | None = None) -> bool:
         """Check whether the selected provider currently has an API key."""
@@ -2976,6 +3250,8 @@ class GroqChatroomApp(tk.Tk):
     def _list_models_worker(self, provider: str, api_key: str, preferred_model: str) -> None:
         """Background worker that retrieves models for a provider and emits queue events."""
         try:
+            # Model listing counts against the selected model's request budget but uses no tokens.
+            self.rate_limiter.acquire(provider, preferred_model, tokens=0)
             models = self._list_models_for_provider(provider, api_key)
             # Keep payload primitives/dicts only so queue events remain serialization-friendly.
             self.event_queue.put(
@@ -3124,95 +3400,15 @@ class GroqChatroomApp(tk.Tk):
         timeout: int = 45,
     ) -> dict[str, object]:
         """Execute an HTTP request and return parsed JSON with normalized errors."""
-        request_headers = dict(headers)
-        payload_data: bytes | None = None
-        if body is not None:
-            payload_data = json.dumps(body).encode("utf-8")
-            request_headers["Content-Type"] = "application/json"
-
-        req = urlrequest.Request(
-            url=url,
-            data=payload_data,
-            headers=request_headers,
-            method=method.upper(),
-        )
-
-        try:
-            with urlrequest.urlopen(req, timeout=timeout) as response:
-                raw = response.read().decode("utf-8")
-        except urlerror.HTTPError as exc:
-            body_text = exc.read().decode("utf-8", errors="replace")
-            message = body_text.strip() or exc.reason
-            try:
-                parsed = json.loads(body_text)
-                if isinstance(parsed, dict):
-                    if isinstance(parsed.get("error"), dict):
-                        msg = str(parsed["error"].get("message", "")).strip()
-                        if msg:
-                            message = msg
-                    elif isinstance(parsed.get("error"), str):
-                        msg = str(parsed["error"]).strip()
-                        if msg:
-                            message = msg
-            except json.JSONDecodeError:
-                pass
-            raise RuntimeError(f"{exc.code} {message}") from exc
-        except urlerror.URLError as exc:
-            reason = str(getattr(exc, "reason", exc))
-            raise RuntimeError(f"Network error: {reason}") from exc
-
-        if not raw:
-            return {}
-
-        try:
-            parsed_payload = json.loads(raw)
-        except json.JSONDecodeError as exc:
-            raise RuntimeError("Provider returned invalid JSON.") from exc
-        if isinstance(parsed_payload, dict):
-            return parsed_payload
-        raise RuntimeError("Provider returned an unexpected JSON payload.")
+        return self.provider_client.http_json(method, url, headers, body=body, timeout=timeout)
 
     def _estimate_token_count(self, text: str) -> int:
         """Estimate token count when provider usage stats are unavailable."""
-        stripped = text.strip()
-        if not stripped:
-            return 0
-        # Rough heuristic: most LLM tokenizers average around 3-4 chars per token.
-        return max(1, int(round(len(stripped) / 4)))
+        return ConversationStore.estimate_token_count(text)
 
     def _normalize_message_meta(self, raw_meta: object, role: str, content: str) -> dict[str, object]:
         """Normalize message metadata and ensure token count is always available."""
-        meta: dict[str, object] = {}
-        if isinstance(raw_meta, dict):
-            token_count = raw_meta.get("token_count")
-            if isinstance(token_count, int) and token_count >= 0:
-                meta["token_count"] = token_count
-            elif isinstance(token_count, float) and token_count >= 0:
-                meta["token_count"] = int(round(token_count))
-
-            response_seconds = raw_meta.get("response_seconds")
-            if isinstance(response_seconds, (int, float)) and float(response_seconds) >= 0:
-                meta["response_seconds"] = round(float(response_seconds), 3)
-
-            for key in ("provider", "model", "token_source"):
-                value = raw_meta.get(key)
-                if isinstance(value, str):
-                    cleaned = value.strip()
-                    if cleaned:
-                        meta[key] = cleaned
-
-            for key in ("prompt_tokens", "completion_tokens", "total_tokens"):
-                value = raw_meta.get(key)
-                if isinstance(value, int) and value >= 0:
-                    meta[key] = value
-                elif isinstance(value, float) and value >= 0:
-                    meta[key] = int(round(value))
-
-        if "token_count" not in meta and role in {"assistant", "user", "system"}:
-            meta["token_count"] = self._estimate_token_count(content)
-            meta["token_source"] = "estimated"
-
-        return meta
+        return ConversationStore.normalize_message_meta(raw_meta, role, content)
 
     def _format_seconds(self, seconds: float) -> str:
         """Format a duration in seconds for compact UI display."""
@@ -3236,6 +3432,18 @@ class GroqChatroomApp(tk.Tk):
         else:
             lines.append("Response time: n/a")
 
+        queue_seconds = normalized.get("queue_seconds")
+        if isinstance(queue_seconds, (int, float)) and float(queue_seconds) > 0:
+            lines.append(f"Queued (rate limit): {self._format_seconds(float(queue_seconds))}")
+
+        race_entrants = normalized.get("race_entrants")
+        if isinstance(race_entrants, int) and race_entrants > 1:
+            race_line = f"Race: won against {race_entrants - 1} other(s)"
+            margin = normalized.get("race_margin_seconds")
+            if isinstance(margin, (int, float)):
+                race_line += f" by {self._format_seconds(float(margin))}"
+            lines.append(race_line)
+
         return "\n".join(lines)
 
     def _show_message_hover(self, event: tk.Event, hover_text: str) -> None:
@@ -3287,146 +3495,32 @@ class GroqChatroomApp(tk.Tk):
 
     def _sanitize_messages(self, raw_messages: object, fallback_message: str) -> list[dict[str, object]]:
         """Validate and normalize persisted message objects before rendering or sending."""
-        cleaned: list[dict[str, object]] = []
-        if isinstance(raw_messages, list):
-            for item in raw_messages:
-                if not isinstance(item, dict):
-                    continue
-                role = str(item.get("role", "")).strip()
-                content = str(item.get("content", "")).strip()
-                if role not in {"assistant", "user", "system"}:
-                    continue
-                if not content:
-                    continue
-                
-                # Filter out temporary attachment paths from the content
-                filtered_content = self._filter_attachment_paths_from_text(content)
-                
-                # Extract thought process from the content
-                visible_text, thought_process = self._extract_thought_process(filtered_content)
-                
-                # Add thought process to meta if found
-                if thought_process:
-                    # Get existing meta or create new one
-                    existing_meta = item.get("meta", {})
-                    if not isinstance(existing_meta, dict):
-                        existing_meta = {}
-                    if 'thought_process' not in existing_meta:
-                        existing_meta['thought_process'] = thought_process
-                    meta_dict = existing_meta
-                else:
-                    meta_dict = item.get("meta", {})
-                    if not isinstance(meta_dict, dict):
-                        meta_dict = {}
-                
-                # Only add if there's content after filtering
-                if visible_text.strip():
-                    message: dict[str, object] = {"role": role, "content": visible_text}
-                    if meta_dict:
-                        message["meta"] = meta_dict
-                    cleaned.append(message)
-                else:
-                    # Skip messages that only contain attachment paths
-                    continue
-
-        if not cleaned:
-            cleaned.append(
-                {
-                    "role": "assistant",
-                    "content": fallback_message,
-                    "meta": self._normalize_message_meta({}, "assistant", fallback_message),
-                }
-            )
-        return cleaned
+        return ConversationStore.sanitize_messages(raw_messages, fallback_message)
 
     def _load_conversations(self) -> None:
         """Load conversations from persisted or remote sources."""
-        if not self.conversations_path.exists():
+        state = self.conversation_store.load(WELCOME_MESSAGE, AGENT_WELCOME_MESSAGE)
+        if state is None:
             return
-
-        try:
-            payload = json.loads(self.conversations_path.read_text(encoding="utf-8"))
-        except (OSError, json.JSONDecodeError):
-            return
-        if not isinstance(payload, dict):
-            return
-
-        loaded_chats: list[dict[str, object]] = []
-        for idx, item in enumerate(payload.get("chats", [])):
-            if not isinstance(item, dict):
-                continue
-            thread_id = str(item.get("id", "")).strip()
-            if not thread_id:
-                continue
-            title = str(item.get("title", "")).strip() or f"Chat {idx + 1}"
-            # Sanitize old/invalid records so a bad disk payload cannot break rendering.
-            messages = self._sanitize_messages(item.get("messages"), WELCOME_MESSAGE)
-            loaded_chats.append({"id": thread_id, "title": title, "messages": messages})
-
-        self.chats = loaded_chats
-        saved_chat_counter = payload.get("chat_counter")
-        # Counter never goes backward; keeps generated IDs unique across restarts.
-        if isinstance(saved_chat_counter, int):
-            self.chat_counter = max(saved_chat_counter, len(self.chats))
-        else:
-            self.chat_counter = len(self.chats)
-
-        requested_chat_id = str(payload.get("current_chat_id", "")).strip()
-        valid_chat_ids = {str(c["id"]) for c in self.chats}
-        if requested_chat_id and requested_chat_id in valid_chat_ids:
-            self.current_chat_id = requested_chat_id
-        elif self.chats:
-            self.current_chat_id = str(self.chats[0]["id"])
-        else:
-            self.current_chat_id = None
-
-        loaded_agent_chats: list[dict[str, object]] = []
-        for idx, item in enumerate(payload.get("agent_chats", [])):
-            if not isinstance(item, dict):
-                continue
-            thread_id = str(item.get("id", "")).strip()
-            if not thread_id:
-                continue
-            title = str(item.get("title", "")).strip() or f"Agent Chat {idx + 1}"
-            # Agent history uses the same message schema but a different empty-state welcome.
-            messages = self._sanitize_messages(item.get("messages"), AGENT_WELCOME_MESSAGE)
-            loaded_agent_chats.append({"id": thread_id, "title": title, "messages": messages})
-
-        self.agent_chats = loaded_agent_chats
-        saved_agent_counter = payload.get("agent_chat_counter")
-        if isinstance(saved_agent_counter, int):
-            self.agent_chat_counter = max(saved_agent_counter, len(self.agent_chats))
-        else:
-            self.agent_chat_counter = len(self.agent_chats)
-
-        requested_agent_id = str(payload.get("current_agent_chat_id", "")).strip()
-        valid_agent_ids = {str(c["id"]) for c in self.agent_chats}
-        if requested_agent_id and requested_agent_id in valid_agent_ids:
-            self.current_agent_chat_id = requested_agent_id
-        elif self.agent_chats:
-            self.current_agent_chat_id = str(self.agent_chats[0]["id"])
-        else:
-            self.current_agent_chat_id = None
+        self.chats = state["chats"]
+        self.chat_counter = state["chat_counter"]
+        self.current_chat_id = state["current_chat_id"]
+        self.agent_chats = state["agent_chats"]
+        self.agent_chat_counter = state["agent_chat_counter"]
+        self.current_agent_chat_id = state["current_agent_chat_id"]
 
     def _save_conversations(self) -> None:
         """Save conversations to persistent storage."""
-        payload = {
-            "chat_counter": self.chat_counter,
-            "current_chat_id": self.current_chat_id,
-            "chats": self.chats,
-            "agent_chat_counter": self.agent_chat_counter,
-            "current_agent_chat_id": self.current_agent_chat_id,
-            "agent_chats": self.agent_chats,
-        }
-        try:
-            self.conversations_path.parent.mkdir(parents=True, exist_ok=True)
-            self.conversations_path.write_text(
-                json.dumps(payload, indent=2),
-                encoding="utf-8",
-            )
-            os.chmod(self.conversations_path, 0o600)
-        except OSError:
-            pass
+        self.conversation_store.save(
+            {
+                "chat_counter": self.chat_counter,
+                "current_chat_id": self.current_chat_id,
+                "chats": self.chats,
+                "agent_chat_counter": self.agent_chat_counter,
+                "current_agent_chat_id": self.current_agent_chat_id,
+                "agent_chats": self.agent_chats,
+            }
+        )
 
     def open_settings_dialog(self) -> None:
         """Open the settings dialog with tabs for API Keys, Defaults, and Visuals."""
@@ -4473,6 +4567,12 @@ class GroqChatroomApp(tk.Tk):
                 if filtered_code.strip():
                     context_blocks.append(f"Current file ({filename}):\n```python\n{filtered_code}\n```")
         
+        # A compact symbol listing gives the agent the project's shape without pasting whole files.
+        if self.symbol_index is not None:
+            outline = self.symbol_index.outline_text(AGENT_SYMBOL_CONTEXT_CHARS)
+            if outline:
+                context_blocks.append(f"Project symbols:\n```\n{outline}\n```")
+
         # Include console output if relevant
         if "console" in user_text.lower() or "output" in user_text.lower():
             console = self.ide_output.get("1.0", "end-1c").strip()
@@ -4954,58 +5054,8 @@ class GroqChatroomApp(tk.Tk):
         self.input_box.configure(height=target)
 
     def _extract_thought_process(self, text: str) -> tuple[str, str | None]:
-        """Extract thought process from text and return (visible_text, thought_process).
-        
-        Identifies common patterns used by AI models to denote their thinking process.
-        """
-        import re
-        
-        # Common patterns for AI thought processes
-        patterns = [
-            # XML-style tags
-            (r'<thinking>(.*?)</thinking>', re.DOTALL | re.IGNORECASE),
-            (r'<think>(.*?)</think>', re.DOTALL | re.IGNORECASE),
-            (r'<scratchpad>(.*?)</scratchpad>', re.DOTALL | re.IGNORECASE),
-            (r'<inner_thoughts>(.*?)</inner_thoughts>', re.DOTALL | re.IGNORECASE),
-            # Markdown-style
-            (r'\[THOUGHT\](.*?)\[/THOUGHT\]', re.DOTALL | re.IGNORECASE),
-            (r'\[THINKING\](.*?)\[/THINKING\]', re.DOTALL | re.IGNORECASE),
-            (r'\[REASONING\](.*?)\[/REASONING\]', re.DOTALL | re.IGNORECASE),
-            # Parentheses or brackets
-            (r'\(let me think.*?\)', re.IGNORECASE),
-            (r'\(reasoning:.*?\)', re.IGNORECASE),
-            (r'\(thinking.*?\)', re.IGNORECASE),
-            # Additional patterns that might appear with high reasoning effort
-            (r'(?i)(thought process:|reasoning:|thinking:|analysis:)\s*(.*?)(?=\n\n|\Z)', re.DOTALL),
-            (r'(?i)(step 1:|step 2:|step 3:|first,|next,|then,|finally,).*?(?=\n\n|\Z)', re.DOTALL),
-            (r'(?i)(plan:|strategy:)\s*(.*?)(?=\n\n|\Z)', re.DOTALL),
-            (r'\[\*\*\s*T(?:hought|HINKING|RATEGY|LAN)\s*\*\*\].*?(?=\n\n|\Z)', re.DOTALL),
-        ]
-
-        thought_process = None
-
-        for pattern, flags in patterns:
-            matches = re.findall(pattern, text, flags)
-            if matches:
-                # Extract the longest thought process found
-                for match in matches:
-                    # If it's a tuple (from groups), take the last non-empty element
-                    if isinstance(match, tuple):
-                        match_content = next((item for item in match if item), '')
-                    else:
-                        match_content = match
-                    if thought_process is None or len(match_content) > len(thought_process):
-                        thought_process = match_content.strip()
-
-        if thought_process:
-            # Remove the thought process from the visible text
-            for pattern, flags in patterns:
-                text = re.sub(pattern, '', text, flags=flags).strip()
-            # Clean up extra whitespace that might remain
-            text = re.sub(r'\n\s*\n', '\n\n', text)  # Replace multiple newlines with double newline
-            text = text.strip()
-
-        return text, thought_process
+        """Extract thought process from text and return (visible_text, thought_process)."""
+        return ConversationStore.extract_thought_process(text)
 
     def _create_rounded_bubble(self, parent, bg_color, fg_color, text, font, justify, wraplength=720, role="assistant"):
         """Create a bubble with rounded corners using a frame with padding to simulate rounded corners."""
@@ -5315,415 +5365,31 @@ class GroqChatroomApp(tk.Tk):
         return cleaned
 
 
-    def _provider_temperature(self, provider: str) -> float:
-        """Compute temperature for provider-specific behavior."""
-        value = os.getenv(
-            f"{provider.upper()}_TEMPERATURE",
-            os.getenv("LLM_TEMPERATURE", os.getenv("GROQ_TEMPERATURE", "0.7")),
-        )
-        try:
-            return float(value)
-        except ValueError:
-            return 0.7
-
-    def _provider_max_tokens(self, provider: str) -> int:
-        """Compute max tokens for provider-specific behavior."""
-        value = os.getenv(
-            f"{provider.upper()}_MAX_TOKENS",
-            os.getenv("LLM_MAX_TOKENS", os.getenv("GROQ_MAX_TOKENS", "1024")),
-        )
-        try:
-            return max(1, int(value))
-        except ValueError:
-            return 1024
-
     def _provider_model_text(self, provider: str, model: str) -> str:
         """Compute model text for provider-specific behavior."""
         return f"{self._provider_label(provider)} · {model}"
 
-    def _extract_openai_compatible_text(self, payload: dict[str, object]) -> str:
-        """Extract assistant text from an OpenAI-compatible completion payload."""
-        choices = payload.get("choices", [])
-        if not isinstance(choices, list) or not choices:
-            return ""
-
-        first = choices[0]
-        if not isinstance(first, dict):
-            return ""
-
-        message = first.get("message")
-        if not isinstance(message, dict):
-            return ""
-
-        content = message.get("content")
-        if isinstance(content, str):
-            return content.strip()
-        if isinstance(content, list):
-            parts: list[str] = []
-            for item in content:
-                if not isinstance(item, dict):
-                    continue
-                text = str(item.get("text", "")).strip()
-                if text:
-                    parts.append(text)
-            return "\n".join(parts).strip()
-        return ""
-
-    def _extract_openai_compatible_usage(self, payload: dict[str, object]) -> dict[str, int]:
-        """Extract usage token fields from an OpenAI-compatible response payload."""
-        usage = payload.get("usage")
-        if not isinstance(usage, dict):
-            return {}
-
-        result: dict[str, int] = {}
-        prompt_tokens = usage.get("prompt_tokens")
-        completion_tokens = usage.get("completion_tokens")
-        total_tokens = usage.get("total_tokens")
-
-        if isinstance(prompt_tokens, (int, float)) and prompt_tokens >= 0:
-            result["prompt_tokens"] = int(round(prompt_tokens))
-        if isinstance(completion_tokens, (int, float)) and completion_tokens >= 0:
-            result["completion_tokens"] = int(round(completion_tokens))
-        if isinstance(total_tokens, (int, float)) and total_tokens >= 0:
-            result["total_tokens"] = int(round(total_tokens))
-        return result
-
-    def _extract_anthropic_usage(self, payload: dict[str, object]) -> dict[str, int]:
-        """Extract usage token fields from an Anthropic response payload."""
-        usage = payload.get("usage")
-        if not isinstance(usage, dict):
-            return {}
-
-        result: dict[str, int] = {}
-        input_tokens = usage.get("input_tokens")
-        output_tokens = usage.get("output_tokens")
-        if isinstance(input_tokens, (int, float)) and input_tokens >= 0:
-            result["prompt_tokens"] = int(round(input_tokens))
-        if isinstance(output_tokens, (int, float)) and output_tokens >= 0:
-            result["completion_tokens"] = int(round(output_tokens))
-        if "prompt_tokens" in result and "completion_tokens" in result:
-            result["total_tokens"] = result["prompt_tokens"] + result["completion_tokens"]
-        return result
-
-    def _extract_gemini_usage(self, payload: dict[str, object]) -> dict[str, int]:
-        """Extract usage token fields from a Gemini response payload."""
-        usage = payload.get("usageMetadata")
-        if not isinstance(usage, dict):
-            return {}
-
-        result: dict[str, int] = {}
-        prompt_tokens = usage.get("promptTokenCount")
-        completion_tokens = usage.get("candidatesTokenCount")
-        total_tokens = usage.get("totalTokenCount")
-
-        if isinstance(prompt_tokens, (int, float)) and prompt_tokens >= 0:
-            result["prompt_tokens"] = int(round(prompt_tokens))
-        if isinstance(completion_tokens, (int, float)) and completion_tokens >= 0:
-            result["completion_tokens"] = int(round(completion_tokens))
-        if isinstance(total_tokens, (int, float)) and total_tokens >= 0:
-            result["total_tokens"] = int(round(total_tokens))
-        return result
-
-    def _build_assistant_meta(
-        self,
-        provider: str,
-        model: str,
-        reply_text: str,
-        usage: dict[str, int],
-        response_seconds: float,
-    ) -> dict[str, object]:
-        """Build metadata used for hover details on assistant replies."""
-        meta: dict[str, object] = {
-            "provider": provider,
-            "model": model,
-            "response_seconds": round(max(0.0, response_seconds), 3),
-        }
-        for key in ("prompt_tokens", "completion_tokens", "total_tokens"):
-            value = usage.get(key)
-            if isinstance(value, int) and value >= 0:
-                meta[key] = value
-        if "completion_tokens" in usage:
-            meta["token_count"] = usage["completion_tokens"]
-            meta["token_source"] = "provider"
-        elif "total_tokens" in usage:
-            meta["token_count"] = usage["total_tokens"]
-            meta["token_source"] = "provider"
-        else:
-            meta["token_count"] = self._estimate_token_count(reply_text)
-            meta["token_source"] = "estimated"
-        return meta
-
-    def _chat_with_openai_compatible(
+    def _complete_with_provider(
         self,
         provider: str,
         model: str,
         messages: list[dict[str, str]],
         is_agent: bool = False,
-    ) -> tuple[str, dict[str, int]]:
-        """Send a chat request using the openai compatible adapter."""
-        base_url = OPENAI_COMPATIBLE_BASE_URL.get(provider, "")
-        if not base_url:
-            raise RuntimeError(f"Unsupported provider: {provider}")
-        api_key = self._get_api_key(provider)
-        if not api_key:
-            raise RuntimeError(self._missing_key_message(provider))
+    ) -> tuple[str, dict[str, object]]:
+        """Send one rate-limited chat request and return the reply with assistant meta."""
+        return self.provider_client.complete(provider, model, messages, is_agent=is_agent)
 
-        # Adjust temperature based on reasoning effort
-        base_temp = self._provider_temperature(provider)
-        reasoning_effort = self._get_reasoning_effort(is_agent=is_agent)
-        
-        if reasoning_effort == 0:  # Low effort
-            adjusted_temp = min(base_temp, 0.3)  # More deterministic
-        elif reasoning_effort == 2:  # High effort
-            adjusted_temp = max(base_temp, 0.8)  # More creative exploration
-        else:  # Standard effort
-            adjusted_temp = base_temp
-        
-        payload = self._http_json(
-            method="POST",
-            url=f"{base_url}/chat/completions",
-            headers={"Authorization": f"Bearer {api_key}"},
-            body={
-                "model": model,
-                "messages": messages,
-                "temperature": adjusted_temp,
-                "max_tokens": self._provider_max_tokens(provider),
-            },
-        )
-        text = self._extract_openai_compatible_text(payload)
-        if text:
-            return text, self._extract_openai_compatible_usage(payload)
-        raise RuntimeError("No content returned.")
+    def send_message(self, preset_text: str | None = None) -> None:
+        """Queue a user message and dispatch the async chat completion request."""
+        if self.pending:
+            return
 
-    def _chat_with_groq(self, model: str, messages: list[dict[str, str]], is_agent: bool = False) -> tuple[str, dict[str, int]]:
-        """Send a chat request using the groq adapter."""
-        api_key = self._get_api_key("groq")
-        if not api_key:
-            raise RuntimeError(self._missing_key_message("groq"))
-
-        try:
-            client = Groq(api_key=api_key)
-        except TypeError as e:
-            if "proxies" in str(e):
-                # Handle the case where proxy settings cause issues with Groq client
-                # Create the client without passing proxy-related arguments
-                import os
-                # Temporarily unset proxy environment variables if present
-                original_http_proxy = os.environ.pop('HTTP_PROXY', None)
-                original_https_proxy = os.environ.pop('HTTPS_PROXY', None)
-                
-                try:
-                    client = Groq(api_key=api_key)
-                finally:
-                    # Restore original proxy settings
-                    if original_http_proxy:
-                        os.environ['HTTP_PROXY'] = original_http_proxy
-                    if original_https_proxy:
-                        os.environ['HTTPS_PROXY'] = original_https_proxy
-            else:
-                raise
-        
-        # Adjust temperature based on reasoning effort
-        base_temp = self._provider_temperature("groq")
-        reasoning_effort = self._get_reasoning_effort(is_agent=is_agent)
-        
-        if reasoning_effort == 0:  # Low effort
-            adjusted_temp = min(base_temp, 0.3)  # More deterministic
-        elif reasoning_effort == 2:  # High effort
-            adjusted_temp = max(base_temp, 0.8)  # More creative exploration
-        else:  # Standard effort
-            adjusted_temp = base_temp
-        
-        completion = client.chat.completions.create(
-            model=model,
-            messages=messages,
-            temperature=adjusted_temp,
-            max_completion_tokens=self._provider_max_tokens("groq"),
-        )
-        text = (completion.choices[0].message.content or "").strip()
-        if text:
-            usage_raw = getattr(completion, "usage", None)
-            usage: dict[str, int] = {}
-            if usage_raw is not None:
-                prompt_tokens = getattr(usage_raw, "prompt_tokens", None)
-                completion_tokens = getattr(usage_raw, "completion_tokens", None)
-                total_tokens = getattr(usage_raw, "total_tokens", None)
-                if isinstance(prompt_tokens, int) and prompt_tokens >= 0:
-                    usage["prompt_tokens"] = prompt_tokens
-                if isinstance(completion_tokens, int) and completion_tokens >= 0:
-                    usage["completion_tokens"] = completion_tokens
-                if isinstance(total_tokens, int) and total_tokens >= 0:
-                    usage["total_tokens"] = total_tokens
-            return text, usage
-        raise RuntimeError("No content returned.")
-
-    def _chat_with_anthropic(self, model: str, messages: list[dict[str, str]], is_agent: bool = False) -> tuple[str, dict[str, int]]:
-        """Send a chat request using the anthropic adapter."""
-        api_key = self._get_api_key("anthropic")
-        if not api_key:
-            raise RuntimeError(self._missing_key_message("anthropic"))
-
-        system_blocks = [m["content"] for m in messages if m.get("role") == "system"]
-        chat_messages = [
-            {"role": m["role"], "content": m["content"]}
-            for m in messages
-            if m.get("role") in {"user", "assistant"}
-        ]
-        if not chat_messages:
-            chat_messages = [{"role": "user", "content": "Hello"}]
-
-        body: dict[str, object] = {
-            "model": model,
-            "messages": chat_messages,
-            "max_tokens": self._provider_max_tokens("anthropic"),
-            "temperature": self._provider_temperature("anthropic"),
-        }
-        
-        # Add reasoning effort settings based on user selection
-        reasoning_effort = self._get_reasoning_effort(is_agent=is_agent)
-        if reasoning_effort == 0:  # Low effort
-            body["temperature"] = min(body["temperature"], 0.3)  # Lower temperature for more focused responses
-        elif reasoning_effort == 2:  # High effort
-            # For Claude models, we can enable advanced reasoning features
-            body["extra_body"] = {
-                "beta": ["reasoning"]  # Enable reasoning beta feature if available
-            }
-            # Higher temperature for more creative, thorough responses
-            body["temperature"] = max(body["temperature"], 0.8)
-        
-        if system_blocks:
-            body["system"] = "\n\n".join(system_blocks)
-
-        payload = self._http_json(
-            method="POST",
-            url="https://api.anthropic.com/v1/messages",
-            headers={
-                "x-api-key": api_key,
-                "anthropic-version": os.getenv("ANTHROPIC_VERSION", "2023-06-01"),
-            },
-            body=body,
-        )
-        content = payload.get("content", [])
-        if isinstance(content, list):
-            text_parts = []
-            for item in content:
-                if not isinstance(item, dict):
-                    continue
-                if str(item.get("type", "")).strip() != "text":
-                    continue
-                text = str(item.get("text", "")).strip()
-                if text:
-                    text_parts.append(text)
-            if text_parts:
-                return "\n".join(text_parts).strip(), self._extract_anthropic_usage(payload)
-        raise RuntimeError("No content returned.")
-
-    def _chat_with_gemini(self, model: str, messages: list[dict[str, str]], is_agent: bool = False) -> tuple[str, dict[str, int]]:
-        """Send a chat request using the gemini adapter."""
-        api_key = self._get_api_key("gemini")
-        if not api_key:
-            raise RuntimeError(self._missing_key_message("gemini"))
-
-        system_blocks: list[str] = []
-        contents: list[dict[str, object]] = []
-        for item in messages:
-            role = item.get("role")
-            text = item.get("content", "").strip()
-            if not text:
-                continue
-            if role == "system":
-                system_blocks.append(text)
-                continue
-            if role == "assistant":
-                gem_role = "model"
-            elif role == "user":
-                gem_role = "user"
-            else:
-                continue
-            contents.append({"role": gem_role, "parts": [{"text": text}]})
-
-        if not contents:
-            contents = [{"role": "user", "parts": [{"text": "Hello"}]}]
-
-        # Adjust temperature based on reasoning effort
-        base_temp = self._provider_temperature("gemini")
-        reasoning_effort = self._get_reasoning_effort(is_agent=is_agent)
-        
-        if reasoning_effort == 0:  # Low effort
-            adjusted_temp = min(base_temp, 0.3)  # More deterministic
-        elif reasoning_effort == 2:  # High effort
-            adjusted_temp = max(base_temp, 0.8)  # More creative exploration
-        else:  # Standard effort
-            adjusted_temp = base_temp
-
-        body: dict[str, object] = {
-            "contents": contents,
-            "generationConfig": {
-                "temperature": adjusted_temp,
-                "maxOutputTokens": self._provider_max_tokens("gemini"),
-            },
-        }
-        if system_blocks:
-            body["systemInstruction"] = {
-                "parts": [{"text": "\n\n".join(system_blocks)}],
-            }
-
-        model_path = urlparse.quote(model, safe="")
-        payload = self._http_json(
-            method="POST",
-            url=f"https://generativelanguage.googleapis.com/v1beta/models/{model_path}:generateContent",
-            headers={"x-goog-api-key": api_key},
-            body=body,
-        )
-        candidates = payload.get("candidates", [])
-        if isinstance(candidates, list) and candidates:
-            first = candidates[0]
-            if isinstance(first, dict):
-                content = first.get("content", {})
-                if isinstance(content, dict):
-                    parts = content.get("parts", [])
-                    if isinstance(parts, list):
-                        text_parts: list[str] = []
-                        for part in parts:
-                            if not isinstance(part, dict):
-                                continue
-                            text = str(part.get("text", "")).strip()
-                            if text:
-                                text_parts.append(text)
-                        if text_parts:
-                            return "\n".join(text_parts).strip(), self._extract_gemini_usage(payload)
-        raise RuntimeError("No content returned.")
-
-    def _chat_with_provider(
-        self,
-        provider: str,
-        model: str,
-        messages: list[dict[str, str]],
-        is_agent: bool = False,
-    ) -> tuple[str, dict[str, int]]:
-        """Send a chat request using the provider adapter."""
-        wanted = provider.strip().lower()
-        if wanted == "groq":
-            return self._chat_with_groq(model, messages, is_agent)
-        if wanted in OPENAI_COMPATIBLE_BASE_URL:
-            return self._chat_with_openai_compatible(wanted, model, messages, is_agent)
-        if wanted == "anthropic":
-            return self._chat_with_anthropic(model, messages, is_agent)
-        if wanted == "gemini":
-            return self._chat_with_gemini(model, messages, is_agent)
-        raise RuntimeError(f"Unsupported provider: {provider}")
-
-    def send_message(self, preset_text: str | None = None) -> None:
-        """Queue a user message and dispatch the async chat completion request."""
-        if self.pending:
-            return
-
-        chat = self._current_chat()
-        if chat is None:
-            self._create_chat()
-            chat = self._current_chat()
-        if chat is None:
-            return
+        chat = self._current_chat()
+        if chat is None:
+            self._create_chat()
+            chat = self._current_chat()
+        if chat is None:
+            return
 
         if preset_text is None:
             user_text = self.input_box.get("1.0", "end-1c").strip()
@@ -5760,6 +5426,18 @@ class GroqChatroomApp(tk.Tk):
 
         # Copy current history for the worker thread so later UI mutations do not race.
         payload = [dict(item) for item in messages if isinstance(item, dict)]
+        race_targets = self._active_race_targets()
+        if race_targets:
+            self.race_counter += 1
+            self.status_var.set(f"Racing {len(race_targets)} models...")
+            thread = threading.Thread(
+                target=self._request_race,
+                args=(payload, race_targets, chat_id, f"race-{int(time.time())}-{self.race_counter}"),
+                daemon=True,
+            )
+            thread.start()
+            return
+
         provider = self.provider_var.get().strip().lower()
         model = self.model_var.get().strip()
         thread = threading.Thread(
@@ -5810,17 +5488,7 @@ class GroqChatroomApp(tk.Tk):
 
         messages = self._prepare_messages(history)
         try:
-            # Monotonic clock avoids wall-clock jumps in latency stats.
-            started = time.monotonic()
-            reply_text, usage = self._chat_with_provider(provider, model, messages, is_agent=False)
-            elapsed = max(0.0, time.monotonic() - started)
-            meta = self._build_assistant_meta(
-                provider=provider,
-                model=model,
-                reply_text=reply_text,
-                usage=usage,
-                response_seconds=elapsed,
-            )
+            reply_text, meta = self._complete_with_provider(provider, model, messages, is_agent=False)
             self.event_queue.put(
                 {
                     "type": "chat_reply",
@@ -5841,6 +5509,556 @@ class GroqChatroomApp(tk.Tk):
                 }
             )
 
+    def _active_race_targets(self) -> list[tuple[str, str]]:
+        """Return the saved race pairs that can actually be dispatched right now."""
+        if not self.race_store.enabled:
+            return []
+        targets: list[tuple[str, str]] = []
+        for key in self.race_store.targets:
+            provider, model = split_pair_key(key)
+            if provider in PROVIDERS and model and self._has_key(provider):
+                targets.append((provider, model))
+        return targets if len(targets) >= 2 else []
+
+    def _request_race(
+        self,
+        history: list[dict[str, str]],
+        targets: list[tuple[str, str]],
+        chat_id: str,
+        race_id: str,
+    ) -> None:
+        """Race one chat turn across several pairs, keep the first reply, cancel the rest."""
+        messages = self._prepare_messages(history)
+        results: queue.Queue = queue.Queue()
+        tokens = [CancelToken() for _ in targets]
+        started = time.monotonic()
+        for idx, (provider, model) in enumerate(targets):
+            thread = threading.Thread(
+                target=self._race_entry,
+                args=(idx, provider, model, [dict(m) for m in messages], tokens[idx], started, results),
+                daemon=True,
+            )
+            thread.start()
+
+        outcomes: dict[str, dict[str, object]] = {}
+        errors: list[str] = []
+        winner: str | None = None
+        winner_finished = 0.0
+        margin: float | None = None
+        for _ in targets:
+            idx, reply_text, meta, error, finished = results.get()
+            provider, model = targets[idx]
+            key = pair_key(provider, model)
+            if error is None and winner is None:
+                winner = key
+                winner_finished = finished
+                outcomes[key] = {"status": "won", "seconds": meta.get("response_seconds", finished)}
+                # Abort the losers immediately so they stop generating billable tokens.
+                for other, token in enumerate(tokens):
+                    if other != idx:
+                        token.cancel()
+                meta["race_id"] = race_id
+                meta["race_winner"] = key
+                meta["race_entrants"] = len(targets)
+                self.event_queue.put(
+                    {
+                        "type": "chat_reply",
+                        "chat_id": chat_id,
+                        "message": reply_text,
+                        "provider": provider,
+                        "model": model,
+                        "meta": meta,
+                    }
+                )
+            elif error is None:
+                # A loser that finished before its cancel landed gives an exact margin.
+                outcomes[key] = {"status": "lost", "seconds": meta.get("response_seconds", finished)}
+                if margin is None:
+                    margin = max(0.0, finished - winner_finished)
+            elif tokens[idx].cancelled:
+                outcomes[key] = {"status": "cancelled", "seconds": finished}
+            else:
+                outcomes[key] = {"status": "error", "seconds": finished}
+                errors.append(f"{self._provider_model_text(provider, model)}: {error}")
+
+        if winner is None:
+            self.event_queue.put(
+                {
+                    "type": "chat_error",
+                    "chat_id": chat_id,
+                    "message": "All raced providers failed:\n" + "\n".join(errors),
+                }
+            )
+        self.race_store.record_race(winner, outcomes, margin)
+        if margin is not None:
+            self.event_queue.put(
+                {"type": "race_result", "chat_id": chat_id, "race_id": race_id, "margin_seconds": margin}
+            )
+
+    def _race_entry(
+        self,
+        index: int,
+        provider: str,
+        model: str,
+        messages: list[dict[str, str]],
+        token: CancelToken,
+        started: float,
+        results: queue.Queue,
+    ) -> None:
+        """Run one racer with its cancel token bound to this thread's HTTP calls."""
+        self.provider_client.request_local.cancel_token = token
+        try:
+            reply_text, meta = self._complete_with_provider(provider, model, messages, is_agent=False)
+            results.put((index, reply_text, meta, None, time.monotonic() - started))
+        except Exception as exc:  # noqa: BLE001
+            results.put((index, "", {}, exc, time.monotonic() - started))
+        finally:
+            self.provider_client.request_local.cancel_token = None
+
+    def _apply_race_result(self, event: dict[str, object]) -> None:
+        """Attach a late-measured race margin to the winning reply's meta."""
+        chat = next((c for c in self.chats if str(c.get("id")) == str(event.get("chat_id"))), None)
+        if chat is None:
+            return
+        messages = chat.get("messages")
+        if not isinstance(messages, list):
+            return
+        for message in reversed(messages):
+            meta = message.get("meta") if isinstance(message, dict) else None
+            if isinstance(meta, dict) and meta.get("race_id") == event.get("race_id"):
+                meta["race_margin_seconds"] = round(float(event.get("margin_seconds", 0.0)), 3)
+                self._save_conversations()
+                return
+
+    def _update_race_button(self) -> None:
+        """Reflect whether racing is active on the composer button."""
+        if getattr(self, "race_button", None) is None:
+            return
+        active = bool(self._active_race_targets())
+        self.race_button.configure(text="Race: On" if active else "Race: Off")
+
+    def open_race_dialog(self) -> None:
+        """Open race settings: the on/off switch, target pairs, and per-pair stats."""
+        candidates = self._compare_candidates()
+        dialog = tk.Toplevel(self)
+        dialog.title("Provider Race")
+        dialog.configure(bg=COLORS["panel"])
+        dialog.geometry("760x560")
+        dialog.transient(self)
+
+        tk.Label(
+            dialog,
+            text="Provider Race",
+            bg=COLORS["panel"],
+            fg=COLORS["text"],
+            font=("Segoe UI", 12, "bold"),
+        ).pack(anchor="w", padx=16, pady=(16, 2))
+        tk.Label(
+            dialog,
+            text="Each chat turn goes to every selected pair; the first reply wins and the rest are cancelled.",
+            bg=COLORS["panel"],
+            fg=COLORS["muted"],
+            font=("Segoe UI", 9),
+        ).pack(anchor="w", padx=16, pady=(0, 8))
+
+        enabled_var = tk.BooleanVar(value=self.race_store.enabled)
+        tk.Checkbutton(
+            dialog,
+            text="Race chat turns",
+            variable=enabled_var,
+            bg=COLORS["panel"],
+            fg=COLORS["text"],
+            activebackground=COLORS["panel"],
+            activeforeground=COLORS["text"],
+            selectcolor=COLORS["entry_bg"],
+            highlightthickness=0,
+            font=("Segoe UI", 9),
+        ).pack(anchor="w", padx=16)
+
+        pair_list = tk.Listbox(
+            dialog,
+            selectmode="multiple",
+            exportselection=False,
+            height=7,
+            bg=COLORS["list_bg"],
+            fg=COLORS["text"],
+            selectbackground=COLORS["button"],
+            selectforeground="#03100f",
+            highlightthickness=1,
+            highlightbackground=COLORS["border"],
+            relief="flat",
+            activestyle="none",
+            font=("Consolas", 9),
+        )
+        pair_list.pack(fill="x", padx=16, pady=(6, 8))
+        for idx, (provider, model) in enumerate(candidates):
+            pair_list.insert("end", self._provider_model_text(provider, model))
+            if pair_key(provider, model) in self.race_store.targets:
+                pair_list.selection_set(idx)
+
+        columns = ("pair", "races", "wins", "win_rate", "avg_seconds", "avg_margin")
+        stats_tree = ttk.Treeview(dialog, columns=columns, show="headings", height=8)
+        headings = {
+            "pair": ("Provider:Model", 250),
+            "races": ("Races", 60),
+            "wins": ("Wins", 60),
+            "win_rate": ("Win rate", 80),
+            "avg_seconds": ("Avg latency", 100),
+            "avg_margin": ("Avg margin", 100),
+        }
+        for column, (heading, width) in headings.items():
+            stats_tree.heading(column, text=heading)
+            stats_tree.column(column, width=width, anchor="w" if column == "pair" else "e")
+        for row in self.race_store.summary():
+            avg_seconds = row["avg_seconds"]
+            avg_margin = row["avg_margin_seconds"]
+            stats_tree.insert(
+                "",
+                "end",
+                values=(
+                    row["pair"],
+                    row["races"],
+                    row["wins"],
+                    f"{row['win_rate'] * 100:.0f}%",
+                    self._format_seconds(avg_seconds) if avg_seconds is not None else "n/a",
+                    self._format_seconds(avg_margin) if avg_margin is not None else "n/a",
+                ),
+            )
+        stats_tree.pack(fill="both", expand=True, padx=16)
+
+        def save_race_settings() -> None:
+            """Persist the race switch and selected pairs."""
+            selected = [pair_key(*candidates[int(i)]) for i in pair_list.curselection()]
+            if enabled_var.get() and len(selected) < 2:
+                messagebox.showwarning("Provider Race", "Select at least two pairs to race.", parent=dialog)
+                return
+            self.race_store.enabled = enabled_var.get()
+            self.race_store.targets = selected
+            self.race_store.save()
+            self._update_race_button()
+            dialog.destroy()
+
+        tk.Button(
+            dialog,
+            text="Save",
+            command=save_race_settings,
+            bg=COLORS["button"],
+            fg="#04100f",
+            activebackground=COLORS["button_hover"],
+            activeforeground="#04100f",
+            bd=0,
+            padx=16,
+            pady=6,
+            font=("Segoe UI", 9, "bold"),
+            cursor="hand2",
+        ).pack(anchor="e", padx=16, pady=12)
+
+    def _compare_candidates(self) -> list[tuple[str, str]]:
+        """List provider/model pairs that can be selected for compare mode."""
+        pairs: list[tuple[str, str]] = []
+        for provider in PROVIDERS:
+            if not self._has_key(provider):
+                continue
+            models = list(self.model_cache.get(provider, [])) or self._fallback_models_for_provider(provider)
+            if provider == self.provider_var.get().strip().lower():
+                current = self.model_var.get().strip()
+                if current and current != MODEL_PLACEHOLDER and current not in models:
+                    models.insert(0, current)
+            pairs.extend((provider, model) for model in models)
+        return pairs
+
+    def open_compare_dialog(self) -> None:
+        """Open the compare window that fans one prompt out to several models."""
+        chat = self._current_chat()
+        if chat is None:
+            self._create_chat()
+            chat = self._current_chat()
+        if chat is None:
+            return
+
+        candidates = self._compare_candidates()
+        if not candidates:
+            messagebox.showwarning("Compare Models", "Add an API key in Settings first.", parent=self)
+            return
+
+        dialog = tk.Toplevel(self)
+        dialog.title("Compare Models")
+        dialog.configure(bg=COLORS["panel"])
+        dialog.geometry("1100x680")
+        dialog.transient(self)
+
+        tk.Label(
+            dialog,
+            text="Compare Models",
+            bg=COLORS["panel"],
+            fg=COLORS["text"],
+            font=("Segoe UI", 12, "bold"),
+        ).pack(anchor="w", padx=16, pady=(16, 8))
+
+        setup = tk.Frame(dialog, bg=COLORS["panel"])
+        setup.pack(fill="x", padx=16)
+
+        prompt_text = tk.Text(
+            setup,
+            height=5,
+            wrap="word",
+            bg=COLORS["entry_bg"],
+            fg=COLORS["text"],
+            insertbackground=COLORS["text"],
+            highlightthickness=1,
+            highlightbackground=COLORS["border"],
+            relief="flat",
+            font=("Segoe UI", 10),
+            padx=10,
+            pady=8,
+        )
+        prompt_text.pack(side="left", fill="both", expand=True)
+        prompt_text.insert("1.0", self.input_box.get("1.0", "end-1c").strip())
+
+        pair_list = tk.Listbox(
+            setup,
+            selectmode="multiple",
+            exportselection=False,
+            height=6,
+            width=44,
+            bg=COLORS["list_bg"],
+            fg=COLORS["text"],
+            selectbackground=COLORS["button"],
+            selectforeground="#03100f",
+            highlightthickness=1,
+            highlightbackground=COLORS["border"],
+            relief="flat",
+            activestyle="none",
+            font=("Consolas", 9),
+        )
+        pair_list.pack(side="left", fill="y", padx=(10, 0))
+        current_pair = (self.provider_var.get().strip().lower(), self.model_var.get().strip())
+        for idx, (provider, model) in enumerate(candidates):
+            pair_list.insert("end", self._provider_model_text(provider, model))
+            if (provider, model) == current_pair:
+                pair_list.selection_set(idx)
+
+        info_var = tk.StringVar(value="Select two or more models, then Run.")
+        results = tk.Frame(dialog, bg=COLORS["panel"])
+
+        def run_compare() -> None:
+            """Validate the selection and dispatch the compare round."""
+            prompt = prompt_text.get("1.0", "end-1c").strip()
+            selected = [candidates[int(i)] for i in pair_list.curselection()]
+            if not prompt:
+                info_var.set("Enter a prompt to compare.")
+                return
+            if len(selected) < 2:
+                info_var.set("Select at least two provider/model pairs.")
+                return
+            run_button.configure(state="disabled")
+            self._start_compare(chat, prompt, selected, results, info_var, run_button)
+
+        footer = tk.Frame(dialog, bg=COLORS["panel"])
+        footer.pack(fill="x", padx=16, pady=(8, 8))
+        tk.Label(
+            footer,
+            textvariable=info_var,
+            bg=COLORS["panel"],
+            fg=COLORS["muted"],
+            font=("Segoe UI", 9),
+        ).pack(side="left")
+        run_button = tk.Button(
+            footer,
+            text="Run",
+            command=run_compare,
+            bg=COLORS["button"],
+            fg="#04100f",
+            activebackground=COLORS["button_hover"],
+            activeforeground="#04100f",
+            bd=0,
+            padx=16,
+            pady=6,
+            font=("Segoe UI", 9, "bold"),
+            cursor="hand2",
+        )
+        run_button.pack(side="right")
+
+        results.pack(fill="both", expand=True, padx=16, pady=(0, 16))
+
+    def _start_compare(
+        self,
+        chat: dict[str, object],
+        prompt: str,
+        pairs: list[tuple[str, str]],
+        results: tk.Frame,
+        info_var: tk.StringVar,
+        run_button: tk.Button,
+    ) -> None:
+        """Build one result column per pair and launch every request concurrently."""
+        for child in results.winfo_children():
+            child.destroy()
+
+        analyses = chat.get("response_analysis")
+        previous = [
+            int(item.get("question_index", -1))
+            for item in analyses
+            if isinstance(item, dict) and isinstance(item.get("question_index"), int)
+        ] if isinstance(analyses, list) else []
+        question_index = max(previous, default=-1) + 1
+
+        self.compare_counter += 1
+        compare_id = f"compare-{self.compare_counter}"
+        columns: list[dict[str, object]] = []
+        for idx, (provider, model) in enumerate(pairs):
+            results.grid_columnconfigure(idx, weight=1, uniform="compare")
+            column = tk.Frame(
+                results,
+                bg=COLORS["entry_bg"],
+                highlightthickness=1,
+                highlightbackground=COLORS["border"],
+            )
+            column.grid(row=0, column=idx, sticky="nsew", padx=(0 if idx == 0 else 6, 0))
+            tk.Label(
+                column,
+                text=self._provider_model_text(provider, model),
+                bg=COLORS["entry_bg"],
+                fg=COLORS["text"],
+                font=("Segoe UI", 9, "bold"),
+                wraplength=240,
+                justify="left",
+            ).pack(anchor="w", padx=8, pady=(8, 2))
+            status_var = tk.StringVar(value="Waiting...")
+            tk.Label(
+                column,
+                textvariable=status_var,
+                bg=COLORS["entry_bg"],
+                fg=COLORS["muted"],
+                font=("Consolas", 8),
+            ).pack(anchor="w", padx=8, pady=(0, 4))
+            body = tk.Text(
+                column,
+                wrap="word",
+                bg=COLORS["entry_bg"],
+                fg=COLORS["text"],
+                relief="flat",
+                highlightthickness=0,
+                font=("Segoe UI", 10),
+                padx=8,
+                pady=6,
+                state="disabled",
+            )
+            body.pack(fill="both", expand=True)
+            columns.append({"provider": provider, "model": model, "status_var": status_var, "body": body})
+        results.grid_rowconfigure(0, weight=1)
+
+        self.compare_sessions[compare_id] = {
+            "chat_id": str(chat["id"]),
+            "question_index": question_index,
+            "columns": columns,
+            "pending": len(pairs),
+            "started": time.monotonic(),
+            "info_var": info_var,
+            "run_button": run_button,
+        }
+        info_var.set(f"Waiting on {len(pairs)} models...")
+
+        messages = self._prepare_messages([{"role": "user", "content": prompt}])
+        # One thread per pair: the round takes as long as the slowest model, not the sum.
+        for idx, (provider, model) in enumerate(pairs):
+            thread = threading.Thread(
+                target=self._request_compare_reply,
+                args=(compare_id, idx, provider, model, [dict(m) for m in messages]),
+                daemon=True,
+            )
+            thread.start()
+
+    def _request_compare_reply(
+        self,
+        compare_id: str,
+        index: int,
+        provider: str,
+        model: str,
+        messages: list[dict[str, str]],
+    ) -> None:
+        """Run one compare-mode request and push the result to the UI queue."""
+        try:
+            reply_text, meta = self._complete_with_provider(provider, model, messages, is_agent=False)
+            self.event_queue.put(
+                {
+                    "type": "compare_reply",
+                    "compare_id": compare_id,
+                    "index": index,
+                    "message": reply_text,
+                    "meta": meta,
+                }
+            )
+        except Exception as exc:  # noqa: BLE001
+            self.event_queue.put(
+                {
+                    "type": "compare_error",
+                    "compare_id": compare_id,
+                    "index": index,
+                    "message": f"{self._provider_label(provider)} request failed: {exc}",
+                }
+            )
+
+    def _handle_compare_event(self, event: dict[str, object]) -> None:
+        """Render one compare result as it arrives and record it for analysis."""
+        session = self.compare_sessions.get(str(event.get("compare_id", "")))
+        if session is None:
+            return
+        columns = session["columns"]
+        index = int(event.get("index", -1))
+        if not 0 <= index < len(columns):
+            return
+        column = columns[index]
+        text = str(event.get("message", "")).strip()
+
+        if event.get("type") == "compare_reply":
+            raw_meta = event.get("meta", {})
+            meta = raw_meta if isinstance(raw_meta, dict) else {}
+            seconds = float(meta.get("response_seconds", 0.0))
+            status = f"{self._format_seconds(seconds)} · {meta.get('token_count', 0)} tok · {len(text)} chars"
+            chat = next((c for c in self.chats if str(c.get("id")) == session["chat_id"]), None)
+            if chat is not None:
+                analysis = self.response_analyzer.analyze_response(
+                    {"content": text}, str(column["model"]), str(column["provider"])
+                )
+                analysis["question_index"] = session["question_index"]
+                for key in ("response_seconds", "queue_seconds", "token_count", "token_source",
+                            "prompt_tokens", "completion_tokens", "total_tokens"):
+                    if key in meta:
+                        analysis[key] = meta[key]
+                self.response_analyzer.record_response(chat, analysis)
+        else:
+            status = "Failed"
+
+        try:
+            column["status_var"].set(status)
+            body = column["body"]
+            body.configure(state="normal")
+            body.delete("1.0", "end")
+            body.insert("1.0", text)
+            body.configure(state="disabled")
+        except tk.TclError:
+            # The compare window was closed; results are still recorded above.
+            pass
+
+        session["pending"] -= 1
+        if session["pending"] > 0:
+            return
+
+        self.compare_sessions.pop(str(event.get("compare_id", "")), None)
+        self._save_conversations()
+        wall = time.monotonic() - float(session["started"])
+        summary = f"Done in {self._format_seconds(wall)} (wall clock)"
+        chat = next((c for c in self.chats if str(c.get("id")) == session["chat_id"]), None)
+        if chat is not None:
+            comparison = self.response_analyzer.compare_responses(chat, session["question_index"])
+            if comparison.get("fastest"):
+                summary += f" · fastest: {comparison['fastest']}"
+        try:
+            session["info_var"].set(summary)
+            session["run_button"].configure(state="normal")
+        except tk.TclError:
+            pass
+
     def _path_relative_to_project(self, path: Path) -> Path | None:
         """Return the path relative to current project root when possible."""
         if self.project_root is None:
@@ -5883,66 +6101,11 @@ class GroqChatroomApp(tk.Tk):
 
     def _filter_attachment_paths_from_text(self, text: str) -> str:
         """Remove temporary attachment paths from text to prevent agent from echoing them."""
-        import re
-        
-        # Remove lines that look like temporary attachment paths
-        lines = text.split('\n')
-        filtered_lines = []
-        
-        for line in lines:
-            line_stripped = line.strip()
-            line_lower = line_stripped.lower()
-            
-            # Skip lines that look like temporary attachment paths (with or without @ prefix)
-            if ('/tmp/' in line_lower and 'ai-chat-attachment' in line_lower) or \
-               ('/tmp/' in line_lower and 'attachment' in line_lower and len(line_stripped) < 100):
-                continue
-            # Also check for paths that start with @ followed by the attachment pattern
-            if line_stripped.startswith('@') and '/tmp/' in line_lower and 'ai-chat-attachment' in line_lower:
-                continue
-            # Skip lines that look like content markers for empty files
-            if '--- Content from referenced files ---' in line or \
-               '--- End of content ---' in line:
-                continue
-            filtered_lines.append(line)
-        
-        return '\n'.join(filtered_lines)
+        return ConversationStore.filter_attachment_paths(text)
 
     def _looks_like_code(self, text: str) -> bool:
         """Heuristic to determine if text looks like code."""
-        # Count lines that look like code vs prose
-        lines = text.split('\n')
-        code_lines = 0
-        total_lines = len([line for line in lines if line.strip()])
-        
-        if total_lines == 0:
-            return False
-        
-        for line in lines:
-            stripped = line.strip()
-            if (stripped.startswith('def ') or 
-                stripped.startswith('class ') or 
-                stripped.startswith('import ') or 
-                stripped.startswith('from ') or 
-                stripped.startswith('function ') or 
-                stripped.startswith('<') or  # HTML
-                ':' in stripped and '{' in stripped or  # CSS
-                '=' in stripped or  # Assignment
-                stripped.endswith(':') or  # Function/class definitions
-                stripped.startswith('return ') or  # Return statements
-                stripped.startswith('if ') or  # Conditional statements
-                stripped.startswith('for ') or  # Loop statements
-                stripped.startswith('while ') or  # Loop statements
-                stripped.startswith('try:') or  # Try statements
-                stripped.startswith('except ') or  # Except statements
-                stripped.startswith('with ') or  # With statements
-                line.startswith('    ') or  # Indented code
-                line.startswith('\t') or  # Tab-indented code
-                stripped.count('(') > 0 and stripped.count(')') > 0):  # Function calls
-                code_lines += 1
-        
-        # If more than half the lines look like code, treat as code
-        return (code_lines / total_lines) > 0.5
+        return AgentExecutor.looks_like_code(text)
 
     def _update_project_label(self) -> None:
         """Update the sidebar label showing the current project folder."""
@@ -5993,71 +6156,490 @@ class GroqChatroomApp(tk.Tk):
         self.open_file_in_editor(path)
         self._refresh_project_file_list(select_current=True)
 
-    def _iter_project_files(self) -> list[Path]:
-        """Collect visible project files while skipping ignored directories."""
-        files: list[Path] = []
-        if self.project_root is None:
-            return files
-        if not self.project_root.exists() or not self.project_root.is_dir():
-            return files
-        for path in self.project_root.rglob("*"):
-            if not path.is_file():
-                continue
-            rel_parts = path.relative_to(self.project_root).parts
-            if any(part in IGNORED_DIRS for part in rel_parts):
+    def _refresh_project_file_list(self, select_current: bool = False) -> None:
+        """Bring the project file list up to date.
+
+        The scan runs on the project index thread; its result arrives as a
+        project_index event, so this returns at once even for huge folders.
+        """
+        if select_current:
+            self.ide_select_current_pending = True
+        root = self.project_root
+        if root is None or not root.is_dir():
+            if self.project_index_poller is not None:
+                self.project_index_poller.stop()
+            self.project_index = None
+            self.project_index_poller = None
+            self._set_symbol_index(None)
+            self._reset_project_file_rows([])
+            return
+        if self.project_index is not None and self.project_index.root == root:
+            self.project_index_poller.wake()
+            return
+        if self.project_index_poller is not None:
+            self.project_index_poller.stop()
+        self.project_index = ProjectIndex(root, IGNORED_DIRS)
+        self.fuzzy_index = FuzzyFileIndex()
+        self._set_symbol_index(SymbolIndex(root, self.event_queue.put))
+        self.project_index_poller = ProjectIndexPoller(
+            self.project_index,
+            self.event_queue.put,
+            PROJECT_POLL_SECONDS,
+            on_files=self.fuzzy_index.apply,
+        )
+        self.project_index_poller.start()
+
+    def _reset_project_file_rows(self, rel_paths: list[str]) -> None:
+        """Replace every file row; used for the first scan and for very large diffs."""
+        root = self.project_index.root if self.project_index is not None else None
+        self.ide_file_keys = [sort_key(rel) for rel in rel_paths]
+        self.ide_files = [root / rel for rel in rel_paths] if root is not None else []
+        self.file_listbox.delete(0, "end")
+        if rel_paths:
+            self.file_listbox.insert("end", *(rel.replace("/", os.sep) for rel in rel_paths))
+
+    def _apply_project_index_event(self, event: dict[str, object]) -> None:
+        """Patch the file list with an index diff, touching only the rows that changed."""
+        if event.get("index") is not self.project_index:
+            return
+        root = self.project_index.root
+        if "files" in event:
+            self.fuzzy_index.building = False
+            self._reset_project_file_rows(event["files"])
+            if self.symbol_index is not None:
+                self.symbol_index.update([str(root / rel) for rel in event["files"] if rel.endswith(".py")])
+        else:
+            added: list[str] = event["added"]
+            removed: list[str] = event["removed"]
+            if self.symbol_index is not None and (added or removed):
+                self.symbol_index.refresh(
+                    [str(root / rel) for rel in added if rel.endswith(".py")],
+                    [str(root / rel) for rel in removed if rel.endswith(".py")],
+                )
+            if len(added) + len(removed) > PROJECT_DIFF_REBUILD_ROWS:
+                current = {key[1] for key in self.ide_file_keys}
+                current.difference_update(removed)
+                current.update(added)
+                self._reset_project_file_rows(sorted(current, key=sort_key))
+            else:
+                for rel in removed:
+                    key = sort_key(rel)
+                    idx = bisect.bisect_left(self.ide_file_keys, key)
+                    if idx < len(self.ide_file_keys) and self.ide_file_keys[idx] == key:
+                        del self.ide_file_keys[idx]
+                        del self.ide_files[idx]
+                        self.file_listbox.delete(idx)
+                for rel in added:
+                    key = sort_key(rel)
+                    idx = bisect.bisect_left(self.ide_file_keys, key)
+                    if idx < len(self.ide_file_keys) and self.ide_file_keys[idx] == key:
+                        continue
+                    self.ide_file_keys.insert(idx, key)
+                    self.ide_files.insert(idx, root / rel)
+                    self.file_listbox.insert(idx, rel.replace("/", os.sep))
+
+        if self.ide_select_current_pending:
+            self.ide_select_current_pending = False
+            self._select_current_file_row()
+
+    def _select_current_file_row(self) -> None:
+        """Highlight the open file in the project list, if it is part of the project."""
+        if self.ide_current_file is None or self.project_index is None:
+            return
+        rel = self._path_relative_to_project(self.ide_current_file)
+        if rel is None:
+            return
+        key = sort_key(rel.as_posix())
+        idx = bisect.bisect_left(self.ide_file_keys, key)
+        if idx < len(self.ide_file_keys) and self.ide_file_keys[idx] == key:
+            self.file_listbox.selection_clear(0, "end")
+            self.file_listbox.selection_set(idx)
+            self.file_listbox.activate(idx)
+            self.file_listbox.see(idx)
+
+    def _on_file_selected(self, _event: tk.Event) -> None:
+        """Handle the file selected event."""
+        selection = self.file_listbox.curselection()
+        if not selection:
+            return
+        index = int(selection[0])
+        if index < 0 or index >= len(self.ide_files):
+            return
+        self.open_file_in_editor(self.ide_files[index])
+
+    def open_file_in_editor(self, path: Path, line: int | None = None, reload: bool = False) -> None:
+        """Load a file into the IDE editor and update file status indicators.
+
+        A file whose tab is still in the buffer cache comes back from memory,
+        with its unsaved edits, highlighting, cursor and scroll, unless it is
+        a clean buffer of a file that has since changed on disk. `reload`
+        always reads from disk, dropping unsaved edits.
+
+        Small files are read inline. Larger ones are read on a worker thread and
+        streamed into the editor in chunks, with the editor read-only until the
+        last chunk lands. The cursor goes to `line` once loading finishes.
+        """
+        if not reload and path == self.ide_current_file and self._ide_buffer_is_current():
+            if line:
+                self._goto_ide_line(line)
+            return
+        buffer = self.ide_buffers.pop(path)
+        if buffer is not None and not reload and (buffer.dirty or buffer.is_current()):
+            self._stash_ide_buffer()
+            self._restore_ide_buffer(buffer, line)
+            return
+
+        try:
+            size = path.stat().st_size
+        except OSError as exc:
+            self.ide_status_var.set(f"Open failed: {exc}")
+            return
+
+        if path != self.ide_current_file:
+            self._stash_ide_buffer()
+        if path not in self.ide_open_tabs:
+            self.ide_open_tabs.append(path)
+        self._cancel_ide_file_load()
+        self.ide_pending_goto_line = line
+        token = self.ide_load_token
+        self._ide_loading = True
+        self.ide_editor.delete("1.0", "end")
+        self._ide_loading = False
+        self._set_ide_read_only(True)
+
+        self.ide_current_file = path
+        self.ide_dirty = False
+        self.ide_buffer_stamp = None
+        self.ide_buffer_complete = False
+        self._draw_outline()
+        self._refresh_file_symbols(path)
+        shown = self._display_path(path)
+        self.ide_file_var.set(shown)
+        self.ide_tab_title_var.set(shown)
+        self._draw_ide_tabs()
+
+        def read() -> dict[str, object]:
+            try:
+                result = read_for_editor(path, IDE_MAX_OPEN_BYTES)
+            except OSError as exc:
+                return {"type": "ide_file_read", "token": token, "path": path, "error": str(exc)}
+            if not result["truncated"]:
+                self.file_saver.remember(path, result["data"], result["newline"])
+            result.update({"type": "ide_file_read", "token": token, "path": path})
+            return result
+
+        if size <= IDE_LOAD_ASYNC_BYTES:
+            self._handle_ide_file_read(read())
+            return
+        self.ide_status_var.set(f"Reading {shown} ({size / (1 << 20):.1f} MB)...")
+        threading.Thread(target=lambda: self.event_queue.put(read()), daemon=True).start()
+
+    def _ide_buffer_is_current(self) -> bool:
+        """Whether the editor holds the whole file, with unsaved edits or exactly as it is on disk."""
+        if not self.ide_buffer_complete or self.ide_current_file is None:
+            return False
+        return self.ide_dirty or (
+            self.ide_buffer_stamp is not None and disk_stamp(self.ide_current_file) == self.ide_buffer_stamp
+        )
+
+    def _ide_text_version(self) -> int:
+        """The edit version naming the editor's text; a restored, unedited buffer keeps its cached version."""
+        restored = self.ide_restored_version
+        if restored is not None and restored[1] == self.ide_edit_version:
+            return restored[0]
+        return self.ide_edit_version
+
+    def _stash_ide_buffer(self) -> None:
+        """Move the editor's buffer into the cache before another file replaces it.
+
+        Only complete buffers of files with an open tab are kept. A pending
+        autosave is dropped rather than run, so unsaved edits stay unsaved,
+        and marked on the tab, until they are saved or the tab is closed.
+        The scratch buffer is discarded, along with its AI edit history.
+        """
+        path = self.ide_current_file
+        if path is None:
+            self._drop_scratch_ai_edits()
+            return
+        if path not in self.ide_open_tabs or not self.ide_buffer_complete:
+            return
+        if self.ide_autosave_job_id is not None:
+            try:
+                self.after_cancel(self.ide_autosave_job_id)
+            except tk.TclError:
+                pass
+            self.ide_autosave_job_id = None
+        cache = self.ide_highlight_cache
+        if self.ide_paint_queue:
+            # Lexed but not painted yet; re-lex those lines when the buffer comes back.
+            cache.invalidate_from(min(start for _, start, _ in self.ide_paint_queue))
+            self.ide_paint_queue.clear()
+        editor = self.ide_editor
+        self.ide_buffers.put(
+            EditorBuffer(
+                path,
+                editor.get("1.0", "end-1c"),
+                self.ide_dirty,
+                self._ide_text_version(),
+                self.ide_read_only,
+                self.ide_buffer_stamp,
+                editor.index("insert"),
+                editor.yview()[0],
+                {tag: editor.tag_ranges(tag) for tag in SYNTAX_TAGS},
+                cache,
+                self.ide_painted_chunks,
+                self.ide_lexer,
+            )
+        )
+        self.ide_highlight_cache = LineStateCache()
+        self.ide_painted_chunks = set()
+
+    def _restore_ide_buffer(self, buffer: EditorBuffer, line: int | None = None) -> None:
+        """Put a cached buffer back in the editor with its tags, highlighter state, cursor and scroll."""
+        self._cancel_ide_file_load()
+        editor = self.ide_editor
+        self._ide_loading = True
+        editor.delete("1.0", "end")
+        editor.insert("1.0", buffer.text)
+        self._ide_loading = False
+        # Restoring is not an undoable edit; Tk's undo stack cannot be carried between files.
+        editor.edit_reset()
+        for tag, ranges in buffer.tags.items():
+            if ranges:
+                editor.tag_add(tag, *ranges)
+        # The insert above went through the edit hook, which bumped the version; the
+        # cached states describe exactly this text, so they replace what the hook spliced.
+        self.ide_lexer = buffer.lexer
+        self.ide_highlight_cache = buffer.highlight
+        self.ide_restored_version = (buffer.version, self.ide_edit_version)
+        self.ide_painted_chunks = buffer.painted
+        self.ide_paint_queue.clear()
+        self._set_ide_read_only(buffer.read_only)
+        self.ide_pending_goto_line = None
+
+        path = buffer.path
+        self.ide_current_file = path
+        self.ide_dirty = buffer.dirty
+        self.ide_buffer_stamp = buffer.stamp
+        self.ide_buffer_complete = True
+        if path not in self.ide_open_tabs:
+            self.ide_open_tabs.append(path)
+        if line:
+            editor.mark_set("insert", f"{line}.0")
+            editor.see(f"{line}.0")
+        else:
+            editor.mark_set("insert", buffer.insert)
+            editor.yview_moveto(buffer.yview)
+
+        shown = self._display_path(path)
+        title = f"{shown} *" if buffer.dirty else shown
+        self.ide_file_var.set(title)
+        self.ide_tab_title_var.set(title)
+        if buffer.dirty and not buffer.is_current():
+            self.ide_status_var.set(f"{shown} has unsaved edits; saving will overwrite the copy on disk")
+        else:
+            self.ide_status_var.set(f"Switched to {shown}")
+        self._draw_ide_tabs()
+        self._draw_outline()
+        self._refresh_ide_line_numbers()
+        self._update_ide_cursor_position()
+        if not buffer.highlight.is_clean():
+            self._schedule_ide_syntax_highlight(delay_ms=10)
+        self._schedule_ide_viewport_highlight()
+        if self.ide_kind_var.get() == "web":
+            self._schedule_browser_update(delay_ms=100)
+
+    def _draw_ide_tabs(self) -> None:
+        """Rebuild the editor tab strip: one tab per open file, plus the scratch buffer when it is showing."""
+        if not hasattr(self, "ide_tabs_frame"):
+            return
+        for widget in self.ide_tabs_frame.winfo_children():
+            widget.destroy()
+        current = self.ide_current_file
+        paths: list[Path | None] = list(self.ide_open_tabs)
+        if current not in self.ide_open_tabs:
+            paths.append(current)
+        for path in paths:
+            active = path == current
+            bg = COLORS["entry_bg"] if active else "#0b1322"
+            tab = tk.Frame(
+                self.ide_tabs_frame,
+                bg=bg,
+                highlightthickness=1,
+                highlightbackground=COLORS["border"] if active else "#0b1322",
+            )
+            tab.pack(side="left", padx=(0, 2))
+            if active:
+                label = tk.Label(
+                    tab,
+                    textvariable=self.ide_tab_title_var,
+                    bg=bg,
+                    fg=COLORS["text"],
+                    font=("Consolas", 9, "bold"),
+                    padx=10,
+                    pady=6,
+                )
+            else:
+                buffer = self.ide_buffers.peek(path)
+                label = tk.Label(
+                    tab,
+                    text=f"{path.name} *" if buffer is not None and buffer.dirty else path.name,
+                    bg=bg,
+                    fg=COLORS["muted"],
+                    font=("Consolas", 9),
+                    padx=10,
+                    pady=6,
+                    cursor="hand2",
+                )
+                label.bind("<Button-1>", lambda _event, target=path: self.open_file_in_editor(target))
+            label.pack(side="left")
+            if path is None:
                 continue
-            files.append(path)
-        files.sort(key=lambda p: str(p.relative_to(self.project_root)).lower())
-        return files
+            label.bind("<Button-2>", lambda _event, target=path: self.close_ide_tab(target))
+            close = tk.Label(
+                tab,
+                text="\u00d7",
+                bg=bg,
+                fg=COLORS["muted"],
+                font=("Segoe UI", 9),
+                cursor="hand2",
+            )
+            close.pack(side="left", padx=(0, 6))
+            close.bind("<Button-1>", lambda _event, target=path: self.close_ide_tab(target))
 
-    def _refresh_project_file_list(self, select_current: bool = False) -> None:
-        """Refresh project file list to match current state."""
-        self.ide_files = self._iter_project_files()
-        self.file_listbox.delete(0, "end")
-        selected_idx = None
+    def close_ide_tab(self, path: Path) -> None:
+        """Close a file's tab, offering to save unsaved edits first.
 
-        for idx, path in enumerate(self.ide_files):
-            self.file_listbox.insert("end", self._display_path(path))
-            if select_current and self.ide_current_file is not None and path == self.ide_current_file:
-                selected_idx = idx
+        Closing the tab in the editor switches to the most recently used
+        remaining tab, or back to a scratch buffer when none is left.
+        """
+        active = path == self.ide_current_file
+        buffer = None if active else self.ide_buffers.peek(path)
+        dirty = self.ide_dirty if active else buffer is not None and buffer.dirty
+        if dirty:
+            answer = messagebox.askyesnocancel(
+                "Unsaved Changes", f"Save changes to {path.name} before closing?", parent=self
+            )
+            if answer is None:
+                return
+            if answer:
+                text = self.ide_editor.get("1.0", "end-1c") if active else buffer.text
+                try:
+                    self.file_saver.write(path, text)
+                except OSError as exc:
+                    self.ide_status_var.set(f"Save failed: {exc}")
+                    return
+        if path in self.ide_open_tabs:
+            self.ide_open_tabs.remove(path)
+        self.ide_buffers.pop(path)
+        if not active:
+            self._draw_ide_tabs()
+            return
 
-        if selected_idx is not None:
-            self.file_listbox.selection_clear(0, "end")
-            self.file_listbox.selection_set(selected_idx)
-            self.file_listbox.activate(selected_idx)
+        self.ide_dirty = False
+        following = self.ide_buffers.most_recent(self.ide_open_tabs)
+        if following is None and self.ide_open_tabs:
+            following = self.ide_open_tabs[-1]
+        if following is not None:
+            self.open_file_in_editor(following)
+        if self.ide_current_file == path:
+            # Nothing left to show, or the next tab's file could not be opened.
+            self._apply_scratch_template_for_kind(self.ide_kind_var.get(), force=True)
+
+    def _save_dirty_ide_buffers_before_close(self) -> bool:
+        """Offer to save every tab with unsaved edits; False means the user cancelled closing."""
+        pending = [(buffer.path, buffer.text) for buffer in self.ide_buffers.dirty()]
+        if self.ide_dirty and self.ide_current_file is not None and not self.ide_read_only:
+            pending.append((self.ide_current_file, self.ide_editor.get("1.0", "end-1c")))
+        if not pending:
+            return True
+        names = "\n".join(self._display_path(path) for path, _ in pending)
+        answer = messagebox.askyesnocancel("Unsaved Changes", f"Save changes before closing?\n\n{names}", parent=self)
+        if answer is None:
+            return False
+        if answer:
+            for path, text in pending:
+                try:
+                    self.file_saver.write(path, text)
+                except OSError as exc:
+                    messagebox.showerror("Save Failed", f"{self._display_path(path)}: {exc}", parent=self)
+                    return False
+        return True
+
+    def _set_ide_read_only(self, read_only: bool) -> None:
+        self.ide_read_only = read_only
+        self.ide_editor.configure(state="disabled" if read_only else "normal")
+
+    def _cancel_ide_file_load(self) -> None:
+        """Stop any in-progress open so its remaining chunks never reach the editor."""
+        self.ide_load_token += 1
+        if self.ide_load_job_id is not None:
+            try:
+                self.after_cancel(self.ide_load_job_id)
+            except tk.TclError:
+                pass
+            self.ide_load_job_id = None
+        if self.ide_read_only:
+            self._set_ide_read_only(False)
 
-    def _on_file_selected(self, _event: tk.Event) -> None:
-        """Handle the file selected event."""
-        selection = self.file_listbox.curselection()
-        if not selection:
+    def _handle_ide_file_read(self, event: dict[str, object]) -> None:
+        """Start inserting a finished read, unless another file was opened meanwhile."""
+        if event.get("token") != self.ide_load_token:
             return
-        index = int(selection[0])
-        if index < 0 or index >= len(self.ide_files):
+        path = event["path"]
+        if event.get("error"):
+            self._set_ide_read_only(False)
+            if path in self.ide_open_tabs:
+                self.ide_open_tabs.remove(path)
+            self.ide_current_file = None
+            self.ide_buffer_complete = True
+            self.ide_file_var.set("No file selected")
+            self.ide_tab_title_var.set(self._default_scratch_filename_for_kind())
+            self.ide_status_var.set(f"Open failed: {event['error']}")
+            self._draw_ide_tabs()
             return
-        self.open_file_in_editor(self.ide_files[index])
+        self._insert_ide_file_chunk(event, 0)
 
-    def open_file_in_editor(self, path: Path) -> None:
-        """Load a file into the IDE editor and update file status indicators."""
-        try:
-            try:
-                content = path.read_text(encoding="utf-8")
-            except UnicodeDecodeError:
-                content = path.read_text(encoding="utf-8", errors="replace")
-        except OSError as exc:
-            self.ide_status_var.set(f"Open failed: {exc}")
+    def _insert_ide_file_chunk(self, event: dict[str, object], offset: int) -> None:
+        """Insert the next slice of a loaded file, then yield to Tk before the following one."""
+        self.ide_load_job_id = None
+        if event.get("token") != self.ide_load_token:
             return
-
+        text = event["text"]
+        end = min(len(text), offset + IDE_LOAD_CHUNK_CHARS)
         self._ide_loading = True
-        self.ide_editor.delete("1.0", "end")
-        self.ide_editor.insert("1.0", content)
+        self.ide_editor.configure(state="normal")
+        self.ide_editor.insert("end-1c", text[offset:end])
+        self.ide_editor.configure(state="disabled")
         self._ide_loading = False
+        shown = self._display_path(event["path"])
+        if end < len(text):
+            self.ide_status_var.set(f"Loading {shown}... {end * 100 // len(text)}%")
+            self.ide_load_job_id = self.after(1, self._insert_ide_file_chunk, event, end)
+            return
 
-        self.ide_current_file = path
-        self.ide_dirty = False
-        shown = self._display_path(path)
-        self.ide_file_var.set(shown)
-        self.ide_tab_title_var.set(shown)
-        self.ide_status_var.set(f"Loaded {shown}")
+        size = int(event["size"])
+        read_only = bool(event["truncated"]) or size > IDE_READ_ONLY_BYTES
+        self._set_ide_read_only(read_only)
+        self.ide_buffer_stamp = (int(event["mtime_ns"]), size)
+        self.ide_buffer_complete = True
+        # Loading is not an undoable edit, and the undo stack would otherwise hold the whole file.
+        self.ide_editor.edit_reset()
+        target = f"{self.ide_pending_goto_line}.0" if self.ide_pending_goto_line else "1.0"
+        self.ide_pending_goto_line = None
+        self.ide_editor.mark_set("insert", target)
+        self.ide_editor.see(target)
+        if event["truncated"]:
+            self.ide_status_var.set(
+                f"Opened {shown} read-only: showing the first {IDE_MAX_OPEN_BYTES >> 20} MB "
+                f"of {size / (1 << 20):.1f} MB (IDE_MAX_OPEN_MB)"
+            )
+        elif read_only:
+            self.ide_status_var.set(
+                f"Opened {shown} read-only ({size / (1 << 20):.1f} MB is over IDE_READ_ONLY_MB)"
+            )
+        else:
+            self.ide_status_var.set(f"Loaded {shown}")
         self._refresh_ide_line_numbers()
         self._update_ide_cursor_position()
         self._schedule_ide_syntax_highlight(delay_ms=10)
@@ -6065,29 +6647,54 @@ class GroqChatroomApp(tk.Tk):
     def _on_ide_editor_scrollbar(self, *args: str) -> None:
         """Scroll editor and line-number gutter together from scrollbar input."""
         self.ide_editor.yview(*args)
-        self.ide_line_numbers.yview(*args)
 
     def _on_ide_editor_yscroll(self, first: str, last: str) -> None:
         """Synchronize line-number gutter and scrollbar with editor scroll."""
         self.ide_editor_scroll.set(first, last)
-        self.ide_line_numbers.yview_moveto(float(first))
+        self._refresh_ide_line_numbers()
+        self._schedule_ide_viewport_highlight()
 
     def _refresh_ide_line_numbers(self) -> None:
-        """Refresh visible line numbers in the editor gutter."""
-        if not hasattr(self, "ide_line_numbers"):
+        """Redraw the line-number gutter once the pending edits and scrolls have settled."""
+        if self.ide_gutter_job_id is None and hasattr(self, "ide_line_numbers"):
+            self.ide_gutter_job_id = self.after_idle(self._draw_ide_line_numbers)
+
+    def _ide_gutter_width(self, line_count: int) -> int:
+        """Pixel width that fits the widest line number, at least four digits."""
+        return self.ide_gutter_font.measure("0" * max(4, len(str(line_count)))) + 14
+
+    def _draw_ide_line_numbers(self) -> None:
+        """Draw numbers for the editor lines currently on screen, using dlineinfo for placement."""
+        self.ide_gutter_job_id = None
+        if not hasattr(self, "ide_editor"):
             return
+        gutter = self.ide_line_numbers
         line_count = int(self.ide_editor.index("end-1c").split(".")[0])
-        if line_count == self.ide_line_count:
-            return
-        first_view = self.ide_editor.yview()[0]
+        if len(str(line_count)) != len(str(self.ide_line_count or 1)):
+            gutter.configure(width=self._ide_gutter_width(line_count))
         self.ide_line_count = line_count
 
-        lines = "\n".join(str(num) for num in range(1, line_count + 1))
-        self.ide_line_numbers.configure(state="normal")
-        self.ide_line_numbers.delete("1.0", "end")
-        self.ide_line_numbers.insert("1.0", lines)
-        self.ide_line_numbers.configure(state="disabled")
-        self.ide_line_numbers.yview_moveto(first_view)
+        gutter.delete("all")
+        right = int(gutter.cget("width")) - 6
+        index = self.ide_editor.index("@0,0")
+        while True:
+            info = self.ide_editor.dlineinfo(index)
+            if info is None:
+                break
+            _x, y, _width, height, _baseline = info
+            number = index.split(".")[0]
+            gutter.create_text(
+                right,
+                y + height // 2,
+                anchor="e",
+                text=number,
+                fill="#6b7f9a",
+                font=self.ide_gutter_font,
+            )
+            next_index = self.ide_editor.index(f"{number}.0+1line")
+            if next_index.split(".")[0] == number:
+                break
+            index = next_index
 
     def _update_ide_cursor_position(self, _event: tk.Event | None = None) -> None:
         """Update status bar cursor position (`Ln`, `Col`) for the active editor."""
@@ -6131,22 +6738,39 @@ class GroqChatroomApp(tk.Tk):
         self.ide_autosave_job_id = None
 
         # Only autosave if file is dirty and user has a file open
-        if not self.ide_dirty or self.ide_current_file is None:
+        if not self.ide_dirty or self.ide_current_file is None or self.ide_read_only:
             return
 
-        try:
-            content = self.ide_editor.get("1.0", "end-1c")
-            self.ide_current_file.write_text(content, encoding="utf-8")
+        content = self.ide_editor.get("1.0", "end-1c")
+        self.file_saver.save(self.ide_current_file, content, self._ide_text_version(), reason="autosave")
 
-            # Update UI to show file is saved
+    def _handle_ide_saved(self, event: dict[str, object]) -> None:
+        """Apply a finished background save; the buffer is clean only if unedited since the snapshot."""
+        path = event.get("path")
+        shown = self._display_path(path)
+        error = event.get("error")
+        if error:
+            # Autosave failures stay quiet; an explicit save reports them.
+            if event.get("reason") != "autosave":
+                self.ide_status_var.set(f"Save failed: {error}")
+            return
+        if not event.get("skipped"):
+            self._refresh_file_symbols(path)
+        if path != self.ide_current_file:
+            # A save that finished after its tab was switched away from.
+            self.ide_buffers.mark_saved(path, event.get("version"))
+            self._draw_ide_tabs()
+            return
+        if event.get("version") == self._ide_text_version():
             self.ide_dirty = False
-            shown = self._display_path(self.ide_current_file)
+            self.ide_buffer_stamp = disk_stamp(path)
             self.ide_file_var.set(shown)
             self.ide_tab_title_var.set(shown)
-            self.ide_status_var.set(f"Autosaved {shown}")
-        except OSError:
-            # Silently fail on autosave errors - don't interrupt user
-            pass
+        if event.get("reason") == "autosave":
+            if not event.get("skipped"):
+                self.ide_status_var.set(f"Autosaved {shown}")
+        else:
+            self.ide_status_var.set(f"Saved {shown}")
 
     def _ide_save_as(self) -> None:
         """Open a 'Save As' dialog to save the current editor content to a new file."""
@@ -6181,12 +6805,21 @@ class GroqChatroomApp(tk.Tk):
 
         try:
             path = Path(filepath)
-            path.parent.mkdir(parents=True, exist_ok=True)
-            path.write_text(content, encoding="utf-8")
+            atomic_write(path, content.encode("utf-8"))
 
-            # Update IDE state to reflect the new file
+            # Update IDE state to reflect the new file; its tab takes the place of the old one.
+            tabs = [tab for tab in self.ide_open_tabs if tab != path]
+            if self.ide_current_file in tabs:
+                tabs[tabs.index(self.ide_current_file)] = path
+            else:
+                tabs.append(path)
+            self.ide_open_tabs = tabs
+            self.ide_buffers.pop(path)
             self.ide_current_file = path
             self.ide_dirty = False
+            self.ide_buffer_stamp = disk_stamp(path)
+            self.ide_buffer_complete = True
+            self._draw_ide_tabs()
 
             shown = self._display_path(path)
             self.ide_file_var.set(shown)
@@ -6198,94 +6831,258 @@ class GroqChatroomApp(tk.Tk):
         except OSError as e:
             self.ide_status_var.set(f"Save failed: {e}")
 
-    def _tag_ide_token(self, tag: str, start: tuple[int, int], end: tuple[int, int]) -> None:
-        """Apply a syntax tag to a token range inside the editor."""
-        start_line, start_col = start
-        end_line, end_col = end
-        if start_line <= 0 or end_line <= 0:
+    def _install_ide_edit_hook(self) -> None:
+        """Route the editor's insert/delete through Python to track which lines changed.
+
+        Same technique as IDLE's WidgetRedirector: the Tk widget command is
+        renamed and replaced, so every edit (typing, paste, programmatic
+        inserts) reports its line range before the highlighter runs.
+        """
+        widget = self.ide_editor
+        original = widget._w + "_orig"
+        self.tk.call("rename", widget._w, original)
+
+        def line_of(index: str) -> int:
+            return int(str(self.tk.call(original, "index", index)).split(".")[0])
+
+        def dispatch(operation: str, *args: str) -> object:
+            edit: tuple[int, int, int] | None = None
+            try:
+                if operation in {"insert", "delete", "replace"} and str(
+                    self.tk.call(original, "cget", "-state")
+                ) == "disabled":
+                    # A disabled Text ignores edits, so there is no change to track.
+                    pass
+                elif operation == "insert" and args:
+                    last_line = line_of("end-1c")
+                    added = sum(str(chunk).count("\n") for chunk in args[1::2])
+                    edit = (min(line_of(args[0]), last_line), 0, added)
+                elif operation in {"delete", "replace"} and args:
+                    last_line = line_of("end-1c")
+                    first = min(line_of(args[0]), last_line)
+                    end_index = args[1] if len(args) > 1 else f"{args[0]}+1c"
+                    removed = max(0, min(line_of(end_index), last_line) - first)
+                    added = sum(str(chunk).count("\n") for chunk in args[2::2]) if operation == "replace" else 0
+                    edit = (first, removed, added)
+                result = self.tk.call((original, operation) + args)
+            except tk.TclError:
+                return ""
+            if edit is not None:
+                self.ide_edit_version += 1
+                self.ide_highlight_cache.splice(*edit)
+                self._forget_ide_painted_from(edit[0])
+                if edit[1] != edit[2]:
+                    self._refresh_ide_line_numbers()
+            elif operation == "edit" and args and args[0] in {"undo", "redo"}:
+                # Tk replays undo internally without exposing the range; re-lex everything.
+                self.ide_edit_version += 1
+                self.ide_highlight_cache.reset(line_of("end-1c"))
+                self.ide_painted_chunks.clear()
+            return result
+
+        self.tk.createcommand(widget._w, dispatch)
+
+    def _ide_highlight_is_lazy(self) -> bool:
+        """Whether the buffer is large enough to paint only what is on screen."""
+        return len(self.ide_highlight_cache.states) > IDE_HIGHLIGHT_LAZY_LINES
+
+    def _forget_ide_painted_from(self, line: int) -> None:
+        """Drop painted-chunk records at and below an edited line; their tags may be stale."""
+        first_chunk = (max(1, line) - 1) // IDE_HIGHLIGHT_CHUNK_LINES
+        self.ide_painted_chunks = {chunk for chunk in self.ide_painted_chunks if chunk < first_chunk}
+
+    def _schedule_ide_viewport_highlight(self) -> None:
+        """Coalesce scroll events into one viewport paint per idle cycle."""
+        if self.ide_viewport_job_id is None and self._ide_highlight_is_lazy():
+            self.ide_viewport_job_id = self.after_idle(self._extend_ide_highlight_viewport)
+
+    def _extend_ide_highlight_viewport(self) -> None:
+        """Paint unpainted chunks around the visible lines of a huge buffer.
+
+        Only chunks whose start state is already known are painted; lexing a
+        chunk from a correct start state gives correct colors even if later
+        lines are still dirty. Chunks further down are painted when the
+        background lexer reaches them.
+        """
+        self.ide_viewport_job_id = None
+        if not hasattr(self, "ide_editor") or not self._ide_highlight_is_lazy():
             return
-        if (start_line, start_col) >= (end_line, end_col):
+
+        cache = self.ide_highlight_cache
+        line_count = len(cache.states)
+        top = int(self.ide_editor.index("@0,0").split(".")[0])
+        bottom = int(self.ide_editor.index(f"@0,{self.ide_editor.winfo_height()}").split(".")[0])
+        low = max(1, top - IDE_HIGHLIGHT_VIEWPORT_MARGIN)
+        high = min(line_count, bottom + IDE_HIGHLIGHT_VIEWPORT_MARGIN)
+
+        for chunk in range((low - 1) // IDE_HIGHLIGHT_CHUNK_LINES, (high - 1) // IDE_HIGHLIGHT_CHUNK_LINES + 1):
+            if chunk in self.ide_painted_chunks:
+                continue
+            start = chunk * IDE_HIGHLIGHT_CHUNK_LINES + 1
+            if not cache.is_clean() and start > cache.dirty_from:
+                break
+            end = min(line_count, start + IDE_HIGHLIGHT_CHUNK_LINES - 1)
+            # A few hundred lines at most, so this stays on the Tk thread to avoid a queue round-trip per scroll.
+            lines = self.ide_editor.get(f"{start}.0", f"{end}.end").split("\n")
+            state = cache.start_state(start)
+            tokens: list[list] = []
+            for number, text in enumerate(lines, start=start):
+                known = cache.states[number - 1] if number < cache.dirty_from else LineStateCache.STALE
+                if len(text) > LONG_LINE_CHARS and known is not LineStateCache.STALE:
+                    # Minified lines stay unpainted anyway; reuse their cached end state instead of lexing on the Tk thread.
+                    tokens.append([])
+                    state = known
+                    continue
+                line_tokens, state = self.ide_lexer.lex_line(text, state)
+                tokens.append(line_tokens if len(text) <= LONG_LINE_CHARS else [])
+            for tag in SYNTAX_TAGS:
+                self.ide_editor.tag_remove(tag, f"{start}.0", f"{end}.end")
+            for tag, indexes in group_ranges(start, tokens).items():
+                self.ide_editor.tag_add(tag, *indexes)
+            self.ide_painted_chunks.add(chunk)
+
+    def _sync_ide_lexer(self, line_count: int) -> None:
+        """Switch lexers when the editor language changes and re-lex from scratch.
+
+        Cached end states belong to the lexer that produced them, so they are
+        dropped, along with any painted or in-flight results.
+        """
+        language = self._ide_language_for_path()
+        if language == self.ide_lexer.name:
             return
-        self.ide_editor.tag_add(tag, f"{start_line}.{start_col}", f"{end_line}.{end_col}")
+        lexer = self.ide_lexers.get(language)
+        if lexer is None:
+            lexer = lexer_for_language(language)
+            self.ide_lexers[language] = lexer
+        self.ide_lexer = lexer
+        self.ide_edit_version += 1
+        self.ide_highlight_cache.reset(line_count)
+        self.ide_painted_chunks.clear()
+        self.ide_paint_queue.clear()
 
     def _apply_ide_syntax_highlight(self) -> None:
-        """Apply Python syntax highlighting to the current editor buffer."""
+        """Snapshot the dirty editor lines and hand them to a background lexer."""
         self.ide_syntax_job_id = None
         if not hasattr(self, "ide_editor"):
             return
+        self._sync_ide_lexer(int(self.ide_editor.index("end-1c").split(".")[0]))
+        if self.ide_highlight_inflight:
+            # The result handler reschedules once the running snapshot comes back.
+            return
 
-        text = self.ide_editor.get("1.0", "end-1c")
-        syntax_tags = (
-            "syn_keyword",
-            "syn_builtin",
-            "syn_string",
-            "syn_comment",
-            "syn_number",
-            "syn_function",
-            "syn_class",
-            "syn_decorator",
-        )
-        for tag in syntax_tags:
-            self.ide_editor.tag_remove(tag, "1.0", "end")
+        cache = self.ide_highlight_cache
+        line_count = int(self.ide_editor.index("end-1c").split(".")[0])
+        cache.fit(line_count)
+        lazy = self._ide_highlight_is_lazy()
+        if lazy:
+            # Repaint edited on-screen lines right away; their start states are already known.
+            self._extend_ide_highlight_viewport()
+        if cache.is_clean():
+            return
 
-        if not text:
+        first = cache.dirty_from
+        # Bound each snapshot so a one-line edit near the top of a huge file copies little text.
+        # Catch-up passes on huge files skip token collection, so they take much larger snapshots.
+        if lazy and self.ide_highlight_catching_up:
+            span = IDE_HIGHLIGHT_LAZY_SNAPSHOT_LINES
+        else:
+            span = IDE_HIGHLIGHT_SNAPSHOT_LINES
+        last = min(line_count, max(cache.dirty_to, first) + span)
+        job = {
+            "lexer": self.ide_lexer,
+            "lazy": lazy,
+            "version": self.ide_edit_version,
+            "first": first,
+            "dirty_to": cache.dirty_to,
+            "start_state": cache.start_state(first),
+            "old_states": cache.snapshot(first, last),
+            "lines": self.ide_editor.get(f"{first}.0", f"{last}.end").split("\n"),
+        }
+        self.ide_highlight_inflight = True
+        thread = threading.Thread(target=self._lex_ide_snapshot, args=(job,), daemon=True)
+        thread.start()
+
+    def _lex_ide_snapshot(self, job: dict[str, object]) -> None:
+        """Lex one editor snapshot off the Tk thread and post the result to the UI queue."""
+        result = lex_lines(
+            job["lexer"],
+            job["lines"],
+            job["first"],
+            job["start_state"],
+            job["old_states"],
+            job["dirty_to"],
+            collect_tokens=not job["lazy"],
+        )
+        result.update(
+            {"type": "ide_highlight", "version": job["version"], "first": job["first"], "lazy": job["lazy"]}
+        )
+        self.event_queue.put(result)
+
+    def _handle_ide_highlight_result(self, event: dict[str, object]) -> None:
+        """Accept a lexer result if the buffer is unchanged and queue its tags for painting."""
+        self.ide_highlight_inflight = False
+        if event.get("version") != self.ide_edit_version:
+            # The buffer changed while lexing; the cache still marks those lines dirty.
+            self._schedule_ide_syntax_highlight(delay_ms=10)
             return
 
-        # Avoid UI stalls on extremely large files in the Tk text widget.
-        if len(text) > 350_000:
+        cache = self.ide_highlight_cache
+        first = int(event["first"])
+        last = int(event["last_line"])
+        cache.update(first, event["states"])
+        line_count = len(cache.states)
+        if event["converged"] or last >= line_count:
+            cache.mark_clean()
+            self.ide_highlight_catching_up = False
+        else:
+            cache.advance(last)
+            self.ide_highlight_catching_up = True
+            self._schedule_ide_syntax_highlight(delay_ms=1)
+
+        if event.get("lazy"):
+            # Huge buffer: only states were computed; paint whatever is on screen now.
+            self._extend_ide_highlight_viewport()
             return
 
-        ignore_types = {
-            tokenize.NL,
-            tokenize.NEWLINE,
-            tokenize.INDENT,
-            tokenize.DEDENT,
-            tokenize.ENDMARKER,
-            tokenize.ENCODING,
-        }
-        reader = io.StringIO(text).readline
-        previous_significant: tokenize.TokenInfo | None = None
+        line_tokens = event["tokens"]
+        chunks = [
+            (first + offset, line_tokens[offset : offset + IDE_HIGHLIGHT_CHUNK_LINES])
+            for offset in range(0, len(line_tokens), IDE_HIGHLIGHT_CHUNK_LINES)
+        ]
+        # Paint what the user is looking at first; off-screen lines follow in later slices.
+        top = int(self.ide_editor.index("@0,0").split(".")[0])
+        bottom = int(self.ide_editor.index(f"@0,{self.ide_editor.winfo_height()}").split(".")[0])
+        chunks.sort(key=lambda chunk: not (chunk[0] <= bottom and chunk[0] + len(chunk[1]) - 1 >= top))
+        for start, tokens in chunks:
+            self.ide_paint_queue.append((self.ide_edit_version, start, tokens))
+        if self.ide_paint_job_id is None:
+            self._paint_ide_highlight()
+
+    def _paint_ide_highlight(self) -> None:
+        """Apply queued tag ranges in time slices, one multi-range tag_add per tag per chunk."""
+        self.ide_paint_job_id = None
+        deadline = time.perf_counter() + IDE_HIGHLIGHT_SLICE_SECONDS
+        while self.ide_paint_queue:
+            version, start, tokens = self.ide_paint_queue[0]
+            if version != self.ide_edit_version:
+                # Queued line numbers predate an edit; re-lex everything not yet painted.
+                pending_first = min(chunk[1] for chunk in self.ide_paint_queue)
+                self.ide_paint_queue.clear()
+                cache = self.ide_highlight_cache
+                cache.invalidate_from(min(pending_first, cache.dirty_from))
+                self._schedule_ide_syntax_highlight(delay_ms=10)
+                return
 
-        try:
-            for tok in tokenize.generate_tokens(reader):
-                ttype = tok.type
-                tstring = tok.string
-
-                if ttype == tokenize.NAME:
-                    if (
-                        previous_significant is not None
-                        and previous_significant.type == tokenize.OP
-                        and previous_significant.string == "@"
-                    ):
-                        self._tag_ide_token("syn_decorator", tok.start, tok.end)
-                    elif (
-                        previous_significant is not None
-                        and previous_significant.type == tokenize.NAME
-                        and previous_significant.string == "def"
-                    ):
-                        self._tag_ide_token("syn_function", tok.start, tok.end)
-                    elif (
-                        previous_significant is not None
-                        and previous_significant.type == tokenize.NAME
-                        and previous_significant.string == "class"
-                    ):
-                        self._tag_ide_token("syn_class", tok.start, tok.end)
-                    elif tstring in self.ide_python_keywords:
-                        self._tag_ide_token("syn_keyword", tok.start, tok.end)
-                    elif tstring in self.ide_python_builtins:
-                        self._tag_ide_token("syn_builtin", tok.start, tok.end)
-                elif ttype == tokenize.STRING:
-                    self._tag_ide_token("syn_string", tok.start, tok.end)
-                elif ttype == tokenize.COMMENT:
-                    self._tag_ide_token("syn_comment", tok.start, tok.end)
-                elif ttype == tokenize.NUMBER:
-                    self._tag_ide_token("syn_number", tok.start, tok.end)
-
-                if ttype not in ignore_types and ttype != tokenize.COMMENT:
-                    previous_significant = tok
-        except tokenize.TokenError:
-            # Keep any partial highlighting we already applied.
-            pass
+            self.ide_paint_queue.popleft()
+            end = start + len(tokens) - 1
+            for tag in SYNTAX_TAGS:
+                self.ide_editor.tag_remove(tag, f"{start}.0", f"{end}.end")
+            for tag, indexes in group_ranges(start, tokens).items():
+                self.ide_editor.tag_add(tag, *indexes)
+
+            if self.ide_paint_queue and time.perf_counter() >= deadline:
+                self.ide_paint_job_id = self.after(1, self._paint_ide_highlight)
+                return
 
     def _on_ide_kind_change(self, *_args: object) -> None:
         """Handle IDE kind change (Python to Web or vice versa)."""
@@ -6304,10 +7101,12 @@ class GroqChatroomApp(tk.Tk):
             self.ide_panel_label.config(text="PREVIEW")
             self.ide_browser = HtmlFrame(self.ide_output_container, bg=COLORS["entry_bg"])
             self.ide_browser.pack(fill="both", expand=True)
+            self.ide_preview_hash = None
             self._update_browser_preview()
         else:
             # Show terminal output
             self.ide_panel_label.config(text="TERMINAL")
+            self.ide_browser = None
             self.ide_output = tk.Text(
                 self.ide_output_container,
                 wrap="word",
@@ -6322,6 +7121,7 @@ class GroqChatroomApp(tk.Tk):
                 pady=10,
                 state="disabled",
             )
+            self.ide_output.tag_configure("stderr", foreground=IDE_STDERR_COLOR)
             self.ide_output.pack(side="left", fill="both", expand=True)
 
             yscroll_output = tk.Scrollbar(
@@ -6350,67 +7150,438 @@ class GroqChatroomApp(tk.Tk):
         """Update the browser preview with current HTML content."""
         self.ide_browser_update_job_id = None
 
-        if self.ide_browser is None or HtmlFrame is None:
+        if self.ide_browser is None or HtmlFrame is None:
+            return
+
+        try:
+            content = self.ide_editor.get("1.0", "end-1c")
+            if not content.strip():
+                content = "<html><body><p>Start typing HTML...</p></body></html>"
+
+            digest = content_hash(content.encode("utf-8"))
+            if digest == self.ide_preview_hash:
+                return
+
+            # Render straight from memory; older tkinterweb releases without
+            # load_html get the single reusable preview file instead.
+            if hasattr(self.ide_browser, "load_html"):
+                self.ide_browser.load_html(content)
+            else:
+                self.ide_browser.load_file(str(self._write_web_preview_file(content)))
+            self.ide_preview_hash = digest
+        except Exception as e:
+            pass  # Silently fail on preview errors
+
+    def _on_ide_editor_change(self, _event: tk.Event) -> None:
+        """Handle the ide editor change event."""
+        self._refresh_ide_line_numbers()
+        self._update_ide_cursor_position()
+        self._schedule_ide_syntax_highlight()
+        self._schedule_autosave()
+
+        # Update browser preview if in web mode
+        if self.ide_kind_var.get() == "web":
+            self._schedule_browser_update()
+
+        if self._ide_loading:
+            return
+        self.ide_dirty = True
+        if self.ide_current_file is not None:
+            shown = self._display_path(self.ide_current_file)
+            self.ide_file_var.set(f"{shown} *")
+            self.ide_tab_title_var.set(f"{shown} *")
+        else:
+            self.ide_file_var.set("Unsaved scratch *")
+            self.ide_tab_title_var.set("scratch.py *")
+
+    def save_current_file(self) -> None:
+        """Handle save current file."""
+        if self.ide_current_file is None:
+            self.ide_status_var.set("Select a file from the left sidebar first.")
+            return
+        if self.ide_read_only:
+            self.ide_status_var.set("This file is open read-only; nothing to save.")
+            return
+        content = self.ide_editor.get("1.0", "end-1c")
+        self.file_saver.save(self.ide_current_file, content, self._ide_text_version())
+        self.ide_status_var.set(f"Saving {self._display_path(self.ide_current_file)}...")
+
+    def _handle_ctrl_p(self, _event: tk.Event) -> str | None:
+        """Handle Ctrl+P in IDE mode by opening the quick-open file finder."""
+        if self.mode_var.get() == "ide":
+            self.open_quick_open_dialog()
+            return "break"
+        return None
+
+    def open_quick_open_dialog(self) -> None:
+        """Fuzzy-find a project file by path and open it in the editor."""
+        if self.project_index is None:
+            self.ide_status_var.set("Open a folder first.")
+            return
+        index = self.fuzzy_index
+        root = self.project_index.root
+
+        dialog = tk.Toplevel(self)
+        dialog.title("Go to File")
+        dialog.configure(bg=COLORS["panel"])
+        dialog.geometry("640x420")
+        dialog.transient(self)
+
+        query_var = tk.StringVar()
+        entry = tk.Entry(
+            dialog,
+            textvariable=query_var,
+            bg=COLORS["entry_bg"],
+            fg=COLORS["text"],
+            insertbackground=COLORS["text"],
+            highlightthickness=1,
+            highlightbackground=COLORS["border"],
+            relief="flat",
+            font=("Consolas", 11),
+        )
+        entry.pack(fill="x", padx=12, pady=(12, 6))
+        results = tk.Listbox(
+            dialog,
+            exportselection=False,
+            bg=COLORS["list_bg"],
+            fg=COLORS["text"],
+            selectbackground=COLORS["button"],
+            selectforeground="#03100f",
+            highlightthickness=1,
+            highlightbackground=COLORS["border"],
+            relief="flat",
+            activestyle="none",
+            font=("Consolas", 10),
+        )
+        results.pack(fill="both", expand=True, padx=12)
+        status_var = tk.StringVar()
+        tk.Label(
+            dialog,
+            textvariable=status_var,
+            bg=COLORS["panel"],
+            fg=COLORS["muted"],
+            font=("Segoe UI", 9),
+        ).pack(anchor="w", padx=12, pady=(4, 10))
+
+        matches: list[str] = []
+
+        def refresh(*_args: object) -> None:
+            matches[:] = [path for _score, path in index.search(query_var.get())]
+            results.delete(0, "end")
+            if matches:
+                results.insert("end", *(path.replace("/", os.sep) for path in matches))
+                results.selection_set(0)
+            suffix = " (still scanning)" if index.building else ""
+            status_var.set(f"{len(index)} files indexed{suffix}")
+
+        def poll_while_building() -> None:
+            # Re-run the query as batches land so results stream in during the first scan.
+            if not dialog.winfo_exists():
+                return
+            refresh()
+            if index.building:
+                dialog.after(300, poll_while_building)
+
+        def move(step: int) -> str:
+            if matches:
+                current = results.curselection()
+                position = min(max((current[0] if current else 0) + step, 0), len(matches) - 1)
+                results.selection_clear(0, "end")
+                results.selection_set(position)
+                results.see(position)
+            return "break"
+
+        def accept(_event: tk.Event | None = None) -> str:
+            selection = results.curselection()
+            if matches:
+                path = root / matches[selection[0] if selection else 0]
+                dialog.destroy()
+                self.open_file_in_editor(path)
+                self._refresh_project_file_list(select_current=True)
+            return "break"
+
+        query_var.trace_add("write", refresh)
+        entry.bind("<Return>", accept)
+        entry.bind("<Down>", lambda _e: move(1))
+        entry.bind("<Up>", lambda _e: move(-1))
+        results.bind("<Double-Button-1>", accept)
+        dialog.bind("<Escape>", lambda _e: dialog.destroy())
+        entry.focus_set()
+        poll_while_building()
+
+    def _set_symbol_index(self, index: SymbolIndex | None) -> None:
+        if self.symbol_index is not None:
+            self.symbol_index.shutdown()
+        self.symbol_index = index
+        self._draw_outline()
+
+    def _refresh_file_symbols(self, path: Path | None) -> None:
+        """Re-parse one Python file's symbols in the background if it changed on disk."""
+        if self.symbol_index is not None and path is not None and path.suffix == ".py":
+            self.symbol_index.refresh([str(path)])
+
+    def _draw_outline(self) -> None:
+        """Show the current file's classes and functions, as of its last save."""
+        self.outline_listbox.delete(0, "end")
+        self.outline_lines = []
+        if self.symbol_index is None or self.ide_current_file is None:
+            return
+        symbols = self.symbol_index.symbols_for(str(self.ide_current_file))
+        if not symbols:
+            return
+        rows = []
+        for kind, name, line, depth in symbols:
+            rows.append(f"{'  ' * depth}{'class' if kind == 'class' else 'def'} {name.rsplit('.', 1)[-1]}")
+            self.outline_lines.append(line)
+        self.outline_listbox.insert("end", *rows)
+
+    def _on_outline_selected(self, _event: tk.Event) -> None:
+        selection = self.outline_listbox.curselection()
+        if not selection or selection[0] >= len(self.outline_lines):
+            return
+        self._goto_ide_line(self.outline_lines[selection[0]])
+
+    def _goto_ide_line(self, line: int) -> None:
+        self.ide_editor.mark_set("insert", f"{line}.0")
+        self.ide_editor.see(f"{line}.0")
+        self.ide_editor.focus_set()
+
+    def _handle_ctrl_t(self, _event: tk.Event) -> str | None:
+        """Handle Ctrl+T in IDE mode by opening go-to-symbol."""
+        if self.mode_var.get() == "ide":
+            self.open_go_to_symbol_dialog()
+            return "break"
+        return None
+
+    def open_go_to_symbol_dialog(self) -> None:
+        """Fuzzy-find a class or function anywhere in the project and jump to it."""
+        index = self.symbol_index
+        if index is None:
+            self.ide_status_var.set("Open a folder first.")
+            return
+
+        dialog = tk.Toplevel(self)
+        dialog.title("Go to Symbol")
+        dialog.configure(bg=COLORS["panel"])
+        dialog.geometry("640x420")
+        dialog.transient(self)
+
+        query_var = tk.StringVar()
+        entry = tk.Entry(
+            dialog,
+            textvariable=query_var,
+            bg=COLORS["entry_bg"],
+            fg=COLORS["text"],
+            insertbackground=COLORS["text"],
+            highlightthickness=1,
+            highlightbackground=COLORS["border"],
+            relief="flat",
+            font=("Consolas", 11),
+        )
+        entry.pack(fill="x", padx=12, pady=(12, 6))
+        results = tk.Listbox(
+            dialog,
+            exportselection=False,
+            bg=COLORS["list_bg"],
+            fg=COLORS["text"],
+            selectbackground=COLORS["button"],
+            selectforeground="#03100f",
+            highlightthickness=1,
+            highlightbackground=COLORS["border"],
+            relief="flat",
+            activestyle="none",
+            font=("Consolas", 10),
+        )
+        results.pack(fill="both", expand=True, padx=12, pady=(0, 12))
+
+        matches: list[tuple[str, int]] = []
+
+        def refresh(*_args: object) -> None:
+            found = index.search(query_var.get())
+            matches[:] = [(path, symbol[2]) for _score, path, symbol in found]
+            results.delete(0, "end")
+            if found:
+                results.insert(
+                    "end",
+                    *(
+                        f"{symbol[1]}  ·  {self._display_path(Path(path))}:{symbol[2]}"
+                        for _score, path, symbol in found
+                    ),
+                )
+                results.selection_set(0)
+
+        def move(step: int) -> str:
+            if matches:
+                current = results.curselection()
+                position = min(max((current[0] if current else 0) + step, 0), len(matches) - 1)
+                results.selection_clear(0, "end")
+                results.selection_set(position)
+                results.see(position)
+            return "break"
+
+        def accept(_event: tk.Event | None = None) -> str:
+            selection = results.curselection()
+            if matches:
+                path, line = matches[selection[0] if selection else 0]
+                dialog.destroy()
+                if self.ide_current_file is not None and str(self.ide_current_file) == path:
+                    self._goto_ide_line(line)
+                else:
+                    self.open_file_in_editor(Path(path), line)
+                    self._refresh_project_file_list(select_current=True)
+            return "break"
+
+        query_var.trace_add("write", refresh)
+        entry.bind("<Return>", accept)
+        entry.bind("<Down>", lambda _e: move(1))
+        entry.bind("<Up>", lambda _e: move(-1))
+        results.bind("<Double-Button-1>", accept)
+        dialog.bind("<Escape>", lambda _e: dialog.destroy())
+        entry.focus_set()
+
+    def _handle_ctrl_shift_f(self, _event: tk.Event) -> str | None:
+        """Handle Ctrl+Shift+F in IDE mode by opening find-in-files."""
+        if self.mode_var.get() == "ide":
+            self.open_project_search_dialog()
+            return "break"
+        return None
+
+    def open_project_search_dialog(self) -> None:
+        """Open find-in-files for the project folder; matches stream in while the search runs."""
+        if self.project_index is None:
+            self.ide_status_var.set("Open a folder first.")
             return
 
-        try:
-            content = self.ide_editor.get("1.0", "end-1c")
-            if not content.strip():
-                content = "<html><body><p>Start typing HTML...</p></body></html>"
+        dialog = tk.Toplevel(self)
+        dialog.title("Search Project")
+        dialog.configure(bg=COLORS["panel"])
+        dialog.geometry("820x520")
+        dialog.transient(self)
 
-            # Create a temporary HTML file for the browser to load
-            import tempfile
-            with tempfile.NamedTemporaryFile(mode='w', suffix='.html', delete=False, encoding='utf-8') as f:
-                f.write(content)
-                temp_path = f.name
+        controls = tk.Frame(dialog, bg=COLORS["panel"])
+        controls.pack(fill="x", padx=12, pady=(12, 6))
+        query_var = tk.StringVar()
+        regex_var = tk.BooleanVar(value=False)
+        case_var = tk.BooleanVar(value=False)
+        entry = tk.Entry(
+            controls,
+            textvariable=query_var,
+            bg=COLORS["entry_bg"],
+            fg=COLORS["text"],
+            insertbackground=COLORS["text"],
+            highlightthickness=1,
+            highlightbackground=COLORS["border"],
+            relief="flat",
+            font=("Consolas", 11),
+        )
+        entry.pack(side="left", fill="x", expand=True)
+        for text, variable in (("Regex", regex_var), ("Match case", case_var)):
+            tk.Checkbutton(
+                controls,
+                text=text,
+                variable=variable,
+                bg=COLORS["panel"],
+                fg=COLORS["text"],
+                activebackground=COLORS["panel"],
+                activeforeground=COLORS["text"],
+                selectcolor=COLORS["entry_bg"],
+                highlightthickness=0,
+                font=("Segoe UI", 9),
+            ).pack(side="left", padx=(8, 0))
 
-            # Store the temp path so we can clean it up later
-            self.ide_preview_temp_path = Path(temp_path)
+        def start(_event: tk.Event | None = None) -> str:
+            self._start_project_search(query_var.get(), regex_var.get(), case_var.get())
+            return "break"
 
-            # Load the HTML into the browser
-            self.ide_browser.load_file(temp_path)
-        except Exception as e:
-            pass  # Silently fail on preview errors
+        for text, command in (("Search", start), ("Stop", self._stop_project_search)):
+            tk.Button(
+                controls,
+                text=text,
+                command=command,
+                bg=COLORS["entry_bg"],
+                fg=COLORS["text"],
+                activebackground="#172135",
+                activeforeground=COLORS["text"],
+                bd=0,
+                highlightthickness=1,
+                highlightbackground=COLORS["border"],
+                padx=10,
+                pady=4,
+                font=("Segoe UI", 9, "bold"),
+                cursor="hand2",
+            ).pack(side="left", padx=(8, 0))
 
-    def _on_ide_editor_change(self, _event: tk.Event) -> None:
-        """Handle the ide editor change event."""
-        self._refresh_ide_line_numbers()
-        self._update_ide_cursor_position()
-        self._schedule_ide_syntax_highlight()
-        self._schedule_autosave()
+        tree = ttk.Treeview(dialog, columns=("file", "line", "text"), show="headings")
+        for column, heading, width in (("file", "File", 220), ("line", "Line", 60), ("text", "Text", 500)):
+            tree.heading(column, text=heading)
+            tree.column(column, width=width, anchor="e" if column == "line" else "w", stretch=column == "text")
+        tree.pack(fill="both", expand=True, padx=12)
+        tk.Label(
+            dialog,
+            textvariable=self.project_search_status_var,
+            bg=COLORS["panel"],
+            fg=COLORS["muted"],
+            font=("Segoe UI", 9),
+        ).pack(anchor="w", padx=12, pady=(4, 10))
+        self.project_search_tree = tree
+        self.project_search_status_var.set(f"{len(self.ide_files)} files in {self.project_index.root}")
 
-        # Update browser preview if in web mode
-        if self.ide_kind_var.get() == "web":
-            self._schedule_browser_update()
+        def open_match(_event: tk.Event) -> None:
+            selection = tree.selection()
+            if not selection or self.project_index is None:
+                return
+            row = self.project_search_rows.get(selection[0])
+            if row is not None:
+                self.open_file_in_editor(self.project_index.root / row[0], row[1])
+
+        def close() -> None:
+            self._stop_project_search()
+            self.project_search_tree = None
+            self.project_search_rows = {}
+            dialog.destroy()
 
-        if self._ide_loading:
-            return
-        self.ide_dirty = True
-        if self.ide_current_file is not None:
-            shown = self._display_path(self.ide_current_file)
-            self.ide_file_var.set(f"{shown} *")
-            self.ide_tab_title_var.set(f"{shown} *")
-        else:
-            self.ide_file_var.set("Unsaved scratch *")
-            self.ide_tab_title_var.set("scratch.py *")
+        entry.bind("<Return>", start)
+        tree.bind("<Double-Button-1>", open_match)
+        tree.bind("<Return>", open_match)
+        dialog.bind("<Escape>", lambda _e: close())
+        dialog.protocol("WM_DELETE_WINDOW", close)
+        entry.focus_set()
 
-    def save_current_file(self) -> None:
-        """Handle save current file."""
-        if self.ide_current_file is None:
-            self.ide_status_var.set("Select a file from the left sidebar first.")
+    def _start_project_search(self, query: str, is_regex: bool, case_sensitive: bool) -> None:
+        """Start a find-in-files over the indexed project files, replacing any running search."""
+        if not query or self.project_index is None or self.project_search_tree is None:
             return
         try:
-            content = self.ide_editor.get("1.0", "end-1c")
-            self.ide_current_file.write_text(content, encoding="utf-8")
-        except OSError as exc:
-            self.ide_status_var.set(f"Save failed: {exc}")
+            pattern = compile_query(query, is_regex, case_sensitive)
+        except re.error as exc:
+            self.project_search_status_var.set(f"Invalid regex: {exc}")
             return
-
-        self.ide_dirty = False
-        shown = self._display_path(self.ide_current_file)
-        self.ide_file_var.set(shown)
-        self.ide_tab_title_var.set(shown)
-        self.ide_status_var.set(f"Saved {shown}")
+        self.project_search_tree.delete(*self.project_search_tree.get_children())
+        self.project_search_rows = {}
+        rel_paths = [key[1] for key in self.ide_file_keys]
+        self.project_search_id = self.project_searcher.start(self.project_index.root, rel_paths, pattern)
+        self.project_search_status_var.set(f"Searching {len(rel_paths)} files...")
+
+    def _stop_project_search(self) -> None:
+        self.project_searcher.cancel()
+
+    def _handle_project_search_event(self, event: dict[str, object]) -> None:
+        """Append streamed matches or show the final tally for the current search."""
+        tree = self.project_search_tree
+        if event.get("search_id") != self.project_search_id or tree is None or not tree.winfo_exists():
+            return
+        if event["type"] == "search_results":
+            for rel, line, _column, text in event["matches"]:
+                item = tree.insert("", "end", values=(rel.replace("/", os.sep), line, text.strip()))
+                self.project_search_rows[item] = (rel, line)
+            self.project_search_status_var.set(f"{len(tree.get_children())} matches so far...")
+            return
+        summary = f"{event['matches']} matches in {event['files']} files ({event['seconds']}s)"
+        if event.get("cancelled"):
+            summary += " - stopped"
+        elif event["matches"] >= MAX_TOTAL_MATCHES:
+            summary += f" - stopped at {MAX_TOTAL_MATCHES}; narrow the query"
+        self.project_search_status_var.set(summary)
 
     def _handle_ctrl_s(self, _event: tk.Event) -> str | None:
         """Handle Ctrl+S in IDE mode by saving the current file."""
@@ -6423,10 +7594,69 @@ class GroqChatroomApp(tk.Tk):
         """Append ide output to the visible output area."""
         if not text:
             return
-        self.ide_output.configure(state="normal")
-        self.ide_output.insert("end", text)
-        self.ide_output.see("end")
-        self.ide_output.configure(state="disabled")
+        self._append_ide_stream([("stdout", text)])
+
+    def _append_ide_stream(self, chunks: list[tuple[str, str]]) -> None:
+        """Append streamed process output; a bare carriage return rewrites the current line."""
+        output = self.ide_output
+        at_bottom = output.yview()[1] >= 0.999
+        output.configure(state="normal")
+        for stream, text in chunks:
+            self.ide_console_log.write(text)
+            tags = ("stderr",) if stream == "stderr" else ()
+            pieces = text.split("\r")
+            output.insert("end", pieces[0], tags)
+            for piece in pieces[1:]:
+                # Progress bars redraw with "\r"; replace the line instead of stacking copies.
+                output.delete("end-1c linestart", "end-1c")
+                output.insert("end", piece, tags)
+        self._trim_ide_console()
+        output.configure(state="disabled")
+        if at_bottom and self.ide_console_scroll_job_id is None:
+            # One scroll per idle pass, however many batches arrived in between.
+            self.ide_console_scroll_job_id = self.after_idle(self._scroll_ide_console)
+
+    def _trim_ide_console(self) -> None:
+        """Drop the oldest console output once past IDE_CONSOLE_MAX_LINES or IDE_CONSOLE_MAX_CHARS.
+
+        Output goes a tenth of a cap at a time rather than a bit per insert, so
+        a script printing millions of lines costs one large delete now and then
+        instead of a small one on every batch.
+        """
+        output = self.ide_output
+        lines = int(output.index("end-1c").split(".")[0])
+        cut = "1.0"
+        if lines > IDE_CONSOLE_MAX_LINES + IDE_CONSOLE_MAX_LINES // 10:
+            cut = f"{lines - IDE_CONSOLE_MAX_LINES + 1}.0"
+        counted = output.count(cut, "end-1c", "chars")
+        # Tk returns a 1-tuple, newer tkinter an int, and None for an empty range.
+        chars = (counted[0] if isinstance(counted, tuple) else counted) or 0
+        if chars > IDE_CONSOLE_MAX_CHARS + IDE_CONSOLE_MAX_CHARS // 10:
+            cut = output.index(f"{cut} + {chars - IDE_CONSOLE_MAX_CHARS} chars")
+        if cut == "1.0":
+            return
+        self.ide_console_dropped += int(cut.split(".")[0]) - 1
+        output.delete("1.0", cut)
+        self.ide_console_log_button.configure(state="normal")
+        if self.ide_console_dropped:
+            self.ide_status_var.set(f"Console trimmed: {self.ide_console_dropped} earlier lines are in the log")
+        else:
+            self.ide_status_var.set("Console trimmed: the start of this line is in the log")
+
+    def _scroll_ide_console(self) -> None:
+        self.ide_console_scroll_job_id = None
+        try:
+            self.ide_output.see("end")
+        except tk.TclError:
+            pass
+
+    def open_ide_console_log(self) -> None:
+        """Open the current run's full console log in the system viewer."""
+        path = self.ide_console_log.flush()
+        if path is None:
+            self.ide_status_var.set("No console log for this run yet.")
+            return
+        webbrowser.open(path.as_uri())
 
     def clear_ide_output(self) -> None:
         """Clear the IDE console output panel."""
@@ -6440,8 +7670,19 @@ class GroqChatroomApp(tk.Tk):
         self.run_button.configure(state="disabled" if running else "normal")
         if self.ide_kind_var.get() == "python":
             self.stop_button.configure(state="normal" if running else "disabled")
+            self.profile_button.configure(state="disabled" if running else "normal")
         else:
             self.stop_button.configure(state="disabled")
+            self.profile_button.configure(state="disabled")
+
+    def _write_web_preview_file(self, html_text: str) -> Path:
+        """Write preview HTML to the session's one temp file, creating it on first use."""
+        if self.ide_preview_temp_path is None:
+            fd, name = tempfile.mkstemp(prefix="goonbox_preview_", suffix=".html")
+            os.close(fd)
+            self.ide_preview_temp_path = Path(name).resolve()
+        self.ide_preview_temp_path.write_text(html_text, encoding="utf-8")
+        return self.ide_preview_temp_path
 
     def _cleanup_web_preview_file(self) -> None:
         """Delete the last temporary web preview file, if one exists."""
@@ -6523,10 +7764,18 @@ class GroqChatroomApp(tk.Tk):
             and self.ide_current_file.is_file()
         ):
             if self.ide_dirty:
-                self.save_current_file()
-                if self.ide_dirty:
+                # The browser reads the file right away, so this save cannot wait for the worker.
+                try:
+                    self.file_saver.write(self.ide_current_file, code)
+                except OSError as exc:
                     # Save failed, so we cannot reliably preview the latest buffer.
+                    self.ide_status_var.set(f"Save failed: {exc}")
                     return
+                self.ide_dirty = False
+                self.ide_buffer_stamp = disk_stamp(self.ide_current_file)
+                shown = self._display_path(self.ide_current_file)
+                self.ide_file_var.set(shown)
+                self.ide_tab_title_var.set(shown)
             target_url = self.ide_current_file.resolve().as_uri()
             opened_label = self._display_path(self.ide_current_file)
         else:
@@ -6537,16 +7786,7 @@ class GroqChatroomApp(tk.Tk):
             else:
                 preview_html = code
 
-            self._cleanup_web_preview_file()
-            with tempfile.NamedTemporaryFile(
-                mode="w",
-                suffix=".html",
-                delete=False,
-                encoding="utf-8",
-            ) as preview_file:
-                preview_file.write(preview_html)
-                temp_path = Path(preview_file.name).resolve()
-            self.ide_preview_temp_path = temp_path
+            temp_path = self._write_web_preview_file(preview_html)
             target_url = temp_path.as_uri()
             opened_label = str(temp_path)
 
@@ -6558,7 +7798,14 @@ class GroqChatroomApp(tk.Tk):
         else:
             self.ide_status_var.set("Preview URL generated (browser may be blocked)")
 
-    def run_ide_code(self) -> None:
+    def profile_ide_code(self) -> None:
+        """Run the editor's Python code under cProfile and tracemalloc and show where time and memory went."""
+        if self.ide_kind_var.get() != "python":
+            self.ide_status_var.set("Profiling is only available for Python code.")
+            return
+        self.run_ide_code(profile=True)
+
+    def run_ide_code(self, profile: bool = False) -> None:
         """Run Python code or preview web code based on the selected IDE kind."""
         if self.ide_running:
             return
@@ -6581,10 +7828,15 @@ class GroqChatroomApp(tk.Tk):
             return
 
         self.clear_ide_output()
-        self.ide_status_var.set("Running...")
+        self.ide_console_log.reset()
+        self.ide_console_dropped = 0
+        self.ide_console_log_button.configure(state="disabled")
+        self.ide_status_var.set("Profiling..." if profile else "Running...")
         self._set_ide_running(True)
 
-        thread = threading.Thread(target=self._execute_ide_code, args=(code,), daemon=True)
+        # Taken now: by the time the result arrives another file may be open.
+        file_path = str(self.ide_current_file) if self.ide_current_file is not None else ""
+        thread = threading.Thread(target=self._execute_ide_code, args=(code, profile, file_path), daemon=True)
         thread.start()
 
     def stop_ide_code(self) -> None:
@@ -6598,9 +7850,15 @@ class GroqChatroomApp(tk.Tk):
             process.terminate()
             self.ide_status_var.set("Stopping...")
 
-    def _execute_ide_code(self, code: str) -> None:
-        """Execute Python code in a temporary file and return captured output."""
+    def _execute_ide_code(self, code: str, profile: bool = False, file_path: str = "") -> None:
+        """Execute Python code in a temporary file and stream its output.
+
+        With `profile`, the code runs under code_profiler and its report is
+        posted as an "ide_profile" event once the run ends. `file_path` is the
+        editor file the code came from, passed back for the run history.
+        """
         temp_path: str | None = None
+        report_path: str | None = None
         timeout_setting = os.getenv("IDE_RUN_TIMEOUT", "")  # Empty string means no timeout
         timeout_seconds = None if timeout_setting == "" else int(timeout_setting)  # None means no timeout
 
@@ -6615,46 +7873,92 @@ class GroqChatroomApp(tk.Tk):
                 temp_file.write(code)
                 temp_path = temp_file.name
 
-            process = subprocess.Popen(
-                # -u forces unbuffered stdio so console output appears promptly.
-                [sys.executable, "-u", temp_path],
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True,
-            )
+            command = [sys.executable, "-u", temp_path]
+            if profile:
+                fd, report_path = tempfile.mkstemp(prefix="goonbox-profile-", suffix=".json")
+                os.close(fd)
+                command = [sys.executable, "-u", code_profiler.__file__, temp_path, report_path]
+
+            # Profiling needs its own launcher, so it always gets a cold interpreter.
+            process = self.ide_warm_pool.take() if self.ide_warm_pool is not None and not profile else None
+            limited = True
+            # CPU a warm interpreter spent on its preloads; left out of the usage, and added to the CPU cap.
+            cpu_before = None
+            if process is not None:
+                try:
+                    cpu_before = process_cpu_seconds(process.pid)
+                    max_cpu = IDE_RUN_MAX_CPU_SECONDS
+                    if max_cpu and cpu_before is not None:
+                        max_cpu += math.ceil(sum(cpu_before))
+                    limited = apply_limits(process.pid, IDE_RUN_MAX_MEMORY_MB, max_cpu)
+                    # Already started with the preloads imported; it runs the file as soon as it gets the path.
+                    self.ide_warm_pool.run(process, temp_path)
+                except OSError:
+                    # It died after being handed out; fall back to a cold start.
+                    process.kill()
+                    process = None
+                    cpu_before = None
+            warm = process is not None
+            if process is None:
+                process = subprocess.Popen(
+                    # -u forces unbuffered stdio so console output appears promptly.
+                    command,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.PIPE,
+                )
+                # The child is still starting its interpreter, well before it reaches the script.
+                limited = apply_limits(process.pid, IDE_RUN_MAX_MEMORY_MB, IDE_RUN_MAX_CPU_SECONDS)
             with self.ide_process_lock:
                 # Protected write lets stop_ide_code safely terminate the same process.
                 self.ide_process = process
 
-            timed_out = False
-            if timeout_seconds is None:
-                # No timeout - wait indefinitely until process completes or is stopped by user
-                stdout, stderr = process.communicate()
-            else:
-                # Timeout specified - wait up to timeout_seconds
-                try:
-                    stdout, stderr = process.communicate(timeout=timeout_seconds)
-                except subprocess.TimeoutExpired:
-                    timed_out = True
-                    # Hard-kill on timeout to avoid orphaned child processes.
-                    process.kill()
-                    stdout, stderr = process.communicate()
-                    stderr = (stderr or "") + f"\nProcess timed out after {timeout_seconds} seconds."
+            # Output is streamed to the console while the script runs rather than held until exit.
+            streamer = OutputStreamer(lambda chunks: self.event_queue.put({"type": "ide_output", "chunks": chunks}))
+            streamer.start({"stdout": process.stdout, "stderr": process.stderr})
+            if not limited:
+                streamer.add("stderr", "Resource limits are not supported here; running without them.\n")
+            # None waits until the process completes or is stopped by the user; a timeout hard-kills it.
+            timed_out, usage = wait_with_usage(process, timeout_seconds, cpu_before)
+            if warm:
+                usage["warm"] = 1.0
+            # A grandchild that inherited the pipes could hold them open; don't wait on it forever.
+            streamer.join(timeout=2.0)
+            if timed_out:
+                streamer.add("stderr", f"\nProcess timed out after {timeout_seconds} seconds.\n")
+                streamer.join()
 
             self.event_queue.put(
                 {
                     "type": "ide_result",
-                    "stdout": stdout or "",
-                    "stderr": stderr or "",
+                    "produced": "1" if streamer.produced else "0",
                     "returncode": str(process.returncode if process.returncode is not None else -1),
                     "timed_out": "1" if timed_out else "0",
+                    "usage": usage,
+                    "code": code,
+                    "file_path": file_path,
+                    "stdout_tail": streamer.tail("stdout"),
+                    "stderr_tail": streamer.tail("stderr"),
                 }
             )
+            if report_path is not None:
+                try:
+                    with open(report_path, encoding="utf-8") as handle:
+                        report = json.load(handle)
+                except (OSError, ValueError):
+                    # Killed or stopped before the profiler could write its report.
+                    report = None
+                if report is not None:
+                    self.event_queue.put({"type": "ide_profile", "report": report, "script": temp_path})
         except Exception as exc:  # noqa: BLE001
             self.event_queue.put({"type": "ide_error", "message": f"Run failed: {exc}"})
         finally:
             with self.ide_process_lock:
                 self.ide_process = None
+            if report_path is not None:
+                try:
+                    os.unlink(report_path)
+                except OSError:
+                    pass
             if temp_path is not None:
                 try:
                     # Best-effort cleanup; failures are non-fatal.
@@ -6662,6 +7966,266 @@ class GroqChatroomApp(tk.Tk):
                 except OSError:
                     pass
 
+    @staticmethod
+    def _format_run_usage(usage: dict[str, float]) -> str:
+        parts = []
+        if "wall_seconds" in usage:
+            parts.append(f"{usage['wall_seconds']:.2f}s wall")
+        if "user_seconds" in usage:
+            parts.append(f"{usage['user_seconds'] + usage['system_seconds']:.2f}s CPU")
+        if "max_rss_kb" in usage:
+            parts.append(f"{usage['max_rss_kb'] / 1024:.0f} MB peak")
+        return " · ".join(parts)
+
+    def _record_ide_run(self, event: dict[str, object], returncode: int, timed_out: bool) -> None:
+        """Add the run and its resource usage to the execution history store."""
+        usage = dict(event.get("usage", {}))
+        failed = timed_out or returncode != 0
+        execution = self.code_history.record_execution(
+            str(event.get("code", "")),
+            str(event.get("stdout_tail", "")),
+            error=str(event.get("stderr_tail", "")) if failed else "",
+            execution_time=float(usage.get("wall_seconds", 0.0)),
+            file_path=str(event.get("file_path", "")),
+            returncode=returncode,
+            resources=usage,
+        )
+        if failed and not execution["error"]:
+            # Killed by a signal or the timeout, possibly without printing anything.
+            execution["error"] = "timed out" if timed_out else f"exit code {returncode}"
+            execution["status"] = "error"
+        self.execution_store.record(execution)
+
+    def open_run_history_dialog(self) -> None:
+        """Browse recorded IDE runs, filtered by file, status and date."""
+        dialog = tk.Toplevel(self)
+        dialog.title("Run History")
+        dialog.configure(bg=COLORS["panel"])
+        dialog.geometry("900x600")
+        dialog.transient(self)
+
+        files = self.execution_store.files()
+        file_choices = {"All files": None}
+        for path in files:
+            file_choices["(unsaved buffer)" if not path else self._display_path(Path(path))] = path
+        periods = {"All time": None, "Today": 0, "Last 7 days": 7, "Last 30 days": 30}
+        statuses = {"Any status": None, "Succeeded": "success", "Failed": "error"}
+        current = str(self.ide_current_file) if self.ide_current_file is not None else None
+        file_var = tk.StringVar(
+            value=next((label for label, path in file_choices.items() if path == current), "All files")
+        )
+        period_var = tk.StringVar(value="All time")
+        status_var = tk.StringVar(value="Any status")
+
+        filters = tk.Frame(dialog, bg=COLORS["panel"])
+        filters.pack(fill="x", padx=12, pady=(12, 6))
+        for variable, choices, width in (
+            (file_var, file_choices, 40),
+            (status_var, statuses, 12),
+            (period_var, periods, 12),
+        ):
+            combo = ttk.Combobox(
+                filters,
+                textvariable=variable,
+                values=list(choices),
+                state="readonly",
+                width=width,
+                style="Dark.TCombobox",
+            )
+            combo.pack(side="left", padx=(0, 8))
+            combo.bind("<<ComboboxSelected>>", lambda _e: refresh())
+
+        columns = (
+            ("when", "When", 150, False),
+            ("file", "File", 220, False),
+            ("status", "Status", 70, False),
+            ("wall", "Wall s", 70, True),
+            ("cpu", "CPU s", 70, True),
+            ("rss", "Peak MB", 80, True),
+            ("exit", "Exit", 50, True),
+            # Warm runs' peak memory includes the preloaded modules.
+            ("start", "Start", 50, False),
+        )
+        tree = ttk.Treeview(dialog, columns=[column[0] for column in columns], show="headings", height=12)
+        for name, heading, width, is_number in columns:
+            tree.heading(name, text=heading)
+            tree.column(name, width=width, anchor="e" if is_number else "w", stretch=name == "file")
+        tree.pack(fill="both", expand=True, padx=12)
+
+        details = tk.Text(
+            dialog,
+            height=12,
+            wrap="none",
+            bg=COLORS["entry_bg"],
+            fg=COLORS["text"],
+            insertbackground=COLORS["text"],
+            highlightthickness=1,
+            highlightbackground=COLORS["border"],
+            relief="flat",
+            font=("Consolas", 9),
+            state="disabled",
+        )
+        details.pack(fill="both", padx=12, pady=(6, 12))
+        runs: dict[str, dict[str, object]] = {}
+
+        def number(value: object, scale: float = 1.0, digits: int = 2) -> str:
+            return "" if value is None else f"{float(value) / scale:.{digits}f}"
+
+        def refresh() -> None:
+            days = periods[period_var.get()]
+            since = None
+            if days is not None:
+                since = (datetime.now() - timedelta(days=days)).date().isoformat()
+            rows = self.execution_store.query(
+                file=file_choices.get(file_var.get()),
+                status=statuses[status_var.get()],
+                since=since,
+            )
+            tree.delete(*tree.get_children())
+            runs.clear()
+            for row in rows:
+                cpu = None
+                if row["user_seconds"] is not None:
+                    cpu = float(row["user_seconds"]) + float(row["system_seconds"] or 0.0)
+                item = tree.insert(
+                    "",
+                    "end",
+                    values=(
+                        str(row["started_at"]).replace("T", " ")[:19],
+                        "(unsaved buffer)" if not row["file"] else self._display_path(Path(str(row["file"]))),
+                        row["status"],
+                        number(row["wall_seconds"]),
+                        number(cpu),
+                        number(row["max_rss_kb"], 1024, 0),
+                        "" if row["returncode"] is None else row["returncode"],
+                        "warm" if row["warm"] else "cold",
+                    ),
+                )
+                runs[item] = row
+
+        def show(_event: tk.Event) -> None:
+            selection = tree.selection()
+            row = runs.get(selection[0]) if selection else None
+            if row is None:
+                return
+            code = self.execution_store.code(str(row["code_hash"])) or ""
+            parts = [code.rstrip("\n"), "", "--- output ---", str(row["output"]).rstrip("\n")]
+            if row["error"]:
+                parts += ["--- error ---", str(row["error"]).rstrip("\n")]
+            details.configure(state="normal")
+            details.delete("1.0", "end")
+            details.insert("1.0", "\n".join(parts))
+            details.configure(state="disabled")
+
+        tree.bind("<<TreeviewSelect>>", show)
+        dialog.bind("<Escape>", lambda _e: dialog.destroy())
+        refresh()
+
+    def _show_ide_profile(self, report: dict[str, object], script: str) -> None:
+        """Show a profiling report; double-clicking a row from the editor's code jumps to its line."""
+        dialog = tk.Toplevel(self)
+        dialog.title("Profile")
+        dialog.configure(bg=COLORS["panel"])
+        dialog.geometry("860x520")
+        dialog.transient(self)
+
+        notebook = ttk.Notebook(dialog)
+        notebook.pack(fill="both", expand=True, padx=12, pady=(12, 6))
+
+        def where(row: dict[str, object]) -> str:
+            filename = str(row["file"])
+            if filename == script:
+                return "editor"
+            return "built-in" if filename == "~" else self._display_path(Path(filename))
+
+        def add_table(
+            title: str,
+            columns: tuple[tuple[str, str, int, bool], ...],
+            rows: list[tuple[object, ...]],
+            lines: list[int | None],
+        ) -> None:
+            frame = tk.Frame(notebook, bg=COLORS["panel"])
+            notebook.add(frame, text=title)
+            tree = ttk.Treeview(frame, columns=[column[0] for column in columns], show="headings")
+            numeric = {column[0] for column in columns if column[3]}
+            descending: dict[str, bool] = {}
+
+            def sort_by(column: str) -> None:
+                # Numbers sort biggest first on the first click; each further click flips the order.
+                reverse = descending.get(column, column in numeric)
+                items = [(tree.set(item, column), item) for item in tree.get_children("")]
+                if column in numeric:
+                    items.sort(key=lambda pair: float(pair[0]), reverse=reverse)
+                else:
+                    items.sort(key=lambda pair: pair[0].lower(), reverse=reverse)
+                for position, (_, item) in enumerate(items):
+                    tree.move(item, "", position)
+                descending[column] = not reverse
+
+            for name, heading, width, is_number in columns:
+                tree.heading(name, text=heading, command=lambda name=name: sort_by(name))
+                tree.column(name, width=width, anchor="e" if is_number else "w", stretch=not is_number)
+            targets: dict[str, int] = {}
+            for values, line in zip(rows, lines):
+                item = tree.insert("", "end", values=values)
+                if line:
+                    targets[item] = line
+
+            def jump(_event: tk.Event) -> None:
+                selection = tree.selection()
+                line = targets.get(selection[0]) if selection else None
+                if line is None:
+                    return
+                self.ide_editor.mark_set("insert", f"{line}.0")
+                self.ide_editor.see(f"{line}.0")
+                self.ide_editor.focus_set()
+
+            tree.bind("<Double-Button-1>", jump)
+            tree.bind("<Return>", jump)
+            tree.pack(fill="both", expand=True)
+
+        functions = list(report.get("functions", []))
+        add_table(
+            "Time",
+            (
+                ("function", "Function", 220, False),
+                ("where", "Where", 240, False),
+                ("calls", "Calls", 70, True),
+                ("own", "Own ms", 90, True),
+                ("cumulative", "Cumulative ms", 110, True),
+            ),
+            [
+                (
+                    row["function"],
+                    f"{where(row)}:{row['line']}",
+                    row["calls"],
+                    f"{row['own'] * 1000:.2f}",
+                    f"{row['cumulative'] * 1000:.2f}",
+                )
+                for row in functions
+            ],
+            [int(row["line"]) if row["file"] == script else None for row in functions],
+        )
+        allocations = list(report.get("allocations", []))
+        add_table(
+            "Memory",
+            (
+                ("where", "Allocated at", 420, False),
+                ("size", "Live KB", 100, True),
+                ("count", "Blocks", 90, True),
+            ),
+            [(f"{where(row)}:{row['line']}", f"{row['size'] / 1024:.1f}", row["count"]) for row in allocations],
+            [int(row["line"]) if row["file"] == script else None for row in allocations],
+        )
+        tk.Label(
+            dialog,
+            text="Double-click a row from the editor's code to jump to that line. Memory shows what was still allocated at exit.",
+            bg=COLORS["panel"],
+            fg=COLORS["muted"],
+            font=("Segoe UI", 9),
+        ).pack(anchor="w", padx=12, pady=(0, 10))
+        dialog.bind("<Escape>", lambda _e: dialog.destroy())
+
     def ask_ai_about_code(self) -> None:
         """Send the current editor code to chat mode for feedback and iteration help."""
         code = self.ide_editor.get("1.0", "end-1c").strip()
@@ -6946,7 +8510,7 @@ class GroqChatroomApp(tk.Tk):
         try:
             ide_kind = self.ide_kind_var.get()
             messages = self._prepare_agent_messages(history, ide_kind)
-            reply, _usage = self._chat_with_provider(provider, model, messages, is_agent=True)
+            reply, _meta = self._complete_with_provider(provider, model, messages, is_agent=True)
             self.event_queue.put(
                 {
                     "type": "ide_agent_reply",
@@ -6967,146 +8531,58 @@ class GroqChatroomApp(tk.Tk):
             )
 
     def _parse_agent_commands(self, text: str) -> list[dict]:
-        """Extract JSON agent commands from assistant text.
-
-        Supported patterns:
-        - ```agent\n{...}\n``` fenced blocks (languages: agent, cmd, json, action)
-        - <!--AGENT-CMD\n{...}\n--> HTML-style comment block
+        """Extract JSON agent commands from assistant text."""
+        return AgentExecutor.parse_commands(text)
 
-        Each JSON object must include an "action" key (e.g. "read", "write", "create").
-        Returns a list of parsed command dicts (may be empty).
-        """
-        import re
+    def _validate_and_resolve_path_for_agent(self, path_str: str) -> Path:
+        """Resolve a path string into an absolute Path inside the project root."""
+        return AgentExecutor.resolve_path(path_str, self.project_root)
 
-        commands: list[dict] = []
-        if not text:
-            return commands
+    def _execute_agent_command(self, cmd: dict) -> dict:
+        """Execute a single parsed agent command and reflect writes in the IDE."""
 
-        fence_re = re.compile(r'```(?:agent|cmd|json|action)\n(.*?)\n```', re.S | re.IGNORECASE)
-        comment_re = re.compile(r'<!--\s*AGENT-CMD\n(.*?)\n-->', re.S | re.IGNORECASE)
+        def read_open_buffer(path: Path) -> str | None:
+            # Reads of the file open in the editor see unsaved edits, not the stale disk copy.
+            if self.ide_current_file and str(path) == str(self.ide_current_file):
+                return self.ide_editor.get("1.0", "end-1c")
+            buffer = self.ide_buffers.peek(path)
+            if buffer is not None and buffer.dirty:
+                return buffer.text
+            return None
 
-        for m in fence_re.findall(text):
-            s = m.strip()
+        before: str | None = None
+        if str(cmd.get("action", "")).strip().lower() in {"write", "create", "write_file"}:
+            # Keep what the file held before so the write can be undone.
             try:
-                obj = json.loads(s)
-                if isinstance(obj, dict) and obj.get("action"):
-                    commands.append(obj)
+                target = AgentExecutor.resolve_path(str(cmd.get("path", "")), self.project_root)
+                before = read_open_buffer(target)
+                if before is None:
+                    before = target.read_text(encoding="utf-8", errors="replace") if target.is_file() else ""
             except Exception:
-                # ignore parse errors for non-command blocks
-                pass
+                before = None
 
-        for m in comment_re.findall(text):
-            s = m.strip()
+        result = AgentExecutor.execute_command(cmd, self.project_root, read_open_buffer)
+        if result.get("ok") and result.get("path") and before is not None:
             try:
-                obj = json.loads(s)
-                if isinstance(obj, dict) and obj.get("action"):
-                    commands.append(obj)
-            except Exception:
+                written = Path(str(result["path"])).read_text(encoding="utf-8", errors="replace")
+                self._track_ai_edit(str(result["path"]), before, written)
+                # Only the written file is re-parsed; the rest of the symbol index stays as it is.
+                self._refresh_file_symbols(Path(str(result["path"])))
+            except OSError:
                 pass
-
-        return commands
-
-    def _validate_and_resolve_path_for_agent(self, path_str: str) -> Path:
-        """Resolve a path string into an absolute Path inside the project root.
-
-        Raises RuntimeError if the path resolves outside the project root.
-        """
-        if not path_str:
-            raise RuntimeError("Empty path")
-
-        p = Path(path_str)
-        # If relative, resolve relative to project root (or cwd if not set).
-        if not p.is_absolute():
-            root = self.project_root or Path.cwd()
-            p = (root / p).resolve()
-        else:
-            p = p.resolve()
-
-        # Ensure project_root exists and the path is inside it.
-        root = self.project_root or Path.cwd()
-        try:
-            p.relative_to(root.resolve())
-        except Exception:
-            raise RuntimeError("Agent path must be inside the open project folder")
-        return p
-
-    def _execute_agent_command(self, cmd: dict) -> dict:
-        """Execute a single parsed agent command.
-
-        Supported actions:
-        - read: {action: 'read', path: 'rel/or/abs'} -> returns file content
-        - write / create / write_file: {action: 'write', path:'', content:'', overwrite: bool}
-
-        Returns a result dict with keys: ok (bool), message (str), and optional content/path.
-        """
-        action = str(cmd.get("action", "")).strip().lower()
-        if action not in {"read", "write", "create", "write_file"}:
-            return {"ok": False, "message": f"unsupported action: {action}"}
-
-        try:
-            path_raw = str(cmd.get("path", ""))
-            path = self._validate_and_resolve_path_for_agent(path_raw)
-        except Exception as exc:
-            return {"ok": False, "message": f"path error: {exc}"}
-
-        if action == "read":
-            # Check if the requested path is the current editor file
-            if self.ide_current_file and str(path) == str(self.ide_current_file):
-                # Read the content directly from the editor widget
-                try:
-                    content = self.ide_editor.get("1.0", "end-1c")  # Get all text from editor
-                    return {"ok": True, "message": "read from editor", "content": content}
-                except Exception:
-                    # If we can't read from editor, fall back to file system
-                    pass
-            
-            # If not the current editor file or editor read failed, try file system
-            if not path.exists() or not path.is_file():
-                return {"ok": False, "message": "file not found"}
-            try:
-                try:
-                    content = path.read_text(encoding="utf-8")
-                except UnicodeDecodeError:
-                    content = path.read_text(encoding="utf-8", errors="replace")
-                return {"ok": True, "message": "read", "content": content}
-            except OSError as exc:
-                return {"ok": False, "message": f"read error: {exc}"}
-
-        # For writes/creates: perform atomic write
-        content = cmd.get("content", "")
-        
-        # Filter out temporary attachment paths from content before writing to file
-        # This prevents the agent from writing attachment paths to files
-        filtered_content = self._filter_attachment_paths_from_text(str(content))
-        
-        overwrite = bool(cmd.get("overwrite", False))
-        try:
-            path.parent.mkdir(parents=True, exist_ok=True)
-            if path.exists() and not overwrite:
-                return {"ok": False, "message": "file exists and overwrite not allowed"}
-
-            fd, tmp = tempfile.mkstemp(dir=str(path.parent), prefix=".tmp_write_")
-            os.close(fd)
-            with open(tmp, "w", encoding="utf-8") as f:
-                f.write(filtered_content)
-                f.flush()
-                os.fsync(f.fileno())
-            os.replace(tmp, path)
-
+        if result.get("ok") and result.get("path"):
             # Update UI's file list and editor state
             try:
                 self._refresh_project_file_list()
-                
+
                 # Automatically open the file in the editor if it's a code file
                 # This ensures that when the agent writes code, it appears in the editor
+                path = Path(str(result["path"]))
                 if self._is_code_file(path):
-                    self.open_file_in_editor(path)
+                    self.open_file_in_editor(path, reload=True)
             except Exception:
                 pass
-
-            return {"ok": True, "message": "written", "path": str(path)}
-        except Exception as exc:
-            return {"ok": False, "message": f"write error: {exc}"}
+        return result
 
     def _process_queue(self) -> None:
         """Process async worker events and apply UI updates on the main thread."""
@@ -7229,6 +8705,39 @@ class GroqChatroomApp(tk.Tk):
                     self.input_box.focus_set()
                 continue
 
+            if event_type == "ide_highlight":
+                self._handle_ide_highlight_result(event)
+                continue
+
+            if event_type in {"search_results", "search_done"}:
+                self._handle_project_search_event(event)
+                continue
+
+            if event_type == "symbol_index":
+                if event.get("index") is self.symbol_index:
+                    self._draw_outline()
+                continue
+
+            if event_type == "project_index":
+                self._apply_project_index_event(event)
+                continue
+
+            if event_type == "ide_file_read":
+                self._handle_ide_file_read(event)
+                continue
+
+            if event_type == "ide_saved":
+                self._handle_ide_saved(event)
+                continue
+
+            if event_type == "race_result":
+                self._apply_race_result(event)
+                continue
+
+            if event_type in {"compare_reply", "compare_error"}:
+                self._handle_compare_event(event)
+                continue
+
             if event_type == "ide_agent_reply":
                 # ========== IDE AGENT REPLY HANDLER ==========
                 # This handler processes responses from the coding agent and:
@@ -7356,28 +8865,38 @@ class GroqChatroomApp(tk.Tk):
                 self.agent_status_var.set("Error")
                 continue
 
+            if event_type == "ide_output":
+                self._append_ide_stream(event["chunks"])
+                continue
+
+            if event_type == "ide_profile":
+                self._show_ide_profile(event["report"], event["script"])
+                continue
+
             if event_type == "ide_result":
                 self._set_ide_running(False)
-                stdout = event.get("stdout", "")
-                stderr = event.get("stderr", "")
                 returncode = int(event.get("returncode", "-1"))
                 timed_out = event.get("timed_out", "0") == "1"
 
-                if not stdout and not stderr:
+                if event.get("produced", "0") != "1":
                     self._append_ide_output("(no output)\n")
-                if stdout:
-                    self._append_ide_output(stdout if stdout.endswith("\n") else f"{stdout}\n")
-                if stderr:
-                    if not stderr.startswith("\n"):
-                        self._append_ide_output("\n")
-                    self._append_ide_output(stderr if stderr.endswith("\n") else f"{stderr}\n")
+                elif self.ide_output.get("end-2c") != "\n":
+                    self._append_ide_output("\n")
+                if self.ide_console_log.path is not None:
+                    self.ide_console_log_button.configure(state="normal")
 
+                usage = event.get("usage", {})
+                summary = self._format_run_usage(usage)
                 if timed_out:
-                    self.ide_status_var.set("Timed out")
+                    status = "Timed out"
                 elif returncode == 0:
-                    self.ide_status_var.set("Done")
+                    status = "Done"
+                elif returncode == -getattr(signal, "SIGXCPU", 0):
+                    status = f"Stopped at the {IDE_RUN_MAX_CPU_SECONDS}s CPU limit"
                 else:
-                    self.ide_status_var.set(f"Exited with code {returncode}")
+                    status = f"Exited with code {returncode}"
+                self.ide_status_var.set(f"{status} · {summary}" if summary else status)
+                self._record_ide_run(event, returncode, timed_out)
                 continue
 
             if event_type == "ide_error":
@@ -7389,138 +8908,8 @@ class GroqChatroomApp(tk.Tk):
         self.after(120, self._process_queue)
 
     def _extract_code_from_response(self, text: str) -> tuple[str, str]:
-        """Extract code from agent response and return (code, summary).
-
-        This function is critical for the IDE agent functionality. It:
-        1. Searches for code in markdown fenced blocks (```python, ```html, etc.)
-        2. Extracts ONLY the code content (excludes surrounding explanations)
-        3. Combines multiple code blocks if present
-        4. Generates a human-readable summary of what the code does
-
-        The extracted code goes directly into the IDE editor, while the summary
-        is shown in the agent chat window for user feedback.
-
-        Args:
-            text: Raw AI response text that may contain code blocks
-
-        Returns:
-            Tuple of (code_content, summary_text):
-                - code_content: Pure code to write to editor (empty string if none found)
-                - summary_text: Brief description of what was done
-
-        Example:
-            Input: "I'll create a function.\n```python\ndef hello():\n    pass\n```\nDone!"
-            Output: ("def hello():\n    pass", "I'll create a function.")
-        """
-        import re
-
-        code = ""
-        summary = ""
-
-        # Step 1: Extract all code blocks using regex
-        # Matches markdown fenced blocks like ```python, ```html, ```css, etc.
-        # The (?:...) is a non-capturing group for language identifiers
-        # \s* allows optional whitespace after the language identifier
-        # (.*?) captures the code content (non-greedy)
-        # re.DOTALL makes . match newlines, re.IGNORECASE handles ```Python, ```PYTHON, etc.
-        code_blocks = re.findall(
-            r'```(?:python|html|css|javascript|js|jsx|tsx?|typescript|web)?\s*\n(.*?)\n```',
-            text,
-            re.DOTALL | re.IGNORECASE
-        )
-        
-        # If no language-specific blocks found, try to find generic code blocks
-        if not code_blocks:
-            generic_blocks = re.findall(
-                r'```\s*\n(.*?)\n```',
-                text,
-                re.DOTALL
-            )
-            code_blocks.extend(generic_blocks)
-
-        if code_blocks:
-            # Step 2: Process found code blocks
-            # Multiple blocks might exist (e.g., HTML + CSS in same response)
-            all_code = []
-            for block in code_blocks:
-                block_stripped = block.strip()
-                if block_stripped:  # Skip empty blocks
-                    all_code.append(block_stripped)
-
-            if all_code:
-                # Step 3: Combine multiple code blocks with double newlines
-                # This maintains separation between different code sections
-                code = "\n\n".join(all_code)
-
-                # Step 4: Extract summary from explanatory text BEFORE the code
-                # We split on first ``` to get everything before the code block
-                before_code = text.split('```')[0].strip()
-
-                # Get the last meaningful line as summary (usually the agent's intro)
-                # Filter out comment lines starting with # and empty lines
-                lines = [l.strip() for l in before_code.split('\n') if l.strip() and not l.startswith('#')]
-
-                if lines:
-                    summary = lines[-1]  # Last line usually describes the action
-
-                    # Limit summary length to prevent UI overflow
-                    if len(summary) > 150:
-                        summary = summary[:150] + "..."
-                else:
-                    # Fallback if no explanatory text found
-                    summary = "Code updated"
-            else:
-                # Found code blocks but all were empty
-                summary = "Empty code block"
-        else:
-            # Step 5: No code blocks found - agent is just responding conversationally
-            # This happens when agent asks clarifying questions or provides explanations
-            # Use first line of response as summary (up to 100 chars)
-            summary = text.split('\n')[0][:100]
-
-        # Fallback: If no code was found but the response looks like code, try to extract it
-        # This handles cases where the agent generates code without proper formatting
-        if not code and self._looks_like_code(text):
-            # Try to extract content that might be code but not in fenced blocks
-            # Look for indented code, function definitions, etc.
-            lines = text.split('\n')
-            code_lines = []
-            in_code_section = False
-            
-            for line in lines:
-                stripped = line.strip()
-                # If line starts with common code patterns, consider it code
-                if (stripped.startswith('def ') or 
-                    stripped.startswith('class ') or 
-                    stripped.startswith('import ') or 
-                    stripped.startswith('from ') or 
-                    stripped.startswith('function ') or 
-                    stripped.startswith('<') or  # HTML tags
-                    ':' in stripped and '{' in stripped or  # CSS rules
-                    stripped.endswith(':') or  # Python class/function headers
-                    stripped.startswith('return ') or  # Return statements
-                    stripped.startswith('if ') or  # Conditional statements
-                    stripped.startswith('for ') or  # Loop statements
-                    stripped.startswith('while ') or  # Loop statements
-                    stripped.startswith('try:') or  # Try statements
-                    stripped.startswith('except ') or  # Except statements
-                    stripped.startswith('with ') or  # With statements
-                    line.startswith('    ') or  # Indented code
-                    line.startswith('\t')):  # Tab-indented code
-                    code_lines.append(line)
-                    in_code_section = True
-                elif in_code_section and not stripped:
-                    # Continue including blank lines within code sections
-                    code_lines.append(line)
-                elif in_code_section and stripped:
-                    # If we were in a code section and hit non-code, stop
-                    break
-            
-            if code_lines:
-                code = '\n'.join(code_lines).strip()
-                summary = "Code extracted from response"
-
-        return code, summary
+        """Extract code from agent response and return (code, summary)."""
+        return AgentExecutor.extract_code(text)
 
     def _write_code_to_editor(self, code: str) -> None:
         """Write code to the IDE editor.
@@ -7556,6 +8945,8 @@ class GroqChatroomApp(tk.Tk):
 
         # Step 1: Replace editor content with generated code
         # Set loading flag to prevent event handlers from triggering during update
+        self._cancel_ide_file_load()
+        previous = self.ide_editor.get("1.0", "end-1c")
         self._ide_loading = True
 
         # Clear all existing content from the editor
@@ -7568,6 +8959,7 @@ class GroqChatroomApp(tk.Tk):
 
         # Clear loading flag - event handlers can fire again
         self._ide_loading = False
+        self._track_ai_edit(self._ide_history_key(), previous, code)
 
         # Step 2: Update file status
         # Mark the file as having unsaved changes
@@ -7590,6 +8982,88 @@ class GroqChatroomApp(tk.Tk):
         if self.ide_kind_var.get() == "web":
             self._schedule_browser_update(delay_ms=100)
 
+    def _ide_history_key(self) -> str:
+        """Key for the editor buffer in code_diff_tracker: the open file's path, if it has one."""
+        return str(self.ide_current_file) if self.ide_current_file is not None else IDE_SCRATCH_HISTORY_KEY
+
+    def _track_ai_edit(self, key: str, before: str, after: str) -> None:
+        if before == after:
+            return
+        change = self.code_diff_tracker.record_code_change(key, before, after, "AI edit")
+        self.ide_ai_edits.append((key, int(change["before"])))
+        self.undo_ai_button.configure(state="normal")
+
+    def _drop_scratch_ai_edits(self) -> None:
+        """Forget AI edits to the scratch buffer once its text is replaced; there is nothing left to revert."""
+        self.ide_ai_edits = [edit for edit in self.ide_ai_edits if edit[0] != IDE_SCRATCH_HISTORY_KEY]
+        self.undo_ai_button.configure(state="normal" if self.ide_ai_edits else "disabled")
+
+    def undo_ai_edit(self) -> None:
+        """Revert the most recent AI edit where that file's text lives: the editor, a background tab, or disk.
+
+        The revert is itself recorded as a version, so nothing is lost by undoing.
+        """
+        if not self.ide_ai_edits:
+            self.ide_status_var.set("No AI edit to undo.")
+            return
+        key, version = self.ide_ai_edits.pop()
+        if not self.ide_ai_edits:
+            self.undo_ai_button.configure(state="disabled")
+        try:
+            text = self.code_diff_tracker.get_version(key, version)
+        except IndexError:
+            self.ide_status_var.set("That AI edit is too old to undo.")
+            return
+
+        if key == self._ide_history_key():
+            current = self.ide_editor.get("1.0", "end-1c")
+            self._cancel_ide_file_load()
+            self._ide_loading = True
+            self.ide_editor.delete("1.0", "end")
+            self.ide_editor.insert("1.0", text)
+            self._ide_loading = False
+            self.ide_dirty = True
+            self._refresh_ide_line_numbers()
+            self._update_ide_cursor_position()
+            self._schedule_ide_syntax_highlight(delay_ms=10)
+            if self.ide_kind_var.get() == "web":
+                self._schedule_browser_update(delay_ms=100)
+        elif key == IDE_SCRATCH_HISTORY_KEY:
+            # The scratch buffer has no file to fall back to.
+            self.ide_status_var.set("The buffer that AI edit was made in is gone.")
+            return
+        elif Path(key) in self.ide_buffers:
+            # A background tab's cached text wins over the disk; revert it there, as an unsaved edit.
+            buffer = self.ide_buffers.pop(Path(key))
+            current = buffer.text
+            buffer.text = text
+            buffer.dirty = True
+            # A version no save still in flight for the old text can match and mark this one clean.
+            self.ide_offscreen_version -= 1
+            buffer.version = self.ide_offscreen_version
+            buffer.tags = {}
+            buffer.highlight = LineStateCache()
+            buffer.highlight.reset(text.count("\n") + 1)
+            buffer.painted = set()
+            self.ide_buffers.put(buffer)
+            self._draw_ide_tabs()
+        else:
+            path = Path(key)
+            try:
+                current = path.read_text(encoding="utf-8", errors="replace") if path.is_file() else ""
+                atomic_write(path, text.encode("utf-8"))
+            except OSError as exc:
+                self.ide_status_var.set(f"Undo failed: {exc}")
+                return
+            self._refresh_project_file_list()
+        self.code_diff_tracker.record_code_change(key, current, text, "undo AI edit")
+        self.ide_status_var.set(f"Reverted AI edit to {self._display_path(Path(key))}")
+
 if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "batch":
+        # Headless mode: no Tk window, just the provider adapters.
+        from batch_runner import main as batch_main
+
+        sys.exit(batch_main(sys.argv[2:]))
     app = GroqChatroomApp()
     app.mainloop()
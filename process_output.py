@@ -0,0 +1,101 @@
+"""Streaming a child process's stdout and stderr to the UI while it runs."""
+
+import codecs
+import os
+import threading
+from typing import IO, Callable, Dict, List, Optional, Tuple
+
+READ_BYTES = 64 * 1024
+# How much of the end of each stream `tail` keeps, e.g. for recording a run's outcome.
+TAIL_CHARS = 4000
+# How often buffered output is handed to the UI; faster only adds redraws nobody can read.
+FLUSH_INTERVAL_SECONDS = 0.05
+
+# (stream name, text), with consecutive pieces from one stream already joined.
+Chunk = Tuple[str, str]
+
+
+class OutputStreamer:
+    """Read a process's pipes on background threads and post output in timed batches.
+
+    Pipes are read with `os.read`, which returns whatever bytes are ready, so
+    progress output without a trailing newline (a "\\r" progress bar, an
+    `input()` prompt) still shows up. Bytes are decoded incrementally as
+    UTF-8 so a character split across reads is not mangled. Every
+    FLUSH_INTERVAL_SECONDS the collected output goes to `on_output` as one
+    list of chunks, keeping a chatty script from flooding the event queue.
+    """
+
+    def __init__(self, on_output: Callable[[List[Chunk]], None]):
+        self._on_output = on_output
+        self._lock = threading.Lock()
+        self._pending: List[Chunk] = []
+        self._tails: Dict[str, str] = {}
+        self._readers: List[threading.Thread] = []
+        self._done = threading.Event()
+        self._flusher: Optional[threading.Thread] = None
+        self.produced = False
+
+    def start(self, streams: Dict[str, IO[bytes]]) -> None:
+        for name, pipe in streams.items():
+            reader = threading.Thread(target=self._read, args=(name, pipe), daemon=True)
+            reader.start()
+            self._readers.append(reader)
+        self._flusher = threading.Thread(target=self._flush_loop, daemon=True)
+        self._flusher.start()
+
+    def add(self, name: str, text: str) -> None:
+        """Queue text that did not come from a pipe, such as a timeout notice."""
+        if not text:
+            return
+        with self._lock:
+            self.produced = True
+            self._tails[name] = (self._tails.get(name, "") + text)[-TAIL_CHARS:]
+            if self._pending and self._pending[-1][0] == name:
+                self._pending[-1] = (name, self._pending[-1][1] + text)
+            else:
+                self._pending.append((name, text))
+
+    def tail(self, name: str) -> str:
+        """The last TAIL_CHARS characters written to stream `name`."""
+        with self._lock:
+            return self._tails.get(name, "")
+
+    def join(self, timeout: Optional[float] = None) -> None:
+        """Wait for both pipes to reach EOF, then flush whatever is left."""
+        for reader in self._readers:
+            reader.join(timeout)
+        self._done.set()
+        if self._flusher is not None:
+            self._flusher.join(timeout)
+        self._flush()
+
+    def _read(self, name: str, pipe: IO[bytes]) -> None:
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        fd = pipe.fileno()
+        # A trailing "\r" waits for the next read: if that starts with "\n" the pair is a
+        # newline, and a lone "\r" would otherwise be taken for a line rewrite.
+        held = ""
+        try:
+            while True:
+                data = os.read(fd, READ_BYTES)
+                if not data:
+                    break
+                text = held + decoder.decode(data)
+                held = "\r" if text.endswith("\r") else ""
+                self.add(name, text[: len(text) - len(held)].replace("\r\n", "\n"))
+            self.add(name, (held + decoder.decode(b"", final=True)).replace("\r\n", "\n"))
+        except OSError:
+            pass
+        finally:
+            pipe.close()
+
+    def _flush_loop(self) -> None:
+        while not self._done.wait(FLUSH_INTERVAL_SECONDS):
+            self._flush()
+
+    def _flush(self) -> None:
+        with self._lock:
+            chunks, self._pending = self._pending, []
+        if chunks:
+            self._on_output(chunks)
@@ -0,0 +1,195 @@
+"""Incrementally maintained index of the files in an IDE project folder."""
+
+import os
+import threading
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+# mtime_ns, file names, subdirectory names of one scanned directory.
+_DirState = Tuple[int, Set[str], Set[str]]
+
+
+def sort_key(rel_path: str) -> Tuple[str, str]:
+    """Case-insensitive ordering for relative paths, with a stable tie-break."""
+    return rel_path.lower(), rel_path
+
+
+def _join(rel_dir: str, name: str) -> str:
+    return f"{rel_dir}/{name}" if rel_dir else name
+
+
+class ProjectIndex:
+    """Files under a root, kept current by rescanning only directories that changed.
+
+    Paths are stored relative to the root with "/" separators. Ignored
+    directories are pruned during the walk instead of filtered afterwards,
+    and symlinked directories are not followed. Creating, deleting or
+    renaming an entry updates its parent directory's mtime, so `poll` can
+    stat each known directory and rescan only the ones whose mtime moved.
+    """
+
+    def __init__(self, root: Path, ignored_dirs: Iterable[str]):
+        self.root = root
+        self.ignored_dirs = frozenset(ignored_dirs)
+        self._dirs: Dict[str, _DirState] = {}
+        self._lock = threading.Lock()
+
+    def _abs(self, rel_dir: str) -> str:
+        return os.path.join(self.root, rel_dir) if rel_dir else str(self.root)
+
+    def _scan_dir(self, rel_dir: str) -> Optional[_DirState]:
+        """List one directory; the mtime is read first so a change during the scan is seen next poll."""
+        path = self._abs(rel_dir)
+        files: Set[str] = set()
+        subdirs: Set[str] = set()
+        try:
+            mtime = os.stat(path).st_mtime_ns
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            if entry.name not in self.ignored_dirs:
+                                subdirs.add(entry.name)
+                        elif entry.is_file():
+                            files.add(entry.name)
+                    except OSError:
+                        continue
+        except OSError:
+            return None
+        return mtime, files, subdirs
+
+    def _add_tree(
+        self,
+        rel_dir: str,
+        added: List[str],
+        on_batch: Optional[Callable[[List[str]], None]] = None,
+        batch_size: int = 5000,
+    ) -> None:
+        stack = [rel_dir]
+        reported = len(added)
+        while stack:
+            current = stack.pop()
+            scanned = self._scan_dir(current)
+            if scanned is None:
+                continue
+            self._dirs[current] = scanned
+            added.extend(_join(current, name) for name in scanned[1])
+            stack.extend(_join(current, name) for name in scanned[2])
+            if on_batch is not None and len(added) - reported >= batch_size:
+                on_batch(added[reported:])
+                reported = len(added)
+        if on_batch is not None and len(added) > reported:
+            on_batch(added[reported:])
+
+    def _drop_tree(self, rel_dir: str, removed: List[str]) -> None:
+        stack = [rel_dir]
+        while stack:
+            current = stack.pop()
+            state = self._dirs.pop(current, None)
+            if state is None:
+                continue
+            removed.extend(_join(current, name) for name in state[1])
+            stack.extend(_join(current, name) for name in state[2])
+
+    def build(self, on_batch: Optional[Callable[[List[str]], None]] = None) -> List[str]:
+        """Scan the whole tree from scratch and return every file, sorted.
+
+        `on_batch`, if given, receives unsorted slices of the files as the
+        walk finds them, so consumers can start before a big tree is done.
+        """
+        files: List[str] = []
+        with self._lock:
+            self._dirs.clear()
+            self._add_tree("", files, on_batch)
+        files.sort(key=sort_key)
+        return files
+
+    def poll(self) -> Tuple[List[str], List[str]]:
+        """Return (added, removed) files since the last build or poll."""
+        added: List[str] = []
+        removed: List[str] = []
+        with self._lock:
+            for rel_dir in list(self._dirs):
+                old = self._dirs.get(rel_dir)
+                if old is None:
+                    # Already dropped along with a removed parent during this poll.
+                    continue
+                try:
+                    mtime = os.stat(self._abs(rel_dir)).st_mtime_ns
+                except OSError:
+                    self._drop_tree(rel_dir, removed)
+                    continue
+                if mtime == old[0]:
+                    continue
+                scanned = self._scan_dir(rel_dir)
+                if scanned is None:
+                    self._drop_tree(rel_dir, removed)
+                    continue
+                self._dirs[rel_dir] = scanned
+                _, files, subdirs = scanned
+                added.extend(_join(rel_dir, name) for name in files - old[1])
+                removed.extend(_join(rel_dir, name) for name in old[1] - files)
+                for name in old[2] - subdirs:
+                    self._drop_tree(_join(rel_dir, name), removed)
+                for name in subdirs - old[2]:
+                    self._add_tree(_join(rel_dir, name), added)
+        added.sort(key=sort_key)
+        return added, removed
+
+
+class ProjectIndexPoller:
+    """Build a ProjectIndex on a daemon thread, then report changes every `interval` seconds.
+
+    Events go to `on_change` as {"type": "project_index", "index": ...} with
+    either "files" (after the initial build) or "added"/"removed" lists.
+    `wake` forces an immediate poll and always produces an event, so the
+    caller can act on it even when nothing changed. `on_files(added, removed)`
+    is called on the poller thread itself, with build batches as they are
+    scanned and with every later diff.
+    """
+
+    def __init__(
+        self,
+        index: ProjectIndex,
+        on_change: Callable[[Dict[str, object]], None],
+        interval: float = 2.0,
+        on_files: Optional[Callable[[List[str], List[str]], None]] = None,
+    ):
+        self.index = index
+        self._on_change = on_change
+        self._on_files = on_files
+        self._interval = interval
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._forced = False
+
+    def start(self) -> None:
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def wake(self) -> None:
+        self._forced = True
+        self._wake.set()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self._wake.set()
+
+    def _run(self) -> None:
+        on_batch = (lambda batch: self._on_files(batch, [])) if self._on_files is not None else None
+        files = self.index.build(on_batch)
+        if self._stopped.is_set():
+            return
+        self._on_change({"type": "project_index", "index": self.index, "files": files})
+        while True:
+            self._wake.wait(self._interval)
+            self._wake.clear()
+            if self._stopped.is_set():
+                return
+            forced, self._forced = self._forced, False
+            added, removed = self.index.poll()
+            if self._on_files is not None and (added or removed):
+                self._on_files(added, removed)
+            if added or removed or forced:
+                self._on_change(
+                    {"type": "project_index", "index": self.index, "added": added, "removed": removed}
+                )
@@ -0,0 +1,213 @@
+"""Parallel find-in-files over a project folder."""
+
+import functools
+import mmap
+import multiprocessing
+import os
+import re
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+# Files at least this big are mapped rather than read, so the OS pages them in as the regex advances.
+MMAP_THRESHOLD_BYTES = 256 * 1024
+# Roughly how many bytes of files one worker task covers; small enough to keep results streaming.
+BATCH_BYTES = 8 * 1024 * 1024
+BATCH_FILES = 256
+MAX_LINE_CHARS = 240
+MAX_MATCHES_PER_FILE = 200
+MAX_TOTAL_MATCHES = 10_000
+
+# (relative path, 1-based line, 0-based column, line text)
+Match = Tuple[str, int, int, str]
+
+
+def compile_query(query: str, is_regex: bool, case_sensitive: bool) -> "re.Pattern[bytes]":
+    """Compile the user's query into a bytes regex; raises re.error for a bad pattern.
+
+    Files are searched as raw bytes, so ignoring case only folds ASCII letters:
+    "é" does not match "É" unless the query says so itself.
+    """
+    source = query if is_regex else re.escape(query)
+    flags = re.MULTILINE | (0 if case_sensitive else re.IGNORECASE)
+    return re.compile(source.encode("utf-8"), flags)
+
+
+@functools.lru_cache(maxsize=8)
+def _worker_pattern(source: bytes, flags: int) -> "re.Pattern[bytes]":
+    return re.compile(source, flags)
+
+
+def _search_buffer(buffer, pattern: "re.Pattern[bytes]", rel_path: str, matches: List[Match]) -> None:
+    line = 1
+    counted_to = 0
+    found = 0
+    for match in pattern.finditer(buffer):
+        start = match.start()
+        # Slicing works for bytes and mmap alike (mmap has no count); the slices never overlap.
+        line += buffer[counted_to:start].count(b"\n")
+        counted_to = start
+        line_start = buffer.rfind(b"\n", 0, start) + 1
+        line_end = buffer.find(b"\n", start)
+        if line_end < 0:
+            line_end = len(buffer)
+        text = bytes(buffer[line_start : min(line_end, line_start + MAX_LINE_CHARS * 4)])
+        column = len(bytes(buffer[line_start:start]).decode("utf-8", errors="replace"))
+        matches.append((rel_path, line, column, text.decode("utf-8", errors="replace")[:MAX_LINE_CHARS].rstrip("\r")))
+        found += 1
+        if found >= MAX_MATCHES_PER_FILE:
+            return
+
+
+def search_files(root: str, rel_paths: Sequence[str], source: bytes, flags: int) -> Tuple[int, List[Match]]:
+    """Search one batch of files in a worker process; returns (files scanned, matches).
+
+    Files with a NUL byte in their first 8 KB are treated as binary and skipped.
+    """
+    pattern = _worker_pattern(source, flags)
+    matches: List[Match] = []
+    scanned = 0
+    for rel_path in rel_paths:
+        try:
+            with open(os.path.join(root, rel_path), "rb") as handle:
+                size = os.fstat(handle.fileno()).st_size
+                if size == 0:
+                    continue
+                if size >= MMAP_THRESHOLD_BYTES:
+                    with mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as view:
+                        if b"\0" in view[:8192]:
+                            continue
+                        scanned += 1
+                        _search_buffer(view, pattern, rel_path, matches)
+                else:
+                    data = handle.read()
+                    if b"\0" in data[:8192]:
+                        continue
+                    scanned += 1
+                    _search_buffer(data, pattern, rel_path, matches)
+        except (OSError, ValueError):
+            continue
+    return scanned, matches
+
+
+class ProjectSearcher:
+    """Fan a search out over a process pool and stream matches back through a callback.
+
+    The pool is created on first use and reused, so later searches skip the
+    worker start-up cost. Events passed to `on_event`:
+    {"type": "search_results", "search_id", "matches"} as batches finish, then
+    {"type": "search_done", "search_id", "files", "matches", "cancelled", "seconds"}.
+    """
+
+    def __init__(self, on_event: Callable[[Dict[str, object]], None], workers: Optional[int] = None):
+        self._on_event = on_event
+        self._workers = workers or os.cpu_count() or 2
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pool_lock = threading.Lock()
+        self._cancel: Optional[threading.Event] = None
+        self._search_id = 0
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._pool_lock:
+            if self._pool is None:
+                # spawn: forking a process that runs Tk and worker threads is not safe.
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self._workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            return self._pool
+
+    def start(self, root: Path, rel_paths: Sequence[str], pattern: "re.Pattern[bytes]") -> int:
+        """Cancel any running search and start a new one; returns its search id."""
+        self.cancel()
+        self._search_id += 1
+        cancel = threading.Event()
+        self._cancel = cancel
+        threading.Thread(
+            target=self._run,
+            args=(self._search_id, str(root), list(rel_paths), pattern, cancel),
+            daemon=True,
+        ).start()
+        return self._search_id
+
+    def cancel(self) -> None:
+        if self._cancel is not None:
+            self._cancel.set()
+            self._cancel = None
+
+    def shutdown(self) -> None:
+        self.cancel()
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
+
+    @staticmethod
+    def _batches(root: str, rel_paths: List[str]) -> Iterator[List[str]]:
+        """Group files into tasks of about BATCH_BYTES, lazily so the first task starts at once."""
+        current: List[str] = []
+        current_bytes = 0
+        for rel_path in rel_paths:
+            try:
+                size = os.path.getsize(os.path.join(root, rel_path))
+            except OSError:
+                continue
+            current.append(rel_path)
+            current_bytes += size
+            if current_bytes >= BATCH_BYTES or len(current) >= BATCH_FILES:
+                yield current
+                current, current_bytes = [], 0
+        if current:
+            yield current
+
+    def _run(
+        self,
+        search_id: int,
+        root: str,
+        rel_paths: List[str],
+        pattern: "re.Pattern[bytes]",
+        cancel: threading.Event,
+    ) -> None:
+        started = time.monotonic()
+        scanned = 0
+        total = 0
+        pool = self._get_pool()
+        pending = set()
+        batches = self._batches(root, rel_paths)
+        # Keep only a couple of tasks per worker queued so cancelling stops the search quickly.
+        for batch in batches:
+            pending.add(pool.submit(search_files, root, batch, pattern.pattern, pattern.flags))
+            if len(pending) >= self._workers * 2:
+                break
+        while pending and not cancel.is_set():
+            done, pending = wait(pending, timeout=0.2, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    files, matches = future.result()
+                except Exception:  # noqa: BLE001
+                    continue
+                scanned += files
+                if matches and not cancel.is_set():
+                    matches = matches[: MAX_TOTAL_MATCHES - total]
+                    total += len(matches)
+                    self._on_event({"type": "search_results", "search_id": search_id, "matches": matches})
+                if total >= MAX_TOTAL_MATCHES:
+                    cancel.set()
+                    break
+                batch = next(batches, None)
+                if batch is not None:
+                    pending.add(pool.submit(search_files, root, batch, pattern.pattern, pattern.flags))
+        for future in pending:
+            future.cancel()
+        self._on_event(
+            {
+                "type": "search_done",
+                "search_id": search_id,
+                "files": scanned,
+                "matches": total,
+                "cancelled": cancel.is_set() and total < MAX_TOTAL_MATCHES,
+                "seconds": round(time.monotonic() - started, 2),
+            }
+        )
@@ -0,0 +1,600 @@
+"""Provider adapters shared by the desktop app and the headless batch runner."""
+
+import http.client
+import json
+import os
+import threading
+import time
+from typing import Callable
+from urllib import error as urlerror
+from urllib import parse as urlparse
+from urllib import request as urlrequest
+
+from groq import Groq
+
+from conversation_store import ConversationStore
+from provider_race import RaceCancelled, build_cancellable_opener
+from rate_limiter import ProviderRateLimiter
+
+PROVIDERS = {
+    "groq": {"label": "Groq", "env_key": "GROQ_API_KEY"},
+    "openai": {"label": "OpenAI", "env_key": "OPENAI_API_KEY"},
+    "anthropic": {"label": "Anthropic", "env_key": "ANTHROPIC_API_KEY"},
+    "gemini": {"label": "Google Gemini", "env_key": "GEMINI_API_KEY"},
+    "xai": {"label": "xAI", "env_key": "XAI_API_KEY"},
+}
+OPENAI_COMPATIBLE_BASE_URL = {
+    "openai": "https://api.openai.com/v1",
+    "xai": "https://api.x.ai/v1",
+}
+
+
+class ProviderClient:
+    """Chat completion adapters for every supported provider, free of any UI state.
+
+    `settings` is the same dict the app persists (only `api_keys` is read here).
+    `reasoning_effort` maps is_agent -> 0/1/2; headless callers get the
+    `LLM_REASONING_EFFORT` environment value (default 1, standard).
+    """
+
+    def __init__(
+        self,
+        settings: dict[str, object] | None = None,
+        rate_limiter: ProviderRateLimiter | None = None,
+        reasoning_effort: Callable[[bool], int] | None = None,
+    ):
+        self.settings: dict[str, object] = settings if settings is not None else {}
+        self.rate_limiter = rate_limiter or ProviderRateLimiter()
+        self.reasoning_effort = reasoning_effort or self._env_reasoning_effort
+        # Per-thread request context; racers bind a CancelToken here for http_json.
+        self.request_local = threading.local()
+
+    @staticmethod
+    def _env_reasoning_effort(is_agent: bool = False) -> int:
+        """Read the reasoning effort level used when no UI selection exists."""
+        try:
+            return min(2, max(0, int(os.getenv("LLM_REASONING_EFFORT", "1"))))
+        except ValueError:
+            return 1
+
+    @staticmethod
+    def provider_label(provider: str) -> str:
+        """Return the display label for a provider id."""
+        info = PROVIDERS.get(provider)
+        return str(info["label"]) if info else provider
+
+    def missing_key_message(self, provider: str) -> str:
+        """Build a provider-specific message shown when an API key is missing."""
+        label = self.provider_label(provider)
+        return f"No {label} key is saved. Click Settings to add your API key."
+
+    def get_api_key(self, provider: str) -> str:
+        """Get api key with configured fallbacks."""
+        if provider not in PROVIDERS:
+            return ""
+        settings_keys = self.settings.get("api_keys", {})
+        if isinstance(settings_keys, dict):
+            key = str(settings_keys.get(provider, "")).strip()
+            if key:
+                return key
+        env_key_name = str(PROVIDERS[provider]["env_key"])
+        return os.getenv(env_key_name, "").strip()
+
+    def http_json(
+        self,
+        method: str,
+        url: str,
+        headers: dict[str, str],
+        body: dict[str, object] | None = None,
+        timeout: int = 45,
+    ) -> dict[str, object]:
+        """Execute an HTTP request and return parsed JSON with normalized errors."""
+        request_headers = dict(headers)
+        payload_data: bytes | None = None
+        if body is not None:
+            payload_data = json.dumps(body).encode("utf-8")
+            request_headers["Content-Type"] = "application/json"
+
+        req = urlrequest.Request(
+            url=url,
+            data=payload_data,
+            headers=request_headers,
+            method=method.upper(),
+        )
+
+        cancel_token = getattr(self.request_local, "cancel_token", None)
+        open_url = build_cancellable_opener(cancel_token).open if cancel_token is not None else urlrequest.urlopen
+
+        try:
+            with open_url(req, timeout=timeout) as response:
+                raw = response.read().decode("utf-8")
+            if cancel_token is not None:
+                cancel_token.raise_if_cancelled()
+        except urlerror.HTTPError as exc:
+            body_text = exc.read().decode("utf-8", errors="replace")
+            message = body_text.strip() or exc.reason
+            try:
+                parsed = json.loads(body_text)
+                if isinstance(parsed, dict):
+                    if isinstance(parsed.get("error"), dict):
+                        msg = str(parsed["error"].get("message", "")).strip()
+                        if msg:
+                            message = msg
+                    elif isinstance(parsed.get("error"), str):
+                        msg = str(parsed["error"]).strip()
+                        if msg:
+                            message = msg
+            except json.JSONDecodeError:
+                pass
+            raise RuntimeError(f"{exc.code} {message}") from exc
+        except urlerror.URLError as exc:
+            if cancel_token is not None and cancel_token.cancelled:
+                raise RaceCancelled("Cancelled: another provider answered first.") from exc
+            reason = str(getattr(exc, "reason", exc))
+            raise RuntimeError(f"Network error: {reason}") from exc
+        except (OSError, http.client.HTTPException) as exc:
+            # A socket shut down by CancelToken surfaces as a reset or truncated read.
+            if cancel_token is not None and cancel_token.cancelled:
+                raise RaceCancelled("Cancelled: another provider answered first.") from exc
+            raise
+
+        if not raw:
+            return {}
+
+        try:
+            parsed_payload = json.loads(raw)
+        except json.JSONDecodeError as exc:
+            raise RuntimeError("Provider returned invalid JSON.") from exc
+        if isinstance(parsed_payload, dict):
+            return parsed_payload
+        raise RuntimeError("Provider returned an unexpected JSON payload.")
+
+    def estimate_token_count(self, text: str) -> int:
+        """Estimate token count when provider usage stats are unavailable."""
+        return ConversationStore.estimate_token_count(text)
+
+    def provider_temperature(self, provider: str) -> float:
+        """Compute temperature for provider-specific behavior."""
+        value = os.getenv(
+            f"{provider.upper()}_TEMPERATURE",
+            os.getenv("LLM_TEMPERATURE", os.getenv("GROQ_TEMPERATURE", "0.7")),
+        )
+        try:
+            return float(value)
+        except ValueError:
+            return 0.7
+
+    def provider_max_tokens(self, provider: str) -> int:
+        """Compute max tokens for provider-specific behavior."""
+        value = os.getenv(
+            f"{provider.upper()}_MAX_TOKENS",
+            os.getenv("LLM_MAX_TOKENS", os.getenv("GROQ_MAX_TOKENS", "1024")),
+        )
+        try:
+            return max(1, int(value))
+        except ValueError:
+            return 1024
+
+    def _extract_openai_compatible_text(self, payload: dict[str, object]) -> str:
+        """Extract assistant text from an OpenAI-compatible completion payload."""
+        choices = payload.get("choices", [])
+        if not isinstance(choices, list) or not choices:
+            return ""
+
+        first = choices[0]
+        if not isinstance(first, dict):
+            return ""
+
+        message = first.get("message")
+        if not isinstance(message, dict):
+            return ""
+
+        content = message.get("content")
+        if isinstance(content, str):
+            return content.strip()
+        if isinstance(content, list):
+            parts: list[str] = []
+            for item in content:
+                if not isinstance(item, dict):
+                    continue
+                text = str(item.get("text", "")).strip()
+                if text:
+                    parts.append(text)
+            return "\n".join(parts).strip()
+        return ""
+
+    def _extract_openai_compatible_usage(self, payload: dict[str, object]) -> dict[str, int]:
+        """Extract usage token fields from an OpenAI-compatible response payload."""
+        usage = payload.get("usage")
+        if not isinstance(usage, dict):
+            return {}
+
+        result: dict[str, int] = {}
+        prompt_tokens = usage.get("prompt_tokens")
+        completion_tokens = usage.get("completion_tokens")
+        total_tokens = usage.get("total_tokens")
+
+        if isinstance(prompt_tokens, (int, float)) and prompt_tokens >= 0:
+            result["prompt_tokens"] = int(round(prompt_tokens))
+        if isinstance(completion_tokens, (int, float)) and completion_tokens >= 0:
+            result["completion_tokens"] = int(round(completion_tokens))
+        if isinstance(total_tokens, (int, float)) and total_tokens >= 0:
+            result["total_tokens"] = int(round(total_tokens))
+        return result
+
+    def _extract_anthropic_usage(self, payload: dict[str, object]) -> dict[str, int]:
+        """Extract usage token fields from an Anthropic response payload."""
+        usage = payload.get("usage")
+        if not isinstance(usage, dict):
+            return {}
+
+        result: dict[str, int] = {}
+        input_tokens = usage.get("input_tokens")
+        output_tokens = usage.get("output_tokens")
+        if isinstance(input_tokens, (int, float)) and input_tokens >= 0:
+            result["prompt_tokens"] = int(round(input_tokens))
+        if isinstance(output_tokens, (int, float)) and output_tokens >= 0:
+            result["completion_tokens"] = int(round(output_tokens))
+        if "prompt_tokens" in result and "completion_tokens" in result:
+            result["total_tokens"] = result["prompt_tokens"] + result["completion_tokens"]
+        return result
+
+    def _extract_gemini_usage(self, payload: dict[str, object]) -> dict[str, int]:
+        """Extract usage token fields from a Gemini response payload."""
+        usage = payload.get("usageMetadata")
+        if not isinstance(usage, dict):
+            return {}
+
+        result: dict[str, int] = {}
+        prompt_tokens = usage.get("promptTokenCount")
+        completion_tokens = usage.get("candidatesTokenCount")
+        total_tokens = usage.get("totalTokenCount")
+
+        if isinstance(prompt_tokens, (int, float)) and prompt_tokens >= 0:
+            result["prompt_tokens"] = int(round(prompt_tokens))
+        if isinstance(completion_tokens, (int, float)) and completion_tokens >= 0:
+            result["completion_tokens"] = int(round(completion_tokens))
+        if isinstance(total_tokens, (int, float)) and total_tokens >= 0:
+            result["total_tokens"] = int(round(total_tokens))
+        return result
+
+    def build_assistant_meta(
+        self,
+        provider: str,
+        model: str,
+        reply_text: str,
+        usage: dict[str, int],
+        response_seconds: float,
+        queue_seconds: float = 0.0,
+    ) -> dict[str, object]:
+        """Build metadata used for hover details on assistant replies."""
+        meta: dict[str, object] = {
+            "provider": provider,
+            "model": model,
+            "response_seconds": round(max(0.0, response_seconds), 3),
+            # Time spent waiting on the client-side rate limiter, excluded from response_seconds.
+            "queue_seconds": round(max(0.0, queue_seconds), 3),
+        }
+        for key in ("prompt_tokens", "completion_tokens", "total_tokens"):
+            value = usage.get(key)
+            if isinstance(value, int) and value >= 0:
+                meta[key] = value
+        if "completion_tokens" in usage:
+            meta["token_count"] = usage["completion_tokens"]
+            meta["token_source"] = "provider"
+        elif "total_tokens" in usage:
+            meta["token_count"] = usage["total_tokens"]
+            meta["token_source"] = "provider"
+        else:
+            meta["token_count"] = self.estimate_token_count(reply_text)
+            meta["token_source"] = "estimated"
+        return meta
+
+    def _chat_with_openai_compatible(
+        self,
+        provider: str,
+        model: str,
+        messages: list[dict[str, str]],
+        is_agent: bool = False,
+    ) -> tuple[str, dict[str, int]]:
+        """Send a chat request using the openai compatible adapter."""
+        base_url = OPENAI_COMPATIBLE_BASE_URL.get(provider, "")
+        if not base_url:
+            raise RuntimeError(f"Unsupported provider: {provider}")
+        api_key = self.get_api_key(provider)
+        if not api_key:
+            raise RuntimeError(self.missing_key_message(provider))
+
+        # Adjust temperature based on reasoning effort
+        base_temp = self.provider_temperature(provider)
+        reasoning_effort = self.reasoning_effort(is_agent)
+        
+        if reasoning_effort == 0:  # Low effort
+            adjusted_temp = min(base_temp, 0.3)  # More deterministic
+        elif reasoning_effort == 2:  # High effort
+            adjusted_temp = max(base_temp, 0.8)  # More creative exploration
+        else:  # Standard effort
+            adjusted_temp = base_temp
+        
+        payload = self.http_json(
+            method="POST",
+            url=f"{base_url}/chat/completions",
+            headers={"Authorization": f"Bearer {api_key}"},
+            body={
+                "model": model,
+                "messages": messages,
+                "temperature": adjusted_temp,
+                "max_tokens": self.provider_max_tokens(provider),
+            },
+        )
+        text = self._extract_openai_compatible_text(payload)
+        if text:
+            return text, self._extract_openai_compatible_usage(payload)
+        raise RuntimeError("No content returned.")
+
+    def _chat_with_groq(self, model: str, messages: list[dict[str, str]], is_agent: bool = False) -> tuple[str, dict[str, int]]:
+        """Send a chat request using the groq adapter."""
+        api_key = self.get_api_key("groq")
+        if not api_key:
+            raise RuntimeError(self.missing_key_message("groq"))
+
+        try:
+            client = Groq(api_key=api_key)
+        except TypeError as e:
+            if "proxies" in str(e):
+                # Handle the case where proxy settings cause issues with Groq client
+                # Create the client without passing proxy-related arguments
+                import os
+                # Temporarily unset proxy environment variables if present
+                original_http_proxy = os.environ.pop('HTTP_PROXY', None)
+                original_https_proxy = os.environ.pop('HTTPS_PROXY', None)
+                
+                try:
+                    client = Groq(api_key=api_key)
+                finally:
+                    # Restore original proxy settings
+                    if original_http_proxy:
+                        os.environ['HTTP_PROXY'] = original_http_proxy
+                    if original_https_proxy:
+                        os.environ['HTTPS_PROXY'] = original_https_proxy
+            else:
+                raise
+        
+        # Adjust temperature based on reasoning effort
+        base_temp = self.provider_temperature("groq")
+        reasoning_effort = self.reasoning_effort(is_agent)
+        
+        if reasoning_effort == 0:  # Low effort
+            adjusted_temp = min(base_temp, 0.3)  # More deterministic
+        elif reasoning_effort == 2:  # High effort
+            adjusted_temp = max(base_temp, 0.8)  # More creative exploration
+        else:  # Standard effort
+            adjusted_temp = base_temp
+        
+        # The Groq SDK owns its sockets; closing the client is the best available abort.
+        cancel_token = getattr(self.request_local, "cancel_token", None)
+        if cancel_token is not None:
+            cancel_token.raise_if_cancelled()
+            cancel_token.on_cancel(client.close)
+        try:
+            completion = client.chat.completions.create(
+                model=model,
+                messages=messages,
+                temperature=adjusted_temp,
+                max_completion_tokens=self.provider_max_tokens("groq"),
+            )
+        except Exception as exc:  # noqa: BLE001
+            if cancel_token is not None and cancel_token.cancelled:
+                raise RaceCancelled("Cancelled: another provider answered first.") from exc
+            raise
+        text = (completion.choices[0].message.content or "").strip()
+        if text:
+            usage_raw = getattr(completion, "usage", None)
+            usage: dict[str, int] = {}
+            if usage_raw is not None:
+                prompt_tokens = getattr(usage_raw, "prompt_tokens", None)
+                completion_tokens = getattr(usage_raw, "completion_tokens", None)
+                total_tokens = getattr(usage_raw, "total_tokens", None)
+                if isinstance(prompt_tokens, int) and prompt_tokens >= 0:
+                    usage["prompt_tokens"] = prompt_tokens
+                if isinstance(completion_tokens, int) and completion_tokens >= 0:
+                    usage["completion_tokens"] = completion_tokens
+                if isinstance(total_tokens, int) and total_tokens >= 0:
+                    usage["total_tokens"] = total_tokens
+            return text, usage
+        raise RuntimeError("No content returned.")
+
+    def _chat_with_anthropic(self, model: str, messages: list[dict[str, str]], is_agent: bool = False) -> tuple[str, dict[str, int]]:
+        """Send a chat request using the anthropic adapter."""
+        api_key = self.get_api_key("anthropic")
+        if not api_key:
+            raise RuntimeError(self.missing_key_message("anthropic"))
+
+        system_blocks = [m["content"] for m in messages if m.get("role") == "system"]
+        chat_messages = [
+            {"role": m["role"], "content": m["content"]}
+            for m in messages
+            if m.get("role") in {"user", "assistant"}
+        ]
+        if not chat_messages:
+            chat_messages = [{"role": "user", "content": "Hello"}]
+
+        body: dict[str, object] = {
+            "model": model,
+            "messages": chat_messages,
+            "max_tokens": self.provider_max_tokens("anthropic"),
+            "temperature": self.provider_temperature("anthropic"),
+        }
+        
+        # Add reasoning effort settings based on user selection
+        reasoning_effort = self.reasoning_effort(is_agent)
+        if reasoning_effort == 0:  # Low effort
+            body["temperature"] = min(body["temperature"], 0.3)  # Lower temperature for more focused responses
+        elif reasoning_effort == 2:  # High effort
+            # For Claude models, we can enable advanced reasoning features
+            body["extra_body"] = {
+                "beta": ["reasoning"]  # Enable reasoning beta feature if available
+            }
+            # Higher temperature for more creative, thorough responses
+            body["temperature"] = max(body["temperature"], 0.8)
+        
+        if system_blocks:
+            body["system"] = "\n\n".join(system_blocks)
+
+        payload = self.http_json(
+            method="POST",
+            url="https://api.anthropic.com/v1/messages",
+            headers={
+                "x-api-key": api_key,
+                "anthropic-version": os.getenv("ANTHROPIC_VERSION", "2023-06-01"),
+            },
+            body=body,
+        )
+        content = payload.get("content", [])
+        if isinstance(content, list):
+            text_parts = []
+            for item in content:
+                if not isinstance(item, dict):
+                    continue
+                if str(item.get("type", "")).strip() != "text":
+                    continue
+                text = str(item.get("text", "")).strip()
+                if text:
+                    text_parts.append(text)
+            if text_parts:
+                return "\n".join(text_parts).strip(), self._extract_anthropic_usage(payload)
+        raise RuntimeError("No content returned.")
+
+    def _chat_with_gemini(self, model: str, messages: list[dict[str, str]], is_agent: bool = False) -> tuple[str, dict[str, int]]:
+        """Send a chat request using the gemini adapter."""
+        api_key = self.get_api_key("gemini")
+        if not api_key:
+            raise RuntimeError(self.missing_key_message("gemini"))
+
+        system_blocks: list[str] = []
+        contents: list[dict[str, object]] = []
+        for item in messages:
+            role = item.get("role")
+            text = item.get("content", "").strip()
+            if not text:
+                continue
+            if role == "system":
+                system_blocks.append(text)
+                continue
+            if role == "assistant":
+                gem_role = "model"
+            elif role == "user":
+                gem_role = "user"
+            else:
+                continue
+            contents.append({"role": gem_role, "parts": [{"text": text}]})
+
+        if not contents:
+            contents = [{"role": "user", "parts": [{"text": "Hello"}]}]
+
+        # Adjust temperature based on reasoning effort
+        base_temp = self.provider_temperature("gemini")
+        reasoning_effort = self.reasoning_effort(is_agent)
+        
+        if reasoning_effort == 0:  # Low effort
+            adjusted_temp = min(base_temp, 0.3)  # More deterministic
+        elif reasoning_effort == 2:  # High effort
+            adjusted_temp = max(base_temp, 0.8)  # More creative exploration
+        else:  # Standard effort
+            adjusted_temp = base_temp
+
+        body: dict[str, object] = {
+            "contents": contents,
+            "generationConfig": {
+                "temperature": adjusted_temp,
+                "maxOutputTokens": self.provider_max_tokens("gemini"),
+            },
+        }
+        if system_blocks:
+            body["systemInstruction"] = {
+                "parts": [{"text": "\n\n".join(system_blocks)}],
+            }
+
+        model_path = urlparse.quote(model, safe="")
+        payload = self.http_json(
+            method="POST",
+            url=f"https://generativelanguage.googleapis.com/v1beta/models/{model_path}:generateContent",
+            headers={"x-goog-api-key": api_key},
+            body=body,
+        )
+        candidates = payload.get("candidates", [])
+        if isinstance(candidates, list) and candidates:
+            first = candidates[0]
+            if isinstance(first, dict):
+                content = first.get("content", {})
+                if isinstance(content, dict):
+                    parts = content.get("parts", [])
+                    if isinstance(parts, list):
+                        text_parts: list[str] = []
+                        for part in parts:
+                            if not isinstance(part, dict):
+                                continue
+                            text = str(part.get("text", "")).strip()
+                            if text:
+                                text_parts.append(text)
+                        if text_parts:
+                            return "\n".join(text_parts).strip(), self._extract_gemini_usage(payload)
+        raise RuntimeError("No content returned.")
+
+    def chat(
+        self,
+        provider: str,
+        model: str,
+        messages: list[dict[str, str]],
+        is_agent: bool = False,
+    ) -> tuple[str, dict[str, int]]:
+        """Send a chat request using the provider adapter."""
+        wanted = provider.strip().lower()
+        if wanted == "groq":
+            return self._chat_with_groq(model, messages, is_agent)
+        if wanted in OPENAI_COMPATIBLE_BASE_URL:
+            return self._chat_with_openai_compatible(wanted, model, messages, is_agent)
+        if wanted == "anthropic":
+            return self._chat_with_anthropic(model, messages, is_agent)
+        if wanted == "gemini":
+            return self._chat_with_gemini(model, messages, is_agent)
+        raise RuntimeError(f"Unsupported provider: {provider}")
+
+    def complete(
+        self,
+        provider: str,
+        model: str,
+        messages: list[dict[str, str]],
+        is_agent: bool = False,
+    ) -> tuple[str, dict[str, object]]:
+        """Send one rate-limited chat request and return the reply with assistant meta."""
+        # Reserve prompt plus the completion ceiling; settle() refunds the unused part.
+        prompt_tokens = sum(self.estimate_token_count(str(item.get("content", ""))) for item in messages)
+        estimated_tokens = prompt_tokens + self.provider_max_tokens(provider)
+        reservation = self.rate_limiter.acquire(provider, model, tokens=estimated_tokens)
+
+        # Monotonic clock avoids wall-clock jumps in latency stats.
+        started = time.monotonic()
+        # A request that fails or times out returns its whole token reservation; it still used a request slot.
+        actual_tokens: int | None = 0
+        try:
+            reply_text, usage = self.chat(provider, model, messages, is_agent=is_agent)
+            elapsed = max(0.0, time.monotonic() - started)
+            actual_tokens = usage.get("total_tokens")
+            if actual_tokens is None and "prompt_tokens" in usage and "completion_tokens" in usage:
+                actual_tokens = usage["prompt_tokens"] + usage["completion_tokens"]
+            if actual_tokens is None:
+                # No usage reported: charge the estimated prompt plus the reply actually received.
+                actual_tokens = prompt_tokens + self.estimate_token_count(reply_text)
+        finally:
+            self.rate_limiter.settle(reservation, actual_tokens)
+
+        meta = self.build_assistant_meta(
+            provider=provider,
+            model=model,
+            reply_text=reply_text,
+            usage=usage,
+            response_seconds=elapsed,
+            queue_seconds=reservation.waited_seconds,
+        )
+        return reply_text, meta
@@ -0,0 +1,222 @@
+"""First-response-wins racing across provider/model pairs."""
+
+import http.client
+import json
+import os
+import socket
+import threading
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+from urllib import request as urlrequest
+
+RACE_PATH = Path(
+    os.getenv(
+        "AI_CHATROOM_RACE_PATH",
+        str(Path.home() / ".ai_goonbox_race.json"),
+    )
+)
+
+
+class RaceCancelled(RuntimeError):
+    """Raised inside a racer whose request was aborted because another pair won."""
+
+
+class CancelToken:
+    """Cancellation handle shared between a race coordinator and one racer."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._cancelled = False
+        self._callbacks: List[Callable[[], None]] = []
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled
+
+    def on_cancel(self, callback: Callable[[], None]) -> None:
+        """Register an abort hook; runs immediately if the token is already cancelled."""
+        with self._lock:
+            if not self._cancelled:
+                self._callbacks.append(callback)
+                return
+        self._run(callback)
+
+    def track_connection(self, connection: http.client.HTTPConnection) -> None:
+        """Shut down the connection's socket on cancel so a blocked read returns at once."""
+        def abort() -> None:
+            sock = getattr(connection, "sock", None)
+            if sock is not None:
+                # shutdown() wakes a recv() blocked in another thread; close() alone does not.
+                sock.shutdown(socket.SHUT_RDWR)
+
+        self.on_cancel(abort)
+
+    def cancel(self) -> None:
+        """Mark the token cancelled and fire every registered abort hook once."""
+        with self._lock:
+            if self._cancelled:
+                return
+            self._cancelled = True
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            self._run(callback)
+
+    def raise_if_cancelled(self) -> None:
+        if self._cancelled:
+            raise RaceCancelled("Cancelled: another provider answered first.")
+
+    @staticmethod
+    def _run(callback: Callable[[], None]) -> None:
+        try:
+            callback()
+        except Exception:  # noqa: BLE001
+            # Aborting is best effort; the connection may already be gone.
+            pass
+
+
+class _CancellableHTTPHandler(urlrequest.HTTPHandler):
+    def __init__(self, token: CancelToken):
+        super().__init__()
+        self._token = token
+
+    def http_open(self, req):
+        def connect(host, **kwargs):
+            self._token.raise_if_cancelled()
+            connection = http.client.HTTPConnection(host, **kwargs)
+            self._token.track_connection(connection)
+            return connection
+
+        return self.do_open(connect, req)
+
+
+class _CancellableHTTPSHandler(urlrequest.HTTPSHandler):
+    def __init__(self, token: CancelToken):
+        super().__init__()
+        self._token = token
+
+    def https_open(self, req):
+        def connect(host, **kwargs):
+            self._token.raise_if_cancelled()
+            connection = http.client.HTTPSConnection(host, **kwargs)
+            self._token.track_connection(connection)
+            return connection
+
+        return self.do_open(connect, req, context=self._context)
+
+
+def build_cancellable_opener(token: CancelToken) -> urlrequest.OpenerDirector:
+    """Build a urllib opener whose sockets are torn down when `token` is cancelled."""
+    return urlrequest.build_opener(_CancellableHTTPHandler(token), _CancellableHTTPSHandler(token))
+
+
+def pair_key(provider: str, model: str) -> str:
+    return f"{provider.strip().lower()}:{model.strip()}"
+
+
+def split_pair_key(key: str) -> tuple:
+    provider, _, model = key.partition(":")
+    return provider, model
+
+
+class RaceStore:
+    """Persist race targets, the on/off switch, and per-pair win statistics."""
+
+    def __init__(self, path: Path = RACE_PATH):
+        self.path = path
+        self.enabled = False
+        self.targets: List[str] = []
+        self.stats: Dict[str, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+        self.load()
+
+    def load(self) -> None:
+        if not self.path.exists():
+            return
+        try:
+            payload = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError):
+            return
+        if not isinstance(payload, dict):
+            return
+        self.enabled = bool(payload.get("enabled", False))
+        targets = payload.get("targets")
+        if isinstance(targets, list):
+            self.targets = [str(item) for item in targets if ":" in str(item)]
+        stats = payload.get("stats")
+        if isinstance(stats, dict):
+            self.stats = {str(k): dict(v) for k, v in stats.items() if isinstance(v, dict)}
+
+    def save(self) -> None:
+        with self._lock:
+            payload = {"enabled": self.enabled, "targets": list(self.targets), "stats": dict(self.stats)}
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            temp_path = self.path.with_suffix(".tmp")
+            temp_path.write_text(json.dumps(payload, indent=2), encoding="utf-8")
+            temp_path.replace(self.path)
+        except OSError:
+            pass
+
+    def record_race(
+        self,
+        winner: Optional[str],
+        outcomes: Dict[str, Dict[str, object]],
+        margin_seconds: Optional[float] = None,
+    ) -> None:
+        """Fold one finished race into the per-pair counters.
+
+        `outcomes` maps each pair key to {"status": "won"|"lost"|"cancelled"|"error",
+        "seconds": float}. Latency averages only use completed replies, since a
+        cancelled racer's elapsed time is a lower bound, not a measurement.
+        """
+        with self._lock:
+            for key, outcome in outcomes.items():
+                entry = self.stats.setdefault(
+                    key,
+                    {
+                        "races": 0,
+                        "wins": 0,
+                        "errors": 0,
+                        "completed": 0,
+                        "total_seconds": 0.0,
+                        "total_margin_seconds": 0.0,
+                        "margin_count": 0,
+                    },
+                )
+                entry["races"] += 1
+                status = outcome.get("status")
+                if key == winner:
+                    entry["wins"] += 1
+                    if margin_seconds is not None:
+                        entry["total_margin_seconds"] += margin_seconds
+                        entry["margin_count"] += 1
+                if status == "error":
+                    entry["errors"] += 1
+                if status in {"won", "lost"}:
+                    entry["completed"] += 1
+                    entry["total_seconds"] += float(outcome.get("seconds", 0.0))
+        self.save()
+
+    def summary(self) -> List[Dict[str, object]]:
+        """Return per-pair rows sorted by win rate, then average latency."""
+        rows: List[Dict[str, object]] = []
+        with self._lock:
+            for key, entry in self.stats.items():
+                races = int(entry.get("races", 0))
+                completed = int(entry.get("completed", 0))
+                margin_count = int(entry.get("margin_count", 0))
+                rows.append(
+                    {
+                        "pair": key,
+                        "races": races,
+                        "wins": int(entry.get("wins", 0)),
+                        "errors": int(entry.get("errors", 0)),
+                        "win_rate": (entry.get("wins", 0) / races) if races else 0.0,
+                        "avg_seconds": (entry.get("total_seconds", 0.0) / completed) if completed else None,
+                        "avg_margin_seconds": (
+                            entry.get("total_margin_seconds", 0.0) / margin_count if margin_count else None
+                        ),
+                    }
+                )
+        rows.sort(key=lambda row: (-row["win_rate"], row["avg_seconds"] if row["avg_seconds"] is not None else 1e9))
+        return rows
@@ -0,0 +1,156 @@
+"""Client-side rate limiting for provider requests."""
+
+import os
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, Optional, Tuple
+
+
+class TokenBucket:
+    """Continuously refilling bucket sized to a per-minute budget."""
+
+    def __init__(self, per_minute: int, clock: Callable[[], float] = time.monotonic):
+        self.capacity = float(per_minute)
+        self.rate = float(per_minute) / 60.0
+        self.level = float(per_minute)
+        self._clock = clock
+        self._updated = clock()
+
+    def _refill(self) -> None:
+        """Add whatever has accrued since the last refill, capped at capacity."""
+        now = self._clock()
+        elapsed = max(0.0, now - self._updated)
+        self._updated = now
+        self.level = min(self.capacity, self.level + elapsed * self.rate)
+
+    def wait_time(self, amount: float) -> float:
+        """Return seconds until `amount` can be taken (0 when available now)."""
+        self._refill()
+        # A single request larger than the whole budget would never fit; let it
+        # through once the bucket is full so it cannot starve the queue forever.
+        wanted = min(amount, self.capacity)
+        if self.level >= wanted:
+            return 0.0
+        return (wanted - self.level) / self.rate
+
+    def take(self, amount: float) -> None:
+        """Debit the bucket; the level may go negative to carry debt forward."""
+        self._refill()
+        self.level -= amount
+
+    def give_back(self, amount: float) -> None:
+        """Credit unused reservation back to the bucket."""
+        self._refill()
+        self.level = min(self.capacity, self.level + amount)
+
+
+class RateLimitReservation:
+    """Budget held by one in-flight request until its real usage is known."""
+
+    def __init__(self, key: Tuple[str, str], reserved_tokens: int, waited_seconds: float):
+        self.key = key
+        self.reserved_tokens = reserved_tokens
+        self.waited_seconds = waited_seconds
+
+
+class _LimitState:
+    """Buckets and FIFO wait queue for one provider+model pair."""
+
+    def __init__(self, rpm: int, tpm: int):
+        self.requests = TokenBucket(rpm) if rpm > 0 else None
+        self.tokens = TokenBucket(tpm) if tpm > 0 else None
+        self.waiters: deque = deque()
+
+
+class ProviderRateLimiter:
+    """Enforce requests/min and tokens/min budgets per provider and model.
+
+    Budgets come from `<PROVIDER>_RPM` / `<PROVIDER>_TPM` with `LLM_RPM` /
+    `LLM_TPM` as fallbacks; 0 or unset disables that budget. Callers that
+    exceed the budget block in arrival order, so a burst from one chat cannot
+    starve the IDE agent queued behind it.
+    """
+
+    def __init__(self, limits: Optional[Callable[[str], Tuple[int, int]]] = None):
+        self._limits = limits or self.limits_from_env
+        self._lock = threading.Lock()
+        self._cond = threading.Condition(self._lock)
+        self._states: Dict[Tuple[str, str], _LimitState] = {}
+
+    @staticmethod
+    def limits_from_env(provider: str) -> Tuple[int, int]:
+        """Read the (rpm, tpm) budget for a provider from environment variables."""
+        def read(name: str, fallback: str) -> int:
+            value = os.getenv(f"{provider.upper()}_{name}", os.getenv(fallback, "0"))
+            try:
+                return max(0, int(value))
+            except ValueError:
+                return 0
+
+        return read("RPM", "LLM_RPM"), read("TPM", "LLM_TPM")
+
+    def _state_for(self, key: Tuple[str, str]) -> _LimitState:
+        """Return the limiter state for a key, creating it on first use."""
+        state = self._states.get(key)
+        if state is None:
+            rpm, tpm = self._limits(key[0])
+            state = _LimitState(rpm, tpm)
+            self._states[key] = state
+        return state
+
+    def acquire(self, provider: str, model: str, tokens: int = 0) -> RateLimitReservation:
+        """Block until one request plus `tokens` fits the budget, then reserve it."""
+        key = (provider.strip().lower(), model.strip())
+        started = time.monotonic()
+        ticket = object()
+        with self._cond:
+            state = self._state_for(key)
+            if state.requests is None and state.tokens is None:
+                return RateLimitReservation(key, 0, 0.0)
+
+            state.waiters.append(ticket)
+            try:
+                while True:
+                    if state.waiters[0] is ticket:
+                        delay = 0.0
+                        if state.requests is not None:
+                            delay = max(delay, state.requests.wait_time(1))
+                        if state.tokens is not None:
+                            delay = max(delay, state.tokens.wait_time(tokens))
+                        if delay <= 0:
+                            break
+                        self._cond.wait(timeout=delay)
+                    else:
+                        # Only the head of the queue may draw from the buckets.
+                        self._cond.wait()
+                if state.requests is not None:
+                    state.requests.take(1)
+                reserved = 0
+                if state.tokens is not None:
+                    reserved = min(tokens, int(state.tokens.capacity))
+                    state.tokens.take(reserved)
+            finally:
+                state.waiters.remove(ticket)
+                self._cond.notify_all()
+
+        return RateLimitReservation(key, reserved, time.monotonic() - started)
+
+    def settle(self, reservation: RateLimitReservation, actual_tokens: Optional[int]) -> None:
+        """Reconcile a reservation with the token usage the provider reported.
+
+        None keeps the whole reservation charged, so a caller whose provider
+        reports no usage should pass an estimate instead.
+        """
+        if actual_tokens is None or reservation.reserved_tokens <= 0:
+            return
+        with self._cond:
+            state = self._states.get(reservation.key)
+            if state is None or state.tokens is None:
+                return
+            difference = actual_tokens - reservation.reserved_tokens
+            if difference > 0:
+                state.tokens.take(difference)
+            elif difference < 0:
+                state.tokens.give_back(-difference)
+                self._cond.notify_all()
@@ -38,9 +38,6 @@ class ResponseAnalyzer:
         """Compare responses for same question from different models."""
         analyses = chat.get("response_analysis", [])
         
-        if question_index >= len(analyses):
-            return {}
-        
         comparison = {
             "question_index": question_index,
             "responses": [],
@@ -51,6 +48,18 @@ class ResponseAnalyzer:
             if analysis.get("question_index") == question_index:
                 comparison["responses"].append(analysis)
         
+        if not comparison["responses"]:
+            return {}
+        
+        timed = [r for r in comparison["responses"] if r.get("response_seconds") is not None]
+        if timed:
+            fastest = min(timed, key=lambda r: r["response_seconds"])
+            slowest = max(timed, key=lambda r: r["response_seconds"])
+            comparison["fastest"] = f"{fastest.get('provider')}:{fastest.get('model')}"
+            comparison["slowest"] = f"{slowest.get('provider')}:{slowest.get('model')}"
+        longest = max(comparison["responses"], key=lambda r: r.get("length", 0))
+        comparison["longest"] = f"{longest.get('provider')}:{longest.get('model')}"
+        
         return comparison
     
     @staticmethod
@@ -69,17 +78,31 @@ class ResponseAnalyzer:
                     "avg_length": 0,
                     "total_words": 0,
                     "avg_words": 0,
+                    "timed_count": 0,
+                    "total_response_seconds": 0.0,
+                    "avg_response_seconds": 0.0,
+                    "total_tokens": 0,
+                    "avg_tokens": 0,
                 }
             
             model_stats[model]["count"] += 1
             model_stats[model]["total_length"] += analysis.get("length", 0)
             model_stats[model]["total_words"] += analysis.get("word_count", 0)
+            model_stats[model]["total_tokens"] += analysis.get("token_count", 0)
+            if analysis.get("response_seconds") is not None:
+                model_stats[model]["timed_count"] += 1
+                model_stats[model]["total_response_seconds"] += analysis["response_seconds"]
         
         # Calculate averages
         for model, stats in model_stats.items():
             if stats["count"] > 0:
                 stats["avg_length"] = int(stats["total_length"] / stats["count"])
                 stats["avg_words"] = int(stats["total_words"] / stats["count"])
+                stats["avg_tokens"] = int(stats["total_tokens"] / stats["count"])
+            if stats["timed_count"] > 0:
+                stats["avg_response_seconds"] = round(
+                    stats["total_response_seconds"] / stats["timed_count"], 3
+                )
         
         return model_stats
     
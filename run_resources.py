@@ -0,0 +1,106 @@
+"""Resource accounting and limits for IDE script runs."""
+
+import os
+import subprocess
+import sys
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def apply_limits(pid: int, max_memory_mb: int = 0, max_cpu_seconds: int = 0) -> bool:
+    """Cap a running child's address space and CPU time; 0 leaves a limit unset.
+
+    Uses prlimit on the child's pid instead of a preexec_fn, which is unsafe
+    in a process with threads. Returns False where that is not available
+    (only Linux has prlimit), in which case the run goes ahead unlimited.
+    """
+    if not (max_memory_mb or max_cpu_seconds):
+        return True
+    if resource is None or not hasattr(resource, "prlimit"):
+        return False
+    try:
+        if max_memory_mb:
+            limit = max_memory_mb * 1024 * 1024
+            resource.prlimit(pid, resource.RLIMIT_AS, (limit, limit))
+        if max_cpu_seconds:
+            # Soft limit sends SIGXCPU; the hard limit a second later is a SIGKILL backstop.
+            resource.prlimit(pid, resource.RLIMIT_CPU, (max_cpu_seconds, max_cpu_seconds + 1))
+    except (OSError, ValueError):
+        return False
+    return True
+
+
+def process_cpu_seconds(pid: int) -> Optional[Tuple[float, float]]:
+    """(user, system) CPU seconds a running process has used so far, or None where /proc is unavailable."""
+    try:
+        with open(f"/proc/{pid}/stat", encoding="ascii") as handle:
+            stat = handle.read()
+        # Fields after the parenthesised command name, which may itself contain spaces.
+        fields = stat[stat.rindex(")") + 2 :].split()
+        ticks = os.sysconf("SC_CLK_TCK")
+        return int(fields[11]) / ticks, int(fields[12]) / ticks
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+def wait_with_usage(
+    process: subprocess.Popen,
+    timeout: Optional[float],
+    cpu_before: Optional[Tuple[float, float]] = None,
+) -> Tuple[bool, Dict[str, float]]:
+    """Wait for `process`, killing it after `timeout` seconds; returns (timed_out, usage).
+
+    Usage always has "wall_seconds". Where os.wait4 exists it also has
+    "user_seconds", "system_seconds" and "max_rss_kb" for this one child,
+    unlike RUSAGE_CHILDREN, which would mix in every other process the app
+    has waited for. `cpu_before`, from process_cpu_seconds, is CPU time the
+    process spent before the measured work (a warm interpreter's preloads)
+    and is left out of the CPU figures; peak RSS cannot be split that way.
+    """
+    started = time.monotonic()
+    if not hasattr(os, "wait4"):
+        try:
+            process.wait(timeout=timeout)
+            timed_out = False
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+            timed_out = True
+        return timed_out, {"wall_seconds": round(time.monotonic() - started, 3)}
+
+    fired = threading.Event()
+
+    def kill() -> None:
+        fired.set()
+        process.kill()
+
+    timer = threading.Timer(timeout, kill) if timeout is not None else None
+    if timer is not None:
+        timer.daemon = True
+        timer.start()
+    usage: Dict[str, float] = {}
+    try:
+        _, status, rusage = os.wait4(process.pid, 0)
+        process.returncode = os.waitstatus_to_exitcode(status)
+        # ru_maxrss is kilobytes on Linux but bytes on macOS.
+        max_rss = rusage.ru_maxrss // 1024 if sys.platform == "darwin" else rusage.ru_maxrss
+        user_before, system_before = cpu_before or (0.0, 0.0)
+        usage = {
+            "user_seconds": round(max(0.0, rusage.ru_utime - user_before), 3),
+            "system_seconds": round(max(0.0, rusage.ru_stime - system_before), 3),
+            "max_rss_kb": max_rss,
+        }
+    except ChildProcessError:
+        # Already reaped by a concurrent poll() (the Stop button); only wall time is known.
+        process.wait()
+    finally:
+        if timer is not None:
+            timer.cancel()
+    usage["wall_seconds"] = round(time.monotonic() - started, 3)
+    return fired.is_set(), usage
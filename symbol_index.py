@@ -0,0 +1,290 @@
+"""Project-wide index of Python classes and functions, parsed with ast and cached on disk."""
+
+import ast
+import hashlib
+import json
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from fuzzy_finder import FuzzyFileIndex
+
+SYMBOL_CACHE_DIR = Path(
+    os.getenv(
+        "AI_CHATROOM_SYMBOL_CACHE_DIR",
+        str(Path.home() / ".ai_goonbox_symbols"),
+    )
+)
+# Below this many files to parse, a process pool costs more to start than it saves.
+POOL_MIN_FILES = 16
+# Files bigger than this are skipped; they are almost always generated code.
+MAX_PARSE_BYTES = 2 * 1024 * 1024
+
+# (kind, qualified name, line, indent depth), with kind "class", "def" or "async def".
+Symbol = Tuple[str, str, int, int]
+
+
+def extract_symbols(source: str) -> List[Symbol]:
+    """Classes and functions in `source`, in file order, with dotted names for nested ones."""
+    tree = ast.parse(source)
+    symbols: List[Symbol] = []
+
+    def visit(body: Iterable[ast.stmt], prefix: str, depth: int) -> None:
+        for node in body:
+            if isinstance(node, ast.ClassDef):
+                kind = "class"
+            elif isinstance(node, ast.AsyncFunctionDef):
+                kind = "async def"
+            elif isinstance(node, ast.FunctionDef):
+                kind = "def"
+            else:
+                continue
+            name = f"{prefix}{node.name}"
+            symbols.append((kind, name, node.lineno, depth))
+            visit(node.body, f"{name}.", depth + 1)
+
+    visit(tree.body, "", 0)
+    return symbols
+
+
+def parse_file(path: str) -> Tuple[str, int, int, Optional[List[Symbol]]]:
+    """Parse one file in a worker; returns (path, mtime_ns, size, symbols).
+
+    Symbols are None for a file that is too big or does not parse, which is
+    still cached so it is not retried until it changes. An unreadable file
+    comes back with an mtime of -1.
+    """
+    try:
+        stat = os.stat(path)
+        if stat.st_size > MAX_PARSE_BYTES:
+            return path, stat.st_mtime_ns, stat.st_size, None
+        with open(path, "rb") as handle:
+            source = handle.read().decode("utf-8", errors="replace")
+    except OSError:
+        return path, -1, -1, None
+    try:
+        return path, stat.st_mtime_ns, stat.st_size, extract_symbols(source)
+    except (SyntaxError, ValueError, RecursionError):
+        return path, stat.st_mtime_ns, stat.st_size, None
+
+
+class SymbolIndex:
+    """Symbols of a project's Python files, kept current file by file.
+
+    Results are cached per project in a JSON file keyed by path, mtime and
+    size, so reopening a project only re-parses files that changed. `update`
+    reconciles the index with a full file list and parses in a process pool;
+    `refresh` re-parses just the given files, for saves and agent writes.
+    Both run on a background thread and report the absolute paths whose
+    symbols changed through `on_change`, as {"type": "symbol_index",
+    "index": ..., "paths": [...]}.
+
+    Distinct symbol names, with dots as "/", also go into a FuzzyFileIndex,
+    so a search costs what quick-open does rather than a score per symbol.
+    """
+
+    def __init__(self, root: Path, on_change: Callable[[Dict[str, object]], None]):
+        self.root = root
+        self._on_change = on_change
+        self._lock = threading.Lock()
+        # path -> (mtime_ns, size, symbols); None symbols mark files that failed to parse.
+        self._entries: Dict[str, Tuple[int, int, Optional[List[Symbol]]]] = {}
+        # fuzzy key of a symbol name -> {path: how many of its symbols have that name}.
+        self._name_paths: Dict[str, Dict[str, int]] = {}
+        self._names = FuzzyFileIndex()
+        # Cached names are indexed by the first background run, not on the Tk thread that loads the cache.
+        self._names_indexed = False
+        digest = hashlib.blake2b(str(root.resolve()).encode("utf-8"), digest_size=8).hexdigest()
+        self.cache_path = SYMBOL_CACHE_DIR / f"{digest}.json"
+        self._work = threading.Lock()
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._load_cache()
+
+    def _load_cache(self) -> None:
+        try:
+            payload = json.loads(self.cache_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return
+        if not isinstance(payload, dict):
+            return
+        for path, entry in payload.items():
+            try:
+                mtime, size, symbols = entry
+                self._entries[path] = (
+                    int(mtime),
+                    int(size),
+                    None if symbols is None else [(str(k), str(n), int(l), int(d)) for k, n, l, d in symbols],
+                )
+            except (TypeError, ValueError):
+                continue
+        for path, entry in self._entries.items():
+            self._index_names(path, None, entry[2], [], [])
+
+    def _index_names(
+        self,
+        path: str,
+        old: Optional[List[Symbol]],
+        new: Optional[List[Symbol]],
+        added: List[str],
+        removed: List[str],
+    ) -> None:
+        """Move `path` from its `old` symbols to its `new` ones, collecting names that appear or vanish."""
+        for symbol in old or ():
+            key = symbol[1].replace(".", "/")
+            holders = self._name_paths[key]
+            holders[path] -= 1
+            if not holders[path]:
+                del holders[path]
+                if not holders:
+                    del self._name_paths[key]
+                    removed.append(key)
+        for symbol in new or ():
+            key = symbol[1].replace(".", "/")
+            holders = self._name_paths.setdefault(key, {})
+            if not holders:
+                added.append(key)
+            holders[path] = holders.get(path, 0) + 1
+
+    def _save_cache(self) -> None:
+        with self._lock:
+            payload = {path: list(entry) for path, entry in self._entries.items()}
+        try:
+            self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+            temp_path = self.cache_path.with_suffix(".tmp")
+            temp_path.write_text(json.dumps(payload), encoding="utf-8")
+            temp_path.replace(self.cache_path)
+        except OSError:
+            pass
+
+    def _stale(self, paths: Sequence[str]) -> List[str]:
+        with self._lock:
+            known = {path: entry[:2] for path, entry in self._entries.items()}
+        stale = []
+        for path in paths:
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            if known.get(path) != (stat.st_mtime_ns, stat.st_size):
+                stale.append(path)
+        return stale
+
+    def _parse(self, paths: Sequence[str]) -> List[Tuple[str, int, int, Optional[List[Symbol]]]]:
+        if len(paths) < POOL_MIN_FILES:
+            return [parse_file(path) for path in paths]
+        if self._pool is None:
+            # spawn: forking a process that runs Tk and worker threads is not safe.
+            self._pool = ProcessPoolExecutor(mp_context=multiprocessing.get_context("spawn"))
+        chunk = max(1, len(paths) // ((os.cpu_count() or 2) * 4))
+        return list(self._pool.map(parse_file, paths, chunksize=chunk))
+
+    def _run(self, paths: Sequence[str], removed: Optional[Sequence[str]]) -> None:
+        with self._work:
+            if not self._names_indexed:
+                with self._lock:
+                    names = list(self._name_paths)
+                self._names.apply(names)
+                self._names_indexed = True
+            changed: List[str] = []
+            # Symbol names that appear in, or vanish from, the project.
+            names_added: List[str] = []
+            names_removed: List[str] = []
+            with self._lock:
+                if removed is None:
+                    keep = set(paths)
+                    removed = [path for path in self._entries if path not in keep]
+                for path in removed:
+                    old = self._entries.pop(path, None)
+                    if old is not None:
+                        self._index_names(path, old[2], None, names_added, names_removed)
+                        changed.append(path)
+            stale = self._stale(paths)
+            for path, mtime, size, symbols in self._parse(stale):
+                with self._lock:
+                    if mtime < 0:
+                        old = self._entries.pop(path, None)
+                        if old is not None:
+                            self._index_names(path, old[2], None, names_added, names_removed)
+                            changed.append(path)
+                        continue
+                    old = self._entries.get(path)
+                    self._entries[path] = (mtime, size, symbols)
+                    if old is None or old[2] != symbols:
+                        self._index_names(path, None if old is None else old[2], symbols, names_added, names_removed)
+                if old is None or old[2] != symbols:
+                    changed.append(path)
+            if names_added or names_removed:
+                # A name can come and go more than once in a run; what counts is where it ended up.
+                with self._lock:
+                    touched = set(names_added) | set(names_removed)
+                    present = [name for name in touched if name in self._name_paths]
+                    gone = [name for name in touched if name not in self._name_paths]
+                self._names.apply(present, gone)
+            if stale or changed:
+                # Parsed files whose symbols came out the same still have a new mtime to remember.
+                self._save_cache()
+            self._on_change({"type": "symbol_index", "index": self, "paths": changed})
+
+    def update(self, paths: Sequence[str]) -> None:
+        """Make the index hold exactly `paths`, parsing only new or modified files."""
+        threading.Thread(target=self._run, args=(list(paths), None), daemon=True).start()
+
+    def refresh(self, paths: Sequence[str], removed: Sequence[str] = ()) -> None:
+        """Re-parse `paths` if they changed on disk and forget `removed`, leaving the rest alone."""
+        threading.Thread(target=self._run, args=(list(paths), list(removed)), daemon=True).start()
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    def symbols_for(self, path: str) -> Optional[List[Symbol]]:
+        """Symbols of one file, or None if it is not indexed (or failed to parse)."""
+        with self._lock:
+            entry = self._entries.get(path)
+        return None if entry is None else entry[2]
+
+    def search(self, query: str, limit: int = 50) -> List[Tuple[int, str, Symbol]]:
+        """Fuzzy-match symbol names; returns (score, path, symbol), best first.
+
+        The best names are found first, then expanded to every symbol of that
+        name, ordered by path and line.
+        """
+        scored = []
+        for score, key in self._names.search(query, limit):
+            with self._lock:
+                holders = sorted(self._name_paths.get(key, {}))
+                for path in holders:
+                    entry = self._entries.get(path)
+                    for symbol in entry[2] if entry is not None and entry[2] else ():
+                        if symbol[1].replace(".", "/") == key:
+                            scored.append((score, path, symbol))
+            if len(scored) >= limit:
+                break
+        return scored[:limit]
+
+    def outline_text(self, max_chars: int = 4000) -> str:
+        """A compact listing of the project's classes and top-level functions, for agent context.
+
+        Files are listed in path order and the listing stops at `max_chars`.
+        """
+        with self._lock:
+            items = sorted((path, entry[2]) for path, entry in self._entries.items() if entry[2])
+        lines: List[str] = []
+        used = 0
+        for path, symbols in items:
+            try:
+                shown = Path(path).relative_to(self.root).as_posix()
+            except ValueError:
+                shown = path
+            names = [f"{kind} {name}" for kind, name, _, depth in symbols if depth <= 1]
+            line = f"{shown}: {', '.join(names)}"
+            if used + len(line) + 1 > max_chars:
+                lines.append("...")
+                break
+            lines.append(line)
+            used += len(line) + 1
+        return "\n".join(lines)
@@ -0,0 +1,462 @@
+"""Line-incremental syntax lexing for the IDE editor."""
+
+import builtins
+import keyword
+import re
+from typing import Dict, List, Optional, Tuple, Union
+
+# What a line leaves open for the next one: an unterminated Python string quote
+# (e.g. '"""') or a table lexer mode (e.g. "js_comment"). None means nothing is open.
+LexState = Optional[str]
+# (tag, start_col, end_col) within one line.
+Token = Tuple[str, int, int]
+
+SYNTAX_TAGS = (
+    "syn_keyword",
+    "syn_builtin",
+    "syn_string",
+    "syn_comment",
+    "syn_number",
+    "syn_function",
+    "syn_class",
+    "syn_decorator",
+)
+
+# Lines longer than this (minified bundles) are lexed for state but left unpainted;
+# thousands of tag ranges on one Tk line cost more than the colors are worth.
+LONG_LINE_CHARS = 10_000
+
+_PY_TOKEN_RE = re.compile(
+    r"""
+    (?P<comment>\#.*)
+    |(?P<string>(?:[rR][bBfF]?|[bBfF][rR]?|[uU])?(?:'''|\"\"\"|'|"))
+    |(?P<name>[^\W\d]\w*)
+    |(?P<number>
+        0[xX][0-9a-fA-F_]+
+        |0[bB][01_]+
+        |0[oO][0-7_]+
+        |(?:\d[\d_]*(?:\.[\d_]*)?|\.\d[\d_]*)(?:[eE][+-]?\d[\d_]*)?[jJ]?
+    )
+    |(?P<space>\s+)
+    |(?P<other>.)
+    """,
+    re.VERBOSE,
+)
+
+
+def _scan_string(line: str, pos: int, quote: str) -> int:
+    """Return the index just past the closing `quote`, or -1 if the line ends first."""
+    length = len(line)
+    while pos < length:
+        char = line[pos]
+        if char == "\\":
+            # Backslash skips the next character in raw strings too, as far as
+            # finding the closing quote is concerned.
+            pos += 2
+            continue
+        if line.startswith(quote, pos):
+            return pos + len(quote)
+        pos += 1
+    return -1
+
+
+class PythonLineLexer:
+    """Lex Python one line at a time, carrying only open-string state between lines.
+
+    States are small hashable values, so a caller can cache the state at the
+    end of every line and stop re-lexing as soon as a line ends in the same
+    state it ended in before an edit.
+    """
+
+    name = "python"
+
+    def __init__(self):
+        self.keywords = set(keyword.kwlist)
+        self.builtins = set(dir(builtins))
+
+    def lex_line(self, line: str, state: LexState) -> Tuple[List[Token], LexState]:
+        """Return the tagged ranges of `line` and the state at its end."""
+        tokens: List[Token] = []
+        pos = 0
+        if state is not None:
+            end = _scan_string(line, 0, state)
+            if end < 0:
+                tokens.append(("syn_string", 0, len(line)))
+                return tokens, self._carry_string(line, state)
+            tokens.append(("syn_string", 0, end))
+            pos = end
+
+        previous = ""
+        length = len(line)
+        while pos < length:
+            match = _PY_TOKEN_RE.match(line, pos)
+            kind = match.lastgroup
+            text = match.group()
+            if kind == "string":
+                quote = text.lstrip("rRbBfFuU")
+                end = _scan_string(line, match.end(), quote)
+                if end < 0:
+                    tokens.append(("syn_string", pos, length))
+                    return tokens, self._carry_string(line, quote)
+                tokens.append(("syn_string", pos, end))
+                previous = "string"
+                pos = end
+                continue
+            if kind == "name":
+                if previous == "@":
+                    tokens.append(("syn_decorator", pos, match.end()))
+                elif previous == "def":
+                    tokens.append(("syn_function", pos, match.end()))
+                elif previous == "class":
+                    tokens.append(("syn_class", pos, match.end()))
+                elif text in self.keywords:
+                    tokens.append(("syn_keyword", pos, match.end()))
+                elif text in self.builtins:
+                    tokens.append(("syn_builtin", pos, match.end()))
+                previous = text
+            elif kind == "comment":
+                tokens.append(("syn_comment", pos, match.end()))
+            elif kind == "number":
+                tokens.append(("syn_number", pos, match.end()))
+                previous = text
+            elif kind == "other":
+                previous = text
+            pos = match.end()
+        return tokens, None
+
+    @staticmethod
+    def _carry_string(line: str, quote: str) -> LexState:
+        """Decide whether an unterminated string continues onto the next line."""
+        if len(quote) == 3:
+            return quote
+        # Single-quoted strings only continue after a trailing backslash.
+        trailing = len(line) - len(line.rstrip("\\"))
+        return quote if trailing % 2 == 1 else None
+
+
+# Rule tables for TableLexer: mode -> ordered (pattern, tag, next_mode) rules.
+# A tag of "ident" looks the match up in the mode's word table; next_mode None
+# stays in the current mode. The first rule that matches at a position wins.
+_HTML_TAG_RULES = [
+    (r"[\w:.-]+", "syn_builtin", None),
+    (r'"[^"]*"?', "syn_string", None),
+    (r"'[^']*'?", "syn_string", None),
+    (r"\s+|=", None, None),
+]
+_CSS_COMMON_RULES = [
+    (r'"(?:[^"\\]|\\.)*"?', "syn_string", None),
+    (r"'(?:[^'\\]|\\.)*'?", "syn_string", None),
+]
+_JS_STRING_RULES = [
+    (r'"(?:[^"\\]|\\.)*"?', "syn_string", None),
+    (r"'(?:[^'\\]|\\.)*'?", "syn_string", None),
+    (r"`(?:[^`\\]|\\.)*`", "syn_string", None),
+    (r"`(?:[^`\\]|\\.)*\\?$", "syn_string", "js_template"),
+]
+
+WEB_LEXER_RULES: Dict[str, List[Tuple[str, Optional[str], Optional[str]]]] = {
+    "html": [
+        (r"<!--(?:(?!-->).)*-->", "syn_comment", None),
+        (r"<!--.*", "syn_comment", "html_comment"),
+        (r"(?i:<!doctype)[^>]*>?", "syn_decorator", None),
+        (r"(?i:<style)\b", "syn_keyword", "html_tag_style"),
+        (r"(?i:<script)\b", "syn_keyword", "html_tag_script"),
+        (r"</?[A-Za-z][\w:.-]*", "syn_keyword", "html_tag"),
+        (r"&#?\w+;", "syn_number", None),
+        (r"[^<&]+|.", None, None),
+    ],
+    "html_comment": [
+        (r"(?:(?!-->).)*-->", "syn_comment", "html"),
+        (r".+", "syn_comment", None),
+    ],
+    "html_tag": [(r"/?>", "syn_keyword", "html")] + _HTML_TAG_RULES,
+    "html_tag_style": [(r"/>", "syn_keyword", "html"), (r">", "syn_keyword", "css")] + _HTML_TAG_RULES,
+    "html_tag_script": [(r"/>", "syn_keyword", "html"), (r">", "syn_keyword", "js")] + _HTML_TAG_RULES,
+    # CSS outside declaration blocks: selectors and at-rules.
+    "css": [
+        (r"(?=(?i:</style)\b)", None, "html"),
+        (r"/\*(?:(?!\*/).)*\*/", "syn_comment", None),
+        (r"/\*.*", "syn_comment", "css_comment"),
+        (r"\{", None, "css_block"),
+        (r"@[\w-]+", "syn_decorator", None),
+        (r"\.-?[A-Za-z_][\w-]*", "syn_class", None),
+        (r"#-?[A-Za-z_][\w-]*", "syn_function", None),
+        (r"::?[\w-]+", "syn_builtin", None),
+        (r"[A-Za-z][\w-]*", "syn_keyword", None),
+    ]
+    + _CSS_COMMON_RULES
+    + [(r"[^\w\s{}/<@.#:'\"-]+|\s+|.", None, None)],
+    # CSS inside { ... }: properties and values.
+    "css_block": [
+        (r"(?=(?i:</style)\b)", None, "html"),
+        (r"/\*(?:(?!\*/).)*\*/", "syn_comment", None),
+        (r"/\*.*", "syn_comment", "css_block_comment"),
+        (r"\}", None, "css"),
+        (r"--[\w-]+|-?[A-Za-z][\w-]*(?=\s*:)", "syn_builtin", None),
+        (r"#[0-9a-fA-F]{3,8}\b", "syn_number", None),
+        (r"[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?(?:%|[A-Za-z]+)?", "syn_number", None),
+        (r"!\s*important\b", "syn_keyword", None),
+        (r"-?[A-Za-z_][\w-]*(?=\()", "syn_function", None),
+        (r"-?[A-Za-z_][\w-]*", None, None),
+    ]
+    + _CSS_COMMON_RULES
+    + [(r"\s+|.", None, None)],
+    "css_comment": [
+        (r"(?=(?i:</style)\b)", None, "html"),
+        (r"(?:(?!\*/).)*\*/", "syn_comment", "css"),
+        (r".+", "syn_comment", None),
+    ],
+    "css_block_comment": [
+        (r"(?=(?i:</style)\b)", None, "html"),
+        (r"(?:(?!\*/).)*\*/", "syn_comment", "css_block"),
+        (r".+", "syn_comment", None),
+    ],
+    "js": [
+        (r"(?=(?i:</script)\b)", None, "html"),
+        (r"//(?:(?!(?i:</script)\b).)*", "syn_comment", None),
+        (r"/\*(?:(?!\*/).)*\*/", "syn_comment", None),
+        (r"/\*.*", "syn_comment", "js_comment"),
+    ]
+    + _JS_STRING_RULES
+    + [
+        (
+            r"\b(?:0[xX][0-9a-fA-F_]+|0[bB][01_]+|0[oO][0-7_]+"
+            r"|(?:\d[\d_]*\.?[\d_]*|\.\d[\d_]*)(?:[eE][+-]?\d+)?)n?",
+            "syn_number",
+            None,
+        ),
+        (r"@[A-Za-z_$][\w$.]*", "syn_decorator", None),
+        (r"[A-Za-z_$][\w$]*", "ident", None),
+        (r"\s+|[^\w\s$'\"`/<@]+|.", None, None),
+    ],
+    "js_comment": [
+        (r"(?=(?i:</script)\b)", None, "html"),
+        (r"(?:(?!\*/).)*\*/", "syn_comment", "js"),
+        (r".+", "syn_comment", None),
+    ],
+    "js_template": [
+        (r"(?:[^`\\]|\\.)*`", "syn_string", "js"),
+        (r".+", "syn_string", None),
+    ],
+}
+
+_JS_WORDS = {
+    "keywords": {
+        "async", "await", "break", "case", "catch", "class", "const", "continue",
+        "debugger", "default", "delete", "do", "else", "export", "extends", "false",
+        "finally", "for", "from", "function", "if", "import", "in", "instanceof",
+        "let", "new", "null", "of", "return", "static", "super", "switch", "this",
+        "throw", "true", "try", "typeof", "undefined", "var", "void", "while",
+        "with", "yield",
+    },
+    "builtins": {
+        "Array", "Boolean", "Date", "Error", "JSON", "Map", "Math", "Number",
+        "Object", "Promise", "Proxy", "Reflect", "RegExp", "Set", "String",
+        "Symbol", "WeakMap", "WeakSet", "console", "document", "fetch",
+        "globalThis", "localStorage", "parseFloat", "parseInt", "require",
+        "setInterval", "setTimeout", "window",
+    },
+    # A name right after one of these words is what that word defines.
+    "definers": {"function": "syn_function", "class": "syn_class"},
+}
+
+
+class TableLexer:
+    """Resumable lexer driven by a table of per-mode regex rules.
+
+    The state carried between lines is just the mode name, so it plugs into
+    LineStateCache and lex_lines exactly like PythonLineLexer. Each mode's rules
+    are compiled into one alternation, which keeps the per-token cost to a
+    single regex match even on megabyte-sized bundles.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        initial_mode: str,
+        rules: Dict[str, List[Tuple[str, Optional[str], Optional[str]]]] = WEB_LEXER_RULES,
+        words: Optional[Dict[str, Dict[str, object]]] = None,
+    ):
+        self.name = name
+        self.initial_mode = initial_mode
+        self.words = words if words is not None else {"js": _JS_WORDS}
+        self._modes: Dict[str, Tuple["re.Pattern[str]", List[Tuple[Optional[str], Optional[str]]]]] = {}
+        for mode, mode_rules in rules.items():
+            pattern = "|".join(f"(?P<r{index}>{rule[0]})" for index, rule in enumerate(mode_rules))
+            self._modes[mode] = (re.compile(pattern), [(tag, target) for _, tag, target in mode_rules])
+
+    def lex_line(self, line: str, state: LexState) -> Tuple[List[Token], LexState]:
+        """Return the tagged ranges of `line` and the mode it leaves open."""
+        tokens: List[Token] = []
+        mode = state or self.initial_mode
+        regex, actions = self._modes[mode]
+        previous = ""
+        pos = 0
+        length = len(line)
+        while pos < length:
+            match = regex.match(line, pos)
+            if match is None:
+                pos += 1
+                continue
+            tag, target = actions[int(match.lastgroup[1:])]
+            end = match.end()
+            if tag == "ident":
+                text = match.group()
+                words = self.words.get(mode, {})
+                if previous in words.get("definers", {}):
+                    tag = words["definers"][previous]
+                elif text in words.get("keywords", ()):
+                    tag = "syn_keyword"
+                elif text in words.get("builtins", ()):
+                    tag = "syn_builtin"
+                else:
+                    tag = None
+                previous = text
+            elif not line[pos:end].isspace():
+                previous = ""
+            if tag is not None and end > pos:
+                tokens.append((tag, pos, end))
+            if target is not None:
+                mode = target
+                regex, actions = self._modes[mode]
+            elif end == pos:
+                # Zero-width rules must switch modes; otherwise step past the character.
+                end = pos + 1
+            pos = end
+        return tokens, (None if mode == self.initial_mode else mode)
+
+
+def lexer_for_language(language: str):
+    """Return a line lexer for an editor language name ("python", "html", "css", "javascript")."""
+    if language == "css":
+        return TableLexer("css", "css")
+    if language == "javascript":
+        return TableLexer("javascript", "js")
+    if language == "html":
+        return TableLexer("html", "html")
+    return PythonLineLexer()
+
+
+class LineStateCache:
+    """End-of-line lexer states plus the line range an edit has invalidated.
+
+    Lines are 1-based, matching Tk text indexes. `splice` mirrors each buffer
+    edit so cached states stay aligned with their lines; the highlighter then
+    re-lexes from `dirty_from` and may stop at the first line at or past
+    `dirty_to` whose end state did not change.
+    """
+
+    # Placeholder for a line whose end state is unknown; never equal to a real state.
+    STALE = object()
+
+    def __init__(self):
+        self.states: List[object] = []
+        self.dirty_from = 1
+        self.dirty_to = 0
+
+    def reset(self, line_count: int) -> None:
+        """Forget every cached state and mark the whole buffer dirty."""
+        self.states = [self.STALE] * line_count
+        self.dirty_from = 1
+        self.dirty_to = line_count
+
+    def splice(self, first_line: int, removed_lines: int, added_lines: int) -> None:
+        """Record that lines first..first+removed were replaced by first..first+added."""
+        first_line = max(1, first_line)
+        self.states[first_line - 1 : first_line + removed_lines] = [self.STALE] * (added_lines + 1)
+        delta = added_lines - removed_lines
+        if self.is_clean():
+            self.dirty_from = first_line
+            self.dirty_to = first_line + added_lines
+            return
+        if self.dirty_to >= first_line:
+            self.dirty_to = max(self.dirty_to + delta, first_line + added_lines)
+        else:
+            self.dirty_to = first_line + added_lines
+        self.dirty_from = min(self.dirty_from, first_line)
+
+    def fit(self, line_count: int) -> None:
+        """Fall back to a full re-lex if the cache drifted from the buffer's line count."""
+        if len(self.states) != line_count:
+            self.reset(line_count)
+
+    def is_clean(self) -> bool:
+        return self.dirty_from > self.dirty_to
+
+    def mark_clean(self) -> None:
+        self.dirty_from = len(self.states) + 1
+        self.dirty_to = 0
+
+    def start_state(self, line: int) -> LexState:
+        """Return the lexer state a line starts in (the previous line's end state)."""
+        if line <= 1:
+            return None
+        state = self.states[line - 2]
+        return None if state is self.STALE else state
+
+    def snapshot(self, first_line: int, last_line: int) -> List[object]:
+        """Copy the cached end states of a line range for a worker to compare against."""
+        return self.states[first_line - 1 : last_line]
+
+    def update(self, first_line: int, states: List[LexState]) -> None:
+        """Store end states computed for consecutive lines starting at `first_line`."""
+        self.states[first_line - 1 : first_line - 1 + len(states)] = states
+
+    def advance(self, last_line: int) -> None:
+        """Record that lines through `last_line` are re-lexed but state has not reconverged yet."""
+        self.dirty_from = last_line + 1
+        self.dirty_to = max(self.dirty_to, last_line + 1)
+
+    def invalidate_from(self, line: int) -> None:
+        """Forget states from `line` to the end, e.g. when painted results went stale."""
+        line = max(1, line)
+        self.states[line - 1 :] = [self.STALE] * max(0, len(self.states) - line + 1)
+        self.dirty_from = min(self.dirty_from, line)
+        self.dirty_to = len(self.states)
+
+
+def lex_lines(
+    lexer: Union[PythonLineLexer, TableLexer],
+    lines: List[str],
+    first_line: int,
+    start_state: LexState,
+    old_states: List[object],
+    dirty_to: int,
+    collect_tokens: bool = True,
+) -> Dict[str, object]:
+    """Lex a snapshot of consecutive lines; safe to run off the UI thread.
+
+    Stops at the first line at or past `dirty_to` whose end state matches the
+    cached one in `old_states`. Returns the new end states, per-line tokens
+    (empty when `collect_tokens` is False), the last line lexed, and whether
+    lexing converged before the snapshot ended. Lines over LONG_LINE_CHARS
+    still advance the state but contribute no tokens.
+    """
+    states: List[LexState] = []
+    tokens: List[List[Token]] = []
+    state = start_state
+    for offset, text in enumerate(lines):
+        line_tokens, state = lexer.lex_line(text, state)
+        states.append(state)
+        if collect_tokens:
+            tokens.append(line_tokens if len(text) <= LONG_LINE_CHARS else [])
+        number = first_line + offset
+        previous = old_states[offset] if offset < len(old_states) else LineStateCache.STALE
+        if number >= dirty_to and previous is not LineStateCache.STALE and previous == state:
+            return {"states": states, "tokens": tokens, "last_line": number, "converged": True}
+    return {
+        "states": states,
+        "tokens": tokens,
+        "last_line": first_line + len(lines) - 1,
+        "converged": False,
+    }
+
+
+def group_ranges(first_line: int, line_tokens: List[List[Token]]) -> Dict[str, List[str]]:
+    """Collect Tk index pairs per tag so each tag needs one multi-range tag_add."""
+    ranges: Dict[str, List[str]] = {}
+    for offset, tokens in enumerate(line_tokens):
+        number = first_line + offset
+        for tag, start, end in tokens:
+            ranges.setdefault(tag, []).extend((f"{number}.{start}", f"{number}.{end}"))
+    return ranges
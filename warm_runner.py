@@ -0,0 +1,120 @@
+"""Pre-started Python interpreters that run IDE code without paying start-up and import costs."""
+
+import builtins
+import importlib
+import os
+import subprocess
+import sys
+import threading
+import traceback
+import types
+from typing import List, Optional, Sequence
+
+
+def serve(preload: Sequence[str]) -> None:
+    """Child side: import `preload`, wait for a script path on stdin, then run it as __main__.
+
+    Each interpreter runs exactly one script and exits, so nothing a script
+    defines or patches can leak into the next run.
+    """
+    # Running this file put its own folder first on sys.path; the app's modules must not shadow the preloads.
+    del sys.path[0]
+    for name in preload:
+        try:
+            importlib.import_module(name)
+        except Exception:  # noqa: BLE001
+            # A missing optional library should fail in the user's script, not here.
+            pass
+    path = sys.stdin.readline().strip()
+    if not path:
+        return
+    # The request pipe is not the script's to read; input() sees end-of-file instead.
+    sys.stdin.close()
+    sys.stdin = open(os.devnull, encoding="utf-8")
+    sys.argv = [path]
+    sys.path.insert(0, os.path.dirname(path))
+    with open(path, encoding="utf-8") as handle:
+        source = handle.read()
+    # A real module in sys.modules, so pickle, multiprocessing and get_type_hints find what the script defines.
+    main = types.ModuleType("__main__")
+    main.__file__ = path
+    main.__builtins__ = builtins
+    sys.modules["__main__"] = main
+    try:
+        exec(compile(source, path, "exec"), main.__dict__)
+    except SystemExit:
+        raise
+    except BaseException as exc:  # noqa: BLE001
+        # Skip this frame so the traceback starts at the user's code, like a cold run.
+        traceback.print_exception(type(exc), exc, exc.__traceback__.tb_next)
+        sys.exit(1)
+
+
+class WarmRunnerPool:
+    """Keep `size` interpreters started and preloaded, ready to take a script.
+
+    `take` hands out a ready interpreter and starts a replacement in the
+    background, so back-to-back runs normally find one waiting. Interpreters
+    that died while idle are discarded.
+    """
+
+    def __init__(self, preload: Sequence[str], size: int = 1):
+        self._command = [sys.executable, "-u", os.path.abspath(__file__), *preload]
+        self._size = max(1, size)
+        self._lock = threading.Lock()
+        self._idle: List[subprocess.Popen] = []
+        self._closed = False
+
+    def _spawn(self) -> None:
+        process = subprocess.Popen(
+            self._command,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+        )
+        with self._lock:
+            if not self._closed:
+                self._idle.append(process)
+                return
+        process.kill()
+
+    def _refill(self) -> None:
+        with self._lock:
+            missing = self._size - len(self._idle)
+        for _ in range(missing):
+            try:
+                self._spawn()
+            except OSError:
+                return
+
+    def start(self) -> None:
+        threading.Thread(target=self._refill, daemon=True).start()
+
+    def take(self) -> Optional[subprocess.Popen]:
+        """Return an idle interpreter, or None if none is ready yet."""
+        process = None
+        with self._lock:
+            while self._idle:
+                candidate = self._idle.pop(0)
+                if candidate.poll() is None:
+                    process = candidate
+                    break
+        self.start()
+        return process
+
+    def run(self, process: subprocess.Popen, path: str) -> None:
+        """Send a script path to an interpreter from `take`; it starts executing at once."""
+        assert process.stdin is not None
+        process.stdin.write(f"{path}\n".encode("utf-8"))
+        process.stdin.close()
+
+    def shutdown(self) -> None:
+        with self._lock:
+            self._closed = True
+            idle, self._idle = self._idle, []
+        for process in idle:
+            process.kill()
+
+
+if __name__ == "__main__":
+    serve(sys.argv[1:])